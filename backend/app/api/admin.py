@@ -10,6 +10,11 @@ from app.core.monitoring import health_monitor
 from app.core.reports import report_generator
 from app.core.security import security_manager
 from app.core.i18n import i18n_manager
+from app.core.crypto_manager import crypto_manager
+from app.core.quote_history import quote_history
+from app.core.quote_refresher import quote_refresher
+from app.core.http_client import http_client
+from app.core.cache_manager import cache_manager
 from app.schemas import StandardResponse
 
 router = APIRouter()
@@ -276,4 +281,62 @@ async def get_recent_logs(limit: int = 100):
         }
     except Exception as e:
         atm_logger.log_system('admin', 'logs_error', {'error': str(e)})
-        raise HTTPException(status_code=500, detail="Erro ao obter logs") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erro ao obter logs")
+
+@router.get("/quotes/stats")
+async def get_quote_stats():
+    """Endpoint para estado das cotações e chamadas coalescidas ao upstream"""
+    try:
+        return crypto_manager.get_quote_stats()
+    except Exception as e:
+        atm_logger.log_system('admin', 'quote_stats_error', {'error': str(e)})
+        raise HTTPException(status_code=500, detail="Erro ao obter estatísticas de cotações")
+
+@router.get("/quotes/history/{pair}")
+async def get_quote_history(pair: str, window_seconds: int = 3600, interval_seconds: int = 60):
+    """Endpoint para histórico de cotações (TWAP, mínimo/máximo e velas) do par"""
+    try:
+        if pair not in quote_refresher.fetchers:
+            raise HTTPException(status_code=404, detail=f"Par {pair} não encontrado")
+        if window_seconds <= 0 or interval_seconds <= 0:
+            raise HTTPException(status_code=400, detail="Janela e intervalo devem ser positivos")
+        return quote_history.get_summary(pair, window_seconds, interval_seconds)
+    except HTTPException:
+        raise
+    except Exception as e:
+        atm_logger.log_system('admin', 'quote_history_error', {'pair': pair, 'error': str(e)})
+        raise HTTPException(status_code=500, detail="Erro ao obter histórico de cotações")
+
+@router.get("/http/stats")
+async def get_http_stats():
+    """Endpoint para métricas do cliente HTTP compartilhado (latência, pool e reuso por host)"""
+    try:
+        return http_client.get_stats()
+    except Exception as e:
+        atm_logger.log_system('admin', 'http_stats_error', {'error': str(e)})
+        raise HTTPException(status_code=500, detail="Erro ao obter métricas HTTP")
+
+@router.get("/audit/ingestion")
+async def get_audit_ingestion_stats():
+    """Endpoint para métricas do pipeline de auditoria (fila, lotes, descartes, eventos/s)"""
+    try:
+        from app.core.audit import audit_manager
+        return audit_manager.get_ingestion_stats()
+    except Exception as e:
+        atm_logger.log_system('admin', 'audit_ingestion_error', {'error': str(e)})
+        raise HTTPException(status_code=500, detail="Erro ao obter métricas de auditoria")
+
+@router.get("/cache/stats")
+async def get_cache_stats(reset: bool = False):
+    """Endpoint para telemetria do cache por categoria (hit ratio, backend, latência p50/p99)"""
+    try:
+        stats = {**cache_manager.get_category_stats(), 'totals': cache_manager.get_stats()}
+        if reset:
+            cache_manager.reset_stats()
+            atm_logger.log_audit('admin', 'cache_stats_reset', 'cache', {
+                'timestamp': datetime.utcnow().isoformat()
+            })
+        return stats
+    except Exception as e:
+        atm_logger.log_system('admin', 'cache_stats_error', {'error': str(e)})
+        raise HTTPException(status_code=500, detail="Erro ao obter estatísticas do cache")
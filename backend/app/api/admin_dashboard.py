@@ -16,6 +16,7 @@ from app.core.monitoring_advanced import advanced_monitoring
 from app.core.webhook_manager import webhook_manager, WebhookEventType
 from app.models import Session as SessionModel
 from app.core.crypto_manager import crypto_manager
+from app.core.memoize import memoize
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -24,6 +25,7 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 # ============================================================================
 
 @router.get("/dashboard/overview", response_model=Dict[str, Any])
+@memoize(category='reports', ttl=30)
 def get_dashboard_overview():
     """Obtém visão geral do dashboard"""
     try:
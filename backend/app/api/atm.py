@@ -7,15 +7,15 @@ Endpoints para operações de venda e compra de criptomoedas
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from typing import Dict, Any
-from ..deps import get_db
+from ..deps import get_db, SessionLocal
 from ..schemas import (
     SessionCreateRequest, SessionCreateResponse, SessionStatusResponse,
     PaymentStatusResponse, QuoteRequest, QuoteResponse, SupportedCryptosResponse,
+    QuoteBatchRequest, QuoteBatchResponse,
     PurchaseCreateRequest, PurchaseCreateResponse, PurchaseStatusResponse
 )
 from ..core.session_manager import SessionManager
 from ..core.purchase_manager import PurchaseManager
-from ..core.crypto_manager import CryptoManager
 from ..core.logger import atm_logger
 from datetime import datetime
 
@@ -23,6 +23,7 @@ router = APIRouter(tags=["ATM Operations"])
 
 # Instâncias globais
 from ..core.crypto_manager import crypto_manager
+session_manager = SessionManager(SessionLocal)  # Substituída pela instância de app.main
 
 @router.get("/supported-cryptos", response_model=SupportedCryptosResponse)
 async def get_supported_cryptos():
@@ -52,11 +53,37 @@ async def get_quote(request: QuoteRequest):
         })
         raise HTTPException(status_code=400, detail=str(e))
 
+# Máximo de itens por cotação em lote
+MAX_BATCH_QUOTES = 50
+
+@router.post("/quotes/batch", response_model=QuoteBatchResponse)
+async def get_quotes_batch(request: QuoteBatchRequest):
+    """Obtém várias cotações em uma única chamada"""
+    if len(request.quotes) > MAX_BATCH_QUOTES:
+        raise HTTPException(
+            status_code=400, detail=f"Máximo de {MAX_BATCH_QUOTES} cotações por requisição"
+        )
+    try:
+        results = crypto_manager.get_quotes_batch([
+            {
+                'crypto': item.crypto_type,
+                'amount_ars': item.amount_ars,
+                'transaction_type': item.transaction_type
+            }
+            for item in request.quotes
+        ])
+        return QuoteBatchResponse(quotes=results, count=len(results))
+    except Exception as e:
+        atm_logger.log_error('api', 'quote_batch_error', {
+            'count': len(request.quotes),
+            'error': str(e)
+        })
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/sessions", response_model=SessionCreateResponse)
-async def create_session(request: SessionCreateRequest, db: Session = Depends(get_db)):
+async def create_session(request: SessionCreateRequest):
     """Cria sessão de venda de criptomoeda"""
     try:
-        session_manager = SessionManager(db)
         response = session_manager.create_session(request)
         return response
     except Exception as e:
@@ -69,11 +96,10 @@ async def create_session(request: SessionCreateRequest, db: Session = Depends(ge
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/sessions/{session_code}", response_model=SessionStatusResponse)
-async def get_session_status(session_code: str, db: Session = Depends(get_db)):
-    """Obtém status de uma sessão"""
+async def get_session_status(session_code: str):
+    """Obtém status de uma sessão (servido do cache; banco apenas em cache miss)"""
     try:
-        session_manager = SessionManager(db)
-        response = session_manager.get_session_status(session_code)
+        response = session_manager.get_status(session_code)
         return response
     except Exception as e:
         atm_logger.log_error('api', 'session_status_error', {
@@ -83,11 +109,10 @@ async def get_session_status(session_code: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.get("/sessions/{session_code}/payment-status", response_model=PaymentStatusResponse)
-async def check_payment_status(session_code: str, db: Session = Depends(get_db)):
-    """Verifica status do pagamento de uma sessão"""
+async def check_payment_status(session_code: str):
+    """Verifica status do pagamento de uma sessão (servido do cache; banco apenas em cache miss)"""
     try:
-        session_manager = SessionManager(db)
-        response = session_manager.check_payment_status(session_code)
+        response = session_manager.get_payment_status(session_code)
         return response
     except Exception as e:
         atm_logger.log_error('api', 'payment_status_error', {
@@ -107,7 +132,8 @@ async def create_purchase(request: PurchaseCreateRequest, db: Session = Depends(
             amount_ars=request.amount_ars,
             crypto_type=request.crypto_type,
             crypto_address=request.crypto_address,
-            ars_payment_method=request.ars_payment_method
+            ars_payment_method=request.ars_payment_method,
+            quote_id=request.quote_id
         )
         return PurchaseCreateResponse(**response)
     except Exception as e:
@@ -287,9 +313,7 @@ async def get_communication_stats():
 async def get_real_time_quotes():
     """Obtém cotações em tempo real de BTC (USD) e USDT (ARS)"""
     try:
-        crypto_manager = CryptoManager()
-        
-        # Obter cotações
+        # Obter cotações (instância global; para push contínuo use /ws/quotes)
         btc_usd = crypto_manager.get_btc_usd_quote()
         usdt_ars = crypto_manager.get_usdt_ars_quote()
         
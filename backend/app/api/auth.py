@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 
 from app.deps import get_db
 from app.core.auth import auth_manager, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import atm_config
 from app.core.logger import atm_logger
 
 router = APIRouter()
@@ -79,6 +80,30 @@ async def create_user(
             detail=str(e)
         )
 
+@router.post("/atm-tokens/{atm_id}", response_model=Dict[str, Any])
+async def create_atm_token(
+    atm_id: str,
+    current_user: Dict[str, Any] = Depends(auth_manager.get_current_superuser)
+):
+    """
+    Emite o token do ATM para o cabeçalho X-ATM-Token (apenas superusuários).
+    O ATM precisa estar em security.registered_atm_ids (ou ser o atm.id local);
+    removê-lo da lista revoga o token
+    """
+    registered = atm_config.get('security.registered_atm_ids') or []
+    if atm_id not in registered and atm_id != atm_config.get_atm_id():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ATM não cadastrado"
+        )
+    
+    atm_logger.log_security('auth', 'atm_token_issued', {
+        'atm_id': atm_id,
+        'username': current_user["username"]
+    })
+    
+    return {"atm_id": atm_id, "atm_token": auth_manager.create_atm_token(atm_id)}
+
 @router.post("/change-password")
 async def change_password(
     current_password: str,
@@ -8,8 +8,10 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 import json
 import os
+import queue
 import threading
 import time
+import uuid
 from sqlalchemy import Column, Integer, String, DateTime, Text, create_engine, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
@@ -52,11 +54,31 @@ class AuditManager:
         # Verificar se a tabela existe e criar se necessário
         self._ensure_table_exists()
         
-        # Fila de eventos para processamento assíncrono
-        self.event_queue = []
-        self.queue_lock = threading.Lock()
+        # Fila limitada de eventos para processamento assíncrono
+        self.queue_size = int(self.config.get('audit.queue_size', 10000))
+        self.batch_size = int(self.config.get('audit.batch_size', 500))
+        self.flush_interval = float(self.config.get('audit.flush_interval_seconds', 0.5))
+        self.overflow_policy = self.config.get('audit.overflow_policy', 'spill')  # spill | drop
+        self.spill_dir = self.config.get('audit.spill_dir', 'logs/audit')
+        self.event_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self.spill_lock = threading.Lock()
+        
+        # Métricas de ingestão
+        self.stats_lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'dropped': 0,       # Fila cheia com overflow_policy = drop
+            'spilled': 0,       # Fila cheia com overflow_policy = spill (gravados em disco)
+            'db_errors': 0,
+            'insert_seconds': 0.0,
+            'max_batch': 0
+        }
         
         # Iniciar thread de processamento
+        self.running = True
         self._start_processing_thread()
     
     def _ensure_table_exists(self):
@@ -80,100 +102,212 @@ class AuditManager:
         Inicia thread para processamento assíncrono de eventos de auditoria
         """
         def processing_task():
-            while True:
+            # Reingerir eventos que transbordaram para disco em execuções anteriores
+            self._replay_spill_files()
+            while self.running or not self.event_queue.empty():
                 try:
-                    # Processar eventos na fila
-                    events_to_process = []
-                    
-                    with self.queue_lock:
-                        if self.event_queue:
-                            events_to_process = self.event_queue.copy()
-                            self.event_queue.clear()
-                    
-                    if events_to_process:
-                        self._process_events(events_to_process)
-                        
+                    batch = self._next_batch()
+                    if batch:
+                        self._process_events(batch)
                 except Exception as e:
                     self.logger.log_error('audit', 'processing_error', {'error': str(e)})
-                
-                # Aguardar antes da próxima verificação
-                time.sleep(5)  # Verificar a cada 5 segundos
         
         # Iniciar thread
-        processing_thread = threading.Thread(target=processing_task, daemon=True)
-        processing_thread.start()
+        self.processing_thread = threading.Thread(
+            target=processing_task, daemon=True, name="audit-writer"
+        )
+        self.processing_thread.start()
+    
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Aguarda o primeiro evento e junta outros até batch_size eventos ou
+        flush_interval segundos desde o primeiro (o que ocorrer antes)
+        """
+        try:
+            batch = [self.event_queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                # Esvaziar o que já está na fila sem esperar
+                batch.append(self.event_queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.running:
+                break
+            try:
+                batch.append(self.event_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _replay_spill_files(self):
+        """
+        Grava no banco os arquivos de spill existentes (em lotes) e os remove.
+        Todos os workers rodam isto no início: cada arquivo é reivindicado com um
+        rename para um nome exclusivo do worker, e só quem vencer o rename o lê
+        """
+        try:
+            if not os.path.isdir(self.spill_dir):
+                return
+            names = sorted(os.listdir(self.spill_dir))
+        except Exception as e:
+            self.logger.log_error('audit', 'spill_replay_error', {'error': str(e)})
+            return
+        
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                claimed = self._claim_spill_file(name, path)
+                if claimed is not None:
+                    self._replay_spill_file(claimed)
+            except Exception as e:
+                self.logger.log_error('audit', 'spill_replay_error', {
+                    'filename': path,
+                    'error': str(e)
+                })
+    
+    def _claim_spill_file(self, name: str, path: str) -> Optional[str]:
+        """
+        Renomeia o arquivo para <base>.<pid>-<token>.claimed; None se não for um
+        arquivo de spill, se estiver reivindicado por outro worker ou se outro
+        worker vencer o rename
+        """
+        if not name.startswith('audit_spill_'):
+            return None
+        if name.endswith('.claimed'):
+            # Reivindicação de um worker que morreu durante a reingestão
+            claim_timeout = float(self.config.get('audit.spill_claim_timeout_seconds', 3600))
+            try:
+                if time.time() - os.path.getmtime(path) < claim_timeout:
+                    return None
+            except FileNotFoundError:
+                return None
+        elif not name.endswith(('.jsonl', '.replay')):
+            return None
+        
+        claimed = os.path.join(
+            self.spill_dir, f"{name.split('.', 1)[0]}.{os.getpid()}-{uuid.uuid4().hex[:8]}.claimed"
+        )
+        try:
+            # O arquivo do dia pode estar recebendo eventos deste processo
+            with self.spill_lock:
+                os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        # Marca o instante da reivindicação (o rename preserva o mtime)
+        os.utime(claimed)
+        return claimed
+    
+    def _replay_spill_file(self, path: str):
+        """
+        Reingere um arquivo já reivindicado; linhas inválidas (ex.: gravação
+        interrompida) são registradas e puladas
+        """
+        batch = []
+        skipped = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    if event.get('timestamp'):
+                        event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+                except (ValueError, TypeError, AttributeError) as e:
+                    skipped += 1
+                    self.logger.log_error('audit', 'spill_line_invalid', {
+                        'filename': path,
+                        'line': line_number,
+                        'error': str(e)
+                    })
+                    continue
+                batch.append(event)
+                if len(batch) >= self.batch_size:
+                    self._process_events(batch)
+                    batch = []
+        if batch:
+            self._process_events(batch)
+        os.remove(path)
+        self.logger.log_system('audit', 'spill_replayed', {
+            'filename': path,
+            'skipped_lines': skipped
+        })
+    
+    def _to_row(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'timestamp': event.get('timestamp') or datetime.utcnow(),
+            'user_id': event.get('user_id'),
+            'action': event.get('action'),
+            'resource': event.get('resource'),
+            'resource_id': event.get('resource_id'),
+            'ip_address': event.get('ip_address'),
+            'details': json.dumps(event['details'], default=str) if event.get('details') else None,
+            'status': event.get('status', 'success')
+        }
     
     def _process_events(self, events: List[Dict[str, Any]]):
         """
-        Processa eventos de auditoria em lote
+        Processa eventos de auditoria em lote (um INSERT executemany por lote)
         """
         if not events:
             return
         
+        start = time.perf_counter()
         try:
-            # Criar sessão do banco de dados
-            db = self.db_session_factory()
+            engine = self.db_session_factory.kw['bind']
+            with engine.begin() as connection:
+                connection.execute(
+                    AuditLog.__table__.insert(), [self._to_row(event) for event in events]
+                )
             
-            try:
-                # Criar objetos AuditLog para cada evento
-                audit_logs = []
-                for event in events:
-                    audit_log = AuditLog(
-                        timestamp=event.get('timestamp', datetime.utcnow()),
-                        user_id=event.get('user_id'),
-                        action=event.get('action'),
-                        resource=event.get('resource'),
-                        resource_id=event.get('resource_id'),
-                        ip_address=event.get('ip_address'),
-                        details=json.dumps(event.get('details', {})) if event.get('details') else None,
-                        status=event.get('status', 'success')
-                    )
-                    audit_logs.append(audit_log)
-                
-                # Adicionar ao banco de dados
-                db.add_all(audit_logs)
-                db.commit()
-                
-                # Log de sucesso
-                self.logger.log_system('audit', 'events_processed', {
-                    'count': len(audit_logs)
-                })
-                
-            except Exception as e:
-                db.rollback()
-                raise e
-            finally:
-                db.close()
+            elapsed = time.perf_counter() - start
+            with self.stats_lock:
+                self.stats['written'] += len(events)
+                self.stats['batches'] += 1
+                self.stats['insert_seconds'] += elapsed
+                self.stats['max_batch'] = max(self.stats['max_batch'], len(events))
                 
         except Exception as e:
-            self.logger.log_error('audit', 'db_error', {'error': str(e)})
+            with self.stats_lock:
+                self.stats['db_errors'] += 1
+            self.logger.log_error('audit', 'db_error', {'error': str(e), 'count': len(events)})
             
             # Em caso de erro, tentar salvar em arquivo
             self._save_to_file(events)
     
     def _save_to_file(self, events: List[Dict[str, Any]]):
         """
-        Salva eventos em arquivo em caso de falha no banco de dados
+        Salva eventos em arquivo em caso de falha no banco de dados (no spill_dir,
+        como linhas audit_spill_*.jsonl, para serem reingeridos no próximo início)
         """
         try:
-            # Garantir que o diretório existe
-            os.makedirs('logs/audit', exist_ok=True)
-            
-            # Nome do arquivo com timestamp
-            filename = f"logs/audit/audit_fallback_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            # Salvar eventos em arquivo JSON
-            with open(filename, 'w') as f:
-                json.dump(events, f, default=str)
-            
+            filename = self._append_spill(events)
             self.logger.log_system('audit', 'saved_to_file', {
                 'filename': filename,
                 'count': len(events)
             })
-            
         except Exception as e:
             self.logger.log_error('audit', 'file_save_error', {'error': str(e)})
     
+    def _append_spill(self, events: List[Dict[str, Any]]) -> str:
+        """
+        Acrescenta eventos ao arquivo de spill do dia (uma linha JSON por evento)
+        """
+        os.makedirs(self.spill_dir, exist_ok=True)
+        filename = os.path.join(
+            self.spill_dir, f"audit_spill_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
+        )
+        data = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        with self.spill_lock:
+            with open(filename, 'a', encoding='utf-8') as f:
+                f.write(data)
+        return filename
+    
     def log_event(self, action: str, resource: str, resource_id: Optional[str] = None, 
                  user_id: Optional[str] = None, ip_address: Optional[str] = None, 
                  details: Optional[Dict[str, Any]] = None, status: str = "success"):
@@ -191,9 +325,77 @@ class AuditManager:
             'status': status
         }
         
-        # Adicionar à fila para processamento assíncrono
-        with self.queue_lock:
-            self.event_queue.append(event)
+        # Adicionar à fila para processamento assíncrono (sem bloquear a requisição)
+        try:
+            self.event_queue.put_nowait(event)
+        except queue.Full:
+            self._handle_overflow(event)
+            return
+        with self.stats_lock:
+            self.stats['enqueued'] += 1
+    
+    def _handle_overflow(self, event: Dict[str, Any]):
+        """
+        Fila cheia: grava o evento em disco (spill) ou o descarta contando (drop)
+        """
+        if self.overflow_policy == 'spill':
+            try:
+                self._append_spill([event])
+                with self.stats_lock:
+                    self.stats['spilled'] += 1
+                return
+            except Exception as e:
+                self.logger.log_error('audit', 'spill_error', {'error': str(e)})
+        with self.stats_lock:
+            self.stats['dropped'] += 1
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Encerra a thread de gravação após esvaziar a fila (chamado no shutdown)
+        """
+        self.running = False
+        self.processing_thread.join(timeout)
+        flushed = not self.processing_thread.is_alive()
+        
+        # Thread não terminou a tempo: o que restar vai para arquivo
+        if not flushed:
+            remaining = []
+            while True:
+                try:
+                    remaining.append(self.event_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if remaining:
+                self._save_to_file(remaining)
+        
+        self.logger.log_system('audit', 'flushed', {
+            'flushed': flushed,
+            'written': self.stats['written']
+        })
+        return flushed
+    
+    def get_ingestion_stats(self) -> Dict[str, Any]:
+        """
+        Métricas do pipeline de ingestão (fila, lotes, descartes e vazão em eventos/s)
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        uptime = time.monotonic() - self.started_at
+        stats['queue_depth'] = self.event_queue.qsize()
+        stats['queue_size'] = self.queue_size
+        stats['overflow_policy'] = self.overflow_policy
+        stats['avg_batch'] = (
+            round(stats['written'] / stats['batches'], 1) if stats['batches'] else None
+        )
+        # Vazão do INSERT em lote e vazão média desde o início
+        stats['insert_events_per_second'] = (
+            round(stats['written'] / stats['insert_seconds'], 1)
+            if stats['insert_seconds']
+            else None
+        )
+        stats['events_per_second'] = round(stats['written'] / uptime, 2) if uptime > 0 else None
+        stats['insert_seconds'] = round(stats['insert_seconds'], 3)
+        return stats
     
     def get_logs(self, limit: int = 100, offset: int = 0, 
                 filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
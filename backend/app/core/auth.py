@@ -97,6 +97,16 @@ class AuthManager:
         
         return encoded_jwt
     
+    def create_atm_token(self, atm_id: str) -> str:
+        """
+        Cria credencial assinada do ATM (enviada pelo quiosque no cabeçalho X-ATM-Token)
+        """
+        return jwt.encode(
+            {"sub": atm_id, "typ": "atm", "iat": datetime.utcnow()},
+            SECRET_KEY,
+            algorithm=ALGORITHM
+        )
+    
     async def get_current_user(self, token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
         """
         Obtém usuário atual a partir do token JWT
@@ -110,7 +120,8 @@ class AuthManager:
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             username: str = payload.get("sub")
-            if username is None:
+            # Tokens de ATM (typ=atm) não autenticam usuários
+            if username is None or payload.get("typ") is not None:
                 raise credentials_exception
         except jwt.PyJWTError:
             raise credentials_exception
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Codec de Cache - LiquidGold ATM
+Serialização plugável (json / orjson / msgpack) com compressão acima de um limite
+e cabeçalho versionado por valor, permitindo trocar de codec sem esvaziar o Redis
+"""
+
+import json
+import threading
+import zlib
+from typing import Any, Dict
+
+try:
+    import orjson  # type: ignore
+except Exception:  # Dependência opcional
+    orjson = None
+try:
+    import msgpack  # type: ignore
+except Exception:  # Dependência opcional
+    msgpack = None
+
+# Cabeçalho: marcador, versão do formato, id do codec, flags
+# (nenhum JSON válido começa com o byte 0xC1, então valores antigos sem cabeçalho
+# continuam legíveis como JSON puro)
+HEADER_MARKER = 0xC1
+HEADER_VERSION = 1
+HEADER_SIZE = 4
+FLAG_ZLIB = 0x01
+
+
+class _JsonCodec:
+    id = 1
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class _OrjsonCodec:
+    id = 2
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class _MsgpackCodec:
+    id = 3
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class CacheCodec:
+    """
+    Codifica valores com o codec configurado; decodifica qualquer codec conhecido
+    (pelo id no cabeçalho) ou JSON legado sem cabeçalho
+    """
+
+    def __init__(
+        self, codec: str = "orjson", compression_threshold: int = 1024, compression_level: int = 1
+    ):
+        self.codecs = {c.id: c for c in self._available_codecs()}
+        by_name = {c.name: c for c in self.codecs.values()}
+        # Codec indisponível no ambiente: usar o melhor disponível
+        self.codec = by_name.get(codec) or by_name.get("orjson") or by_name["json"]
+        self.fallback = by_name["json"]
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'encoded': 0,
+            'decoded': 0,
+            'legacy_decoded': 0,   # Valores JSON sem cabeçalho (gravados antes do codec)
+            'compressed': 0,
+            'bytes_raw': 0,
+            'bytes_stored': 0,
+            'fallback_encoded': 0  # Valores que o codec configurado não suportou
+        }
+
+    def _available_codecs(self):
+        codecs = [_JsonCodec()]
+        if orjson is not None:
+            codecs.append(_OrjsonCodec())
+        if msgpack is not None:
+            codecs.append(_MsgpackCodec())
+        return codecs
+
+    def encode(self, value: Any) -> bytes:
+        codec = self.codec
+        try:
+            payload = codec.dumps(value)
+        except TypeError:
+            codec = self.fallback
+            payload = codec.dumps(value)
+            with self.lock:
+                self.stats['fallback_encoded'] += 1
+
+        flags = 0
+        raw_size = len(payload)
+        if raw_size >= self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < raw_size:
+                payload = compressed
+                flags |= FLAG_ZLIB
+
+        with self.lock:
+            self.stats['encoded'] += 1
+            self.stats['bytes_raw'] += raw_size
+            self.stats['bytes_stored'] += len(payload) + HEADER_SIZE
+            if flags & FLAG_ZLIB:
+                self.stats['compressed'] += 1
+
+        return bytes((HEADER_MARKER, HEADER_VERSION, codec.id, flags)) + payload
+
+    def decode(self, data: Any) -> Any:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if not data or data[0] != HEADER_MARKER:
+            with self.lock:
+                self.stats['legacy_decoded'] += 1
+            return json.loads(data)
+
+        version, codec_id, flags = data[1], data[2], data[3]
+        if version != HEADER_VERSION:
+            raise ValueError(f"Versão de cabeçalho de cache desconhecida: {version}")
+        codec = self.codecs.get(codec_id)
+        if codec is None:
+            raise ValueError(f"Codec de cache indisponível: {codec_id}")
+
+        payload = data[HEADER_SIZE:]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        with self.lock:
+            self.stats['decoded'] += 1
+        return codec.loads(payload)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        stats['codec'] = self.codec.name
+        stats['available'] = sorted(c.name for c in self.codecs.values())
+        stats['compression_threshold'] = self.compression_threshold
+        stats['compression_ratio'] = (
+            round(stats['bytes_stored'] / stats['bytes_raw'], 3) if stats['bytes_raw'] else None
+        )
+        return stats
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """
 Sistema de Cache - LiquidGold ATM
-Implementação de cache com Redis para melhorar performance
+Implementação de cache em dois níveis (L1 em memória + Redis) para melhorar performance
 """
 
 import json
 import time
 import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 try:
     import redis  # type: ignore
 except Exception:  # Redis pode não estar instalado no ambiente local
@@ -15,6 +19,9 @@ from typing import Any, Optional, Dict, List, Union
 from datetime import datetime, timedelta
 
 from app.core.logger import atm_logger
+from app.core.config import atm_config
+from app.core.cache_codec import CacheCodec
+from app.core.cache_telemetry import CacheTelemetry
 
 # Configuração do Redis para cache
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -28,17 +35,114 @@ if redis is not None:
         atm_logger.log_error('cache_manager', 'redis_connection_error', {'error': str(e)})
         redis_client = None
 
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Cache L1 em memória do processo: LRU limitado com TTL real por entrada.
+    Os valores são devolvidos sem cópia; quem os recebe não deve alterá-los.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # chave -> (expira_em, valor)
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any:
+        """
+        Retorna o valor ou _MISSING se ausente/expirado
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self.lock:
+            keys = [k for k in self.entries if k.startswith(prefix)]
+            for k in keys:
+                del self.entries[k]
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class CachePipeline:
+    """
+    Operações enfileiradas executadas em lote por CacheManager.pipeline()
+    """
+
+    def __init__(self, manager: "CacheManager"):
+        self.manager = manager
+        self.entries: List[tuple] = []
+        self.deletes: List[str] = []
+
+    def set(
+        self, key: str, value: Any, ttl: Optional[int] = None, category: str = 'default'
+    ) -> "CachePipeline":
+        self.entries.append(self.manager._batch_entry(key, value, ttl, category))
+        return self
+
+    def delete(self, key: str) -> "CachePipeline":
+        self.deletes.append(key)
+        return self
+
+    def execute(self) -> int:
+        if not self.entries and not self.deletes:
+            return 0
+        entries, deletes = self.entries, self.deletes
+        self.entries, self.deletes = [], []
+        return self.manager._write_batch('pipeline', entries, deletes)
+
+
 class CacheManager:
     """
-    Gerenciador de cache utilizando Redis
+    Gerenciador de cache em dois níveis: L1 em memória (LRU com TTL) na frente do Redis
     Implementa padrões de cache para diferentes tipos de dados
     """
-    
+
     def __init__(self):
         self.redis = redis_client
-        self.memory_cache: Dict[str, Any] = {}
         self.logger = atm_logger
-        
+        self.config = atm_config
+        self.memory_cache = LocalCache(int(self.config.get('cache.l1.max_entries', 10000)))
+
+        # Serialização dos valores no Redis (cabeçalho versionado por valor)
+        self.codec = CacheCodec(
+            codec=self.config.get('cache.codec', 'orjson'),
+            compression_threshold=int(self.config.get('cache.compression_threshold_bytes', 1024)),
+            compression_level=int(self.config.get('cache.compression_level', 1))
+        )
+
+        # Após falha do Redis, operar só com o L1 até redis_retry_at
+        self.redis_retry_at = 0.0
+        self.redis_retry_seconds = float(self.config.get('cache.redis_retry_seconds', 5))
+
         # Configurações de TTL (Time To Live) em segundos
         self.ttl_config = {
             'quotes': 60,           # Cotações: 1 minuto
@@ -48,33 +152,134 @@ class CacheManager:
             'config': 1800,          # Configurações: 30 minutos
             'default': 600           # Padrão: 10 minutos
         }
-        
-        # Estatísticas de cache
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'deletes': 0
+
+        # TTL máximo no L1 quando o Redis está disponível (o Redis continua sendo a fonte
+        # compartilhada entre workers). 0 = categoria nunca fica no L1.
+        self.l1_ttl_config = {
+            'quotes': 60,
+            'session_status': 2,
+            'system_health': 10,
+            'reports': 30,
+            'config': 10,
+            'rate_limits': 0,        # Contadores precisam ser globais entre workers
+            'quote_tokens': 0,       # Uso único de quote_id precisa ser global
+            'default': 5
         }
-    
-    def get(self, key: str, default: Any = None) -> Any:
+        self.l1_ttl_config.update(self.config.get('cache.l1.ttl', {}) or {})
+
+        # Índices de categoria (cache:index:<categoria>, ZSET por expiração) para flush sem KEYS
+        self.tag_ttl = max(self.ttl_config.values())
+        self.flush_batch_size = int(self.config.get('cache.flush_batch_size', 500))
+
+        # Com a invalidação entre workers ativa, o L1 pode reter por mais tempo
+        # categorias que mudam por escrita explícita
+        self.l1_coherent_ttl_config = {
+            'session_status': 30,
+            'config': 300
+        }
+        self.l1_coherent_ttl_config.update(self.config.get('cache.l1.coherent_ttl', {}) or {})
+
+        # Invalidação do L1 entre workers via Redis pub/sub
+        self.instance_id = uuid.uuid4().hex
+        self.invalidation_channel = self.config.get(
+            'cache.invalidation_channel', 'liquidgold:cache:invalidate'
+        )
+        self.invalidation_running = False
+        self.invalidation_active = False  # Assinatura confirmada e conectada
+        self.pubsub = None
+        self.config.add_change_listener(self._on_config_change)
+
+        # Estatísticas de cache (contadores e latência por categoria, thread-safe)
+        self.telemetry = CacheTelemetry()
+
+        # Locks locais usados quando o Redis está indisponível: chave -> (token, expira_em)
+        self.local_locks: Dict[str, tuple] = {}
+        self.locks_guard = threading.Lock()
+
+    def _category_for(self, key: str, category: Optional[str] = None) -> str:
+        """
+        Categoria explícita ou derivada do prefixo da chave (ex: quotes:BTC -> quotes)
+        """
+        if category and category != 'default':
+            return category
+        prefix = key.split(':', 1)[0]
+        return prefix if prefix in self.ttl_config or prefix in self.l1_ttl_config else 'default'
+
+    def _ttl_for(self, category: str) -> int:
+        return self.ttl_config.get(category, self.ttl_config['default'])
+
+    def _l1_ttl_for(self, category: str, ttl: float) -> float:
+        """
+        TTL no L1: integral sem Redis; limitado por l1_ttl_config com Redis
+        """
+        if not self._redis_available():
+            return ttl
+        if self.invalidation_active and category in self.l1_coherent_ttl_config:
+            return min(ttl, self.l1_coherent_ttl_config[category])
+        return min(ttl, self.l1_ttl_config.get(category, self.l1_ttl_config['default']))
+
+    def _l1_enabled(self, category: str) -> bool:
+        return self.l1_ttl_config.get(category, self.l1_ttl_config['default']) > 0 or \
+            self.l1_coherent_ttl_config.get(category, 0) > 0
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self.redis_retry_at
+
+    def _redis_failed(self, operation: str, key: str, error: Exception):
+        """
+        Registra falha do Redis e passa a usar apenas o L1 por alguns segundos
+        """
+        self.telemetry.record_error(self._category_for(key))
+        self.redis_retry_at = time.monotonic() + self.redis_retry_seconds
+        self.logger.log_error('cache', f'redis_{operation}_error', {
+            'key': key,
+            'error': str(error)
+        })
+
+    def redis_available(self) -> bool:
         """
-        Obtém valor do cache
+        Redis configurado e fora do intervalo de espera após uma falha
         """
+        return self._redis_available()
+
+    def mark_redis_failed(self, operation: str, key: str, error: Exception):
+        """
+        Para componentes que usam self.redis diretamente (ex.: scripts Lua do rate
+        limiter): registra a falha e suspende o Redis como nas operações internas
+        """
+        self._redis_failed(operation, key, error)
+
+    def get(self, key: str, default: Any = None, category: Optional[str] = None) -> Any:
+        """
+        Obtém valor do cache (L1 primeiro, depois Redis)
+        """
+        start = time.perf_counter()
         try:
-            if self.redis:
-                data = self.redis.get(key)
-                if data:
-                    self.stats['hits'] += 1
-                    return json.loads(data)
+            category = self._category_for(key, category)
+            value = self.memory_cache.get(key)
+            if value is not _MISSING:
+                backend = 'l1' if self._redis_available() else 'fallback'
+                self.telemetry.record_get(category, backend, time.perf_counter() - start)
+                return value
+
+            if self._redis_available():
+                try:
+                    # GET + PTTL em uma ida ao Redis: o L1 nunca sobrevive à chave no Redis
+                    pipe = self.redis.pipeline(transaction=False)
+                    pipe.get(key)
+                    pipe.pttl(key)
+                    data, pttl = pipe.execute()
+                except Exception as e:
+                    self._redis_failed('get', key, e)
                 else:
-                    self.stats['misses'] += 1
-                    return default
-            # Fallback em memória
-            if key in self.memory_cache:
-                self.stats['hits'] += 1
-                return self.memory_cache[key]
-            self.stats['misses'] += 1
+                    if data:
+                        value = self.codec.decode(data)
+                        ttl = self._ttl_for(category) if pttl is None or pttl < 0 else pttl / 1000
+                        self.memory_cache.set(key, value, self._l1_ttl_for(category, ttl))
+                        self.telemetry.record_get(category, 'redis', time.perf_counter() - start)
+                        return value
+
+            self.telemetry.record_get(category, None, time.perf_counter() - start)
             return default
         except Exception as e:
             self.logger.log_error('cache', 'get_error', {
@@ -82,23 +287,32 @@ class CacheManager:
                 'error': str(e)
             })
             return default
-    
+
     def set(self, key: str, value: Any, ttl: Optional[int] = None, category: str = 'default') -> bool:
         """
         Define valor no cache com TTL específico ou baseado na categoria
         """
+        start = time.perf_counter()
         try:
+            category = self._category_for(key, category)
+
             # Determinar TTL
             if ttl is None:
-                ttl = self.ttl_config.get(category, self.ttl_config['default'])
-            
-            # Serializar e armazenar
-            if self.redis:
-                self.redis.setex(key, ttl, json.dumps(value))
-            else:
-                # Fallback em memória (sem TTL real)
-                self.memory_cache[key] = value
-            self.stats['sets'] += 1
+                ttl = self._ttl_for(category)
+
+            # Serializar e armazenar (valor, índice da categoria e invalidação em uma ida)
+            if self._redis_available():
+                try:
+                    pipe = self.redis.pipeline(transaction=False)
+                    pipe.setex(key, ttl, self.codec.encode(value))
+                    self._index_key(pipe, key, ttl)
+                    if self._l1_enabled(category):
+                        self._publish_invalidation('key', [key], pipe)
+                    pipe.execute()
+                except Exception as e:
+                    self._redis_failed('set', key, e)
+            self.memory_cache.set(key, value, self._l1_ttl_for(category, ttl))
+            self.telemetry.record_set(category, time.perf_counter() - start)
             return True
         except Exception as e:
             self.logger.log_error('cache', 'set_error', {
@@ -106,17 +320,23 @@ class CacheManager:
                 'error': str(e)
             })
             return False
-    
+
     def delete(self, key: str) -> bool:
         """
-        Remove valor do cache
+        Remove valor do cache (ambos os níveis)
         """
         try:
-            if self.redis:
-                self.redis.delete(key)
-            else:
-                self.memory_cache.pop(key, None)
-            self.stats['deletes'] += 1
+            self.memory_cache.delete(key)
+            if self._redis_available():
+                try:
+                    pipe = self.redis.pipeline(transaction=False)
+                    pipe.delete(key)
+                    self._unindex_keys(pipe, [key])
+                    self._publish_invalidation('key', [key], pipe)
+                    pipe.execute()
+                except Exception as e:
+                    self._redis_failed('delete', key, e)
+            self.telemetry.record_delete(self._category_for(key))
             return True
         except Exception as e:
             self.logger.log_error('cache', 'delete_error', {
@@ -124,69 +344,458 @@ class CacheManager:
                 'error': str(e)
             })
             return False
-    
+
+    # Operações em lote (uma ida ao Redis por lote)
+
+    def get_many(self, keys: List[str], category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Obtém várias chaves; retorna apenas as encontradas. As ausentes no L1
+        são buscadas no Redis em um único pipeline (GET + PTTL por chave)
+        """
+        result: Dict[str, Any] = {}
+        if not keys:
+            return result
+        self.telemetry.record_batch('get_many', len(keys))
+        start = time.perf_counter()
+        # Resultado por chave para a telemetria: backend do acerto ou None (miss)
+        sources: Dict[str, Optional[str]] = {}
+        try:
+            l1_backend = 'l1' if self._redis_available() else 'fallback'
+            missing = []
+            for key in keys:
+                value = self.memory_cache.get(key)
+                if value is _MISSING:
+                    missing.append(key)
+                    sources[key] = None
+                else:
+                    result[key] = value
+                    sources[key] = l1_backend
+
+            if missing and self._redis_available():
+                try:
+                    pipe = self.redis.pipeline(transaction=False)
+                    for key in missing:
+                        pipe.get(key)
+                        pipe.pttl(key)
+                    replies = pipe.execute()
+                except Exception as e:
+                    self._redis_failed('get_many', missing[0], e)
+                else:
+                    for i, key in enumerate(missing):
+                        data, pttl = replies[2 * i], replies[2 * i + 1]
+                        if not data:
+                            continue
+                        value = self.codec.decode(data)
+                        key_category = self._category_for(key, category)
+                        ttl = (
+                            self._ttl_for(key_category) if pttl is None or pttl < 0 else pttl / 1000
+                        )
+                        self.memory_cache.set(key, value, self._l1_ttl_for(key_category, ttl))
+                        result[key] = value
+                        sources[key] = 'redis'
+
+            self._record_get_many(sources, category, time.perf_counter() - start)
+            return result
+        except Exception as e:
+            self.logger.log_error('cache', 'get_many_error', {
+                'keys': len(keys),
+                'error': str(e)
+            })
+            return result
+
+    def _record_get_many(
+        self, sources: Dict[str, Optional[str]], category: Optional[str], elapsed: float
+    ):
+        """
+        Agrupa os resultados do lote por (categoria, backend); a latência do lote
+        é registrada uma vez por grupo
+        """
+        groups: Dict[tuple, int] = {}
+        for key, backend in sources.items():
+            group = (self._category_for(key, category), backend)
+            groups[group] = groups.get(group, 0) + 1
+        for (key_category, backend), count in groups.items():
+            self.telemetry.record_get(key_category, backend, elapsed, count)
+
+    def _write_batch(self, operation: str, entries: List[tuple], deletes: List[str]) -> int:
+        """
+        Grava (chave, valor, categoria, ttl) e remove chaves em um único pipeline Redis
+        """
+        self.telemetry.record_batch(operation, len(entries) + len(deletes))
+        start = time.perf_counter()
+        deleted = 0
+        if self._redis_available():
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, value, _, ttl in entries:
+                    pipe.setex(key, ttl, self.codec.encode(value))
+                    self._index_key(pipe, key, ttl)
+                delete_reply = None
+                if deletes:
+                    delete_reply = len(pipe)
+                    pipe.delete(*deletes)
+                    self._unindex_keys(pipe, deletes)
+                invalidate = [key for key, _, category, _ in entries if self._l1_enabled(category)]
+                invalidate.extend(deletes)
+                if invalidate:
+                    self._publish_invalidation('key', invalidate, pipe)
+                replies = pipe.execute()
+                if delete_reply is not None:
+                    deleted = replies[delete_reply]
+            except Exception as e:
+                self._redis_failed(operation, (entries or [(deletes[0],)])[0][0], e)
+
+        for key, value, category, ttl in entries:
+            self.memory_cache.set(key, value, self._l1_ttl_for(category, ttl))
+        local_deleted = sum(1 for key in deletes if self.memory_cache.delete(key))
+        elapsed = time.perf_counter() - start
+        set_counts: Dict[str, int] = {}
+        for _, _, category, _ in entries:
+            set_counts[category] = set_counts.get(category, 0) + 1
+        for category, count in set_counts.items():
+            self.telemetry.record_set(category, elapsed, count)
+        delete_counts: Dict[str, int] = {}
+        for key in deletes:
+            category = self._category_for(key)
+            delete_counts[category] = delete_counts.get(category, 0) + 1
+        for category, count in delete_counts.items():
+            self.telemetry.record_delete(category, count)
+        return deleted or local_deleted
+
+    def _batch_entry(self, key: str, value: Any, ttl: Optional[int], category: str) -> tuple:
+        category = self._category_for(key, category)
+        return key, value, category, ttl if ttl is not None else self._ttl_for(category)
+
+    def set_many(
+        self, mapping: Dict[str, Any], ttl: Optional[int] = None, category: str = 'default'
+    ) -> bool:
+        """
+        Define várias chaves em um único pipeline; uma só mensagem de invalidação
+        """
+        if not mapping:
+            return True
+        try:
+            entries = [
+                self._batch_entry(key, value, ttl, category) for key, value in mapping.items()
+            ]
+            self._write_batch('set_many', entries, [])
+            return True
+        except Exception as e:
+            self.logger.log_error('cache', 'set_many_error', {
+                'keys': len(mapping),
+                'error': str(e)
+            })
+            return False
+
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Remove várias chaves com um único DEL
+        """
+        if not keys:
+            return 0
+        try:
+            return self._write_batch('delete_many', [], list(keys))
+        except Exception as e:
+            self.logger.log_error('cache', 'delete_many_error', {
+                'keys': len(keys),
+                'error': str(e)
+            })
+            return 0
+
+    @contextmanager
+    def pipeline(self):
+        """
+        Agrupa set/delete e os envia em lote ao sair do bloco:
+
+            with cache_manager.pipeline() as pipe:
+                pipe.set('quotes:a', 1, category='quotes')
+                pipe.delete('session_status:X')
+        """
+        pipe = CachePipeline(self)
+        yield pipe
+        pipe.execute()
+
+    # Locks distribuídos (SET NX PX no Redis; lock local sem Redis)
+
+    _RELEASE_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def acquire_lock(self, name: str, ttl_seconds: float = 30.0) -> Optional[str]:
+        """
+        Tenta obter o lock sem bloquear; retorna o token do dono ou None
+        """
+        key = f"lock:{name}"
+        token = uuid.uuid4().hex
+        if self._redis_available():
+            try:
+                if self.redis.set(key, token, nx=True, px=int(ttl_seconds * 1000)):
+                    return token
+                return None
+            except Exception as e:
+                self._redis_failed('lock', key, e)
+        with self.locks_guard:
+            holder = self.local_locks.get(key)
+            if holder and holder[1] > time.monotonic():
+                return None
+            self.local_locks[key] = (token, time.monotonic() + ttl_seconds)
+            return token
+
+    def release_lock(self, name: str, token: str) -> bool:
+        """
+        Libera o lock apenas se ainda pertencer ao token (compare-and-delete)
+        """
+        key = f"lock:{name}"
+        with self.locks_guard:
+            holder = self.local_locks.get(key)
+            if holder and holder[0] == token:
+                del self.local_locks[key]
+                return True
+        if self._redis_available():
+            try:
+                return bool(self.redis.eval(self._RELEASE_LOCK_SCRIPT, 1, key, token))
+            except Exception as e:
+                self._redis_failed('unlock', key, e)
+        return False
+
+    def claim_once(self, key: str, ttl_seconds: float) -> Optional[bool]:
+        """
+        Marca a chave como usada com um único SET NX (atômico entre workers).
+        True = primeira reivindicação, False = já usada, None = Redis indisponível
+        (sem fallback local: outro worker não veria a marca)
+        """
+        if not self._redis_available():
+            return None
+        try:
+            return bool(self.redis.set(key, 1, nx=True, px=max(1, int(ttl_seconds * 1000))))
+        except Exception as e:
+            self._redis_failed('claim', key, e)
+            return None
+
+    # Índice de membros por categoria (substitui varreduras KEYS)
+
+    def _tag_key(self, key: str) -> Optional[str]:
+        """
+        ZSET Redis com as chaves da categoria (prefixo antes do primeiro ':'),
+        pontuadas pelo instante de expiração
+        """
+        if ':' not in key:
+            return None
+        return f"cache:index:{key.split(':', 1)[0]}"
+
+    def _index_key(self, pipe, key: str, ttl: int):
+        tag = self._tag_key(key)
+        if tag:
+            now = time.time()
+            pipe.zadd(tag, {key: now + ttl})
+            # Chaves vencidas por TTL saem do índice a cada escrita: o índice não cresce
+            # além das chaves vivas da categoria
+            pipe.zremrangebyscore(tag, '-inf', now)
+            # O índice vive pelo menos tanto quanto as chaves mais longas da categoria
+            pipe.expire(tag, max(int(ttl), self.tag_ttl))
+
+    def _unindex_keys(self, pipe, keys: List[str]):
+        by_tag: Dict[str, List[str]] = {}
+        for key in keys:
+            tag = self._tag_key(key)
+            if tag:
+                by_tag.setdefault(tag, []).append(key)
+        for tag, members in by_tag.items():
+            pipe.zrem(tag, *members)
+
     def flush_category(self, category: str) -> int:
         """
-        Remove todos os valores de uma categoria (por prefixo)
+        Remove todos os valores de uma categoria em O(chaves vivas), pelo índice
+        cache:index:<categoria>, sem varrer o keyspace
         """
         try:
-            pattern = f"{category}:*"
-            if self.redis:
-                keys = self.redis.keys(pattern)
-                if keys:
-                    count = self.redis.delete(*keys)
-                    self.stats['deletes'] += count
-                    return count
-                return 0
-            # Fallback em memória
-            to_delete = [k for k in list(self.memory_cache.keys()) if k.startswith(f"{category}:")]
-            for k in to_delete:
-                self.memory_cache.pop(k, None)
-            self.stats['deletes'] += len(to_delete)
-            return len(to_delete)
+            count = self.memory_cache.delete_prefix(f"{category}:")
+            if self._redis_available():
+                tag = f"cache:index:{category}"
+                # Renomear o índice isola a remoção de gravações concorrentes
+                flushing = f"{tag}:flushing:{self.instance_id}"
+                try:
+                    self.redis.rename(tag, flushing)
+                except Exception:
+                    flushing = None  # Índice inexistente: nada a remover no Redis
+                count = 0
+                if flushing:
+                    # Chaves já vencidas não precisam de DEL
+                    self.redis.zremrangebyscore(flushing, '-inf', time.time())
+                    batch: List[Any] = []
+                    for member, _ in self.redis.zscan_iter(flushing, count=self.flush_batch_size):
+                        batch.append(member)
+                        if len(batch) >= self.flush_batch_size:
+                            count += self.redis.delete(*batch)
+                            batch = []
+                    if batch:
+                        count += self.redis.delete(*batch)
+                    self.redis.delete(flushing)
+                self._publish_invalidation('prefix', [f"{category}:"])
+            self.telemetry.record_delete(category, count)
+            return count
         except Exception as e:
             self.logger.log_error('cache', 'flush_category_error', {
                 'category': category,
                 'error': str(e)
             })
             return 0
-    
-    def get_stats(self) -> Dict[str, int]:
+
+    # Invalidação entre workers
+
+    def _publish_invalidation(self, kind: str, targets: List[str], pipe=None):
+        """
+        Publica invalidação para os L1 dos demais workers (kind: key | prefix | config);
+        com pipe, a publicação segue na mesma ida ao Redis
+        """
+        (pipe or self.redis).publish(self.invalidation_channel, json.dumps({
+            'origin': self.instance_id,
+            'kind': kind,
+            'targets': targets
+        }))
+        self.telemetry.increment('invalidations_sent')
+
+    def _on_config_change(self, key: str):
+        """
+        Configuração alterada neste worker: os demais devem recarregar o arquivo
+        """
+        self.memory_cache.delete_prefix("config:")
+        if key == '*':
+            return  # Recarga do arquivo: a alteração já foi propagada por quem a fez
+        if self._redis_available():
+            try:
+                self._publish_invalidation('config', [key])
+            except Exception as e:
+                self._redis_failed('publish', key, e)
+
+    def _handle_invalidation(self, data: Union[str, bytes]):
+        message = json.loads(data)
+        if message.get('origin') == self.instance_id:
+            return
+        self.telemetry.increment('invalidations_received')
+        kind = message.get('kind')
+        for target in message.get('targets', []):
+            if kind == 'key':
+                self.memory_cache.delete(target)
+            elif kind == 'prefix':
+                self.memory_cache.delete_prefix(target)
+        if kind == 'config':
+            self.config.reload()
+
+    def _invalidation_loop(self):
+        while self.invalidation_running:
+            try:
+                self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                self.pubsub.subscribe(self.invalidation_channel)
+                # Mensagens podem ter sido perdidas enquanto desconectado
+                self.memory_cache.delete_prefix("")
+                self.invalidation_active = True
+                while self.invalidation_running:
+                    message = self.pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        try:
+                            self._handle_invalidation(message['data'])
+                        except Exception as e:
+                            self.logger.log_error(
+                                'cache', 'invalidation_message_error', {'error': str(e)}
+                            )
+            except Exception as e:
+                self.invalidation_active = False
+                self.logger.log_error('cache', 'invalidation_listener_error', {'error': str(e)})
+                time.sleep(self.redis_retry_seconds)
+            finally:
+                self.invalidation_active = False
+                try:
+                    if self.pubsub is not None:
+                        self.pubsub.close()
+                except Exception:
+                    pass
+
+    def start_invalidation_listener(self):
+        """
+        Inicia a thread que assina o canal de invalidação (uma por worker)
+        """
+        if self.redis is None or self.invalidation_running:
+            return
+        self.invalidation_running = True
+        threading.Thread(
+            target=self._invalidation_loop, daemon=True, name="cache-invalidation"
+        ).start()
+
+    def stop_invalidation_listener(self):
+        self.invalidation_running = False
+
+    def get_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas de uso do cache
         """
-        return self.stats
-    
+        return {
+            **self.telemetry.get_counters(),
+            'l1_entries': len(self.memory_cache),
+            'l1_evictions': self.memory_cache.evictions,
+            'l1_expirations': self.memory_cache.expirations,
+            'batches': self.telemetry.get_batches(),
+            'codec': self.codec.get_stats(),
+            'redis_available': self._redis_available(),
+            'invalidation_active': self.invalidation_active
+        }
+
+    def get_category_stats(self) -> Dict[str, Any]:
+        """
+        Hit ratio, divisão por backend e latência p50/p99 por categoria, junto
+        dos TTLs em vigor, para calibrar ttl_config
+        """
+        categories = self.telemetry.get_categories()
+        for category, stats in categories.items():
+            stats['ttl_seconds'] = self._ttl_for(category)
+            stats['l1_ttl_seconds'] = self.l1_ttl_config.get(
+                category, self.l1_ttl_config['default']
+            )
+        return {
+            'categories': categories,
+            'redis_available': self._redis_available(),
+            'invalidation_active': self.invalidation_active
+        }
+
+    def reset_stats(self):
+        """
+        Zera contadores e histogramas (início de uma janela de medição)
+        """
+        self.telemetry.reset()
+
     # Métodos específicos para diferentes tipos de dados
-    
+
     def get_quote(self, crypto_type: str, transaction_type: str) -> Optional[Dict[str, Any]]:
         """
         Obtém cotação em cache
         """
         key = f"quotes:{crypto_type}:{transaction_type}"
         return self.get(key)
-    
+
     def set_quote(self, crypto_type: str, transaction_type: str, quote_data: Dict[str, Any]) -> bool:
         """
         Armazena cotação em cache
         """
         key = f"quotes:{crypto_type}:{transaction_type}"
         return self.set(key, quote_data, category='quotes')
-    
+
     def get_session_status(self, session_code: str) -> Optional[Dict[str, Any]]:
         """
         Obtém status de sessão em cache
         """
         key = f"session_status:{session_code}"
         return self.get(key)
-    
+
     def set_session_status(self, session_code: str, status_data: Dict[str, Any]) -> bool:
         """
         Armazena status de sessão em cache
         """
         key = f"session_status:{session_code}"
         return self.set(key, status_data, category='session_status')
-    
+
     def invalidate_session_status(self, session_code: str) -> bool:
         """
         Invalida cache de status de sessão
@@ -195,4 +804,4 @@ class CacheManager:
         return self.delete(key)
 
 # Instância global
-cache_manager = CacheManager()
\ No newline at end of file
+cache_manager = CacheManager()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Telemetria do Cache - LiquidGold ATM
+Contadores thread-safe e histogramas de latência por categoria de chave e por backend
+(L1, Redis, fallback em memória), para ajustar ttl_config a partir de dados reais
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, Optional
+
+# Limites superiores dos buckets do histograma (microssegundos), em escala ~logarítmica
+LATENCY_BUCKETS_US = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500,
+    1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 250_000, 500_000, 1_000_000
+)
+
+# Origem de um acerto: L1 com Redis saudável, Redis, ou L1 operando sozinho (Redis indisponível)
+BACKENDS = ('l1', 'redis', 'fallback')
+
+
+class LatencyHistogram:
+    """
+    Histograma de latência com buckets fixos (memória constante, inserção O(log n))
+    Não é thread-safe por si só; protegido pelo lock da CacheTelemetry
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_US) + 1)  # último bucket: acima do maior limite
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, elapsed_us: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_US, elapsed_us)] += 1
+        self.count += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Percentil estimado (µs) por interpolação linear dentro do bucket
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            if seen + bucket_count >= target:
+                lower = LATENCY_BUCKETS_US[index - 1] if index > 0 else 0
+                upper = (
+                    LATENCY_BUCKETS_US[index] if index < len(LATENCY_BUCKETS_US) else self.max_us
+                )
+                position = (target - seen) / bucket_count
+                return min(self.max_us, lower + (upper - lower) * position)
+            seen += bucket_count
+        return self.max_us
+
+    def to_dict(self) -> Dict[str, Any]:
+        def micros(value: Optional[float]) -> Optional[float]:
+            return round(value, 1) if value is not None else None
+
+        return {
+            'count': self.count,
+            'avg_us': micros(self.total_us / self.count) if self.count else None,
+            'p50_us': micros(self.percentile(0.50)),
+            'p99_us': micros(self.percentile(0.99)),
+            'max_us': micros(self.max_us) if self.count else None
+        }
+
+
+class CategoryStats:
+    """
+    Contadores e histogramas de uma categoria de chave
+    """
+
+    def __init__(self):
+        self.hits = {backend: 0 for backend in BACKENDS}
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.errors = 0
+        self.get_latency = LatencyHistogram()
+        self.set_latency = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            'hits': hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'hits_by_backend': dict(self.hits),
+            'sets': self.sets,
+            'deletes': self.deletes,
+            'errors': self.errors,
+            'get_latency': self.get_latency.to_dict(),
+            'set_latency': self.set_latency.to_dict()
+        }
+
+
+class CacheTelemetry:
+    """
+    Estatísticas do CacheManager: totais globais, por categoria e por operação em lote
+    Todas as atualizações passam por um único lock (seções críticas de poucos µs)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters: Dict[str, int] = {
+                'hits': 0,
+                'misses': 0,
+                'sets': 0,
+                'deletes': 0,
+                'l1_hits': 0,
+                'redis_errors': 0,
+                'invalidations_sent': 0,
+                'invalidations_received': 0
+            }
+            self.categories: Dict[str, CategoryStats] = {}
+            self.batches: Dict[str, Dict[str, int]] = {}
+
+    def _category(self, category: str) -> CategoryStats:
+        stats = self.categories.get(category)
+        if stats is None:
+            stats = self.categories[category] = CategoryStats()
+        return stats
+
+    def increment(self, counter: str, amount: int = 1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_get(
+        self, category: str, backend: Optional[str], elapsed_seconds: float, count: int = 1
+    ):
+        """
+        Leitura de count chaves da categoria; backend None = miss
+        """
+        with self.lock:
+            stats = self._category(category)
+            if backend is None:
+                stats.misses += count
+                self.counters['misses'] += count
+            else:
+                stats.hits[backend] += count
+                self.counters['hits'] += count
+                if backend != 'redis':
+                    self.counters['l1_hits'] += count
+            stats.get_latency.record(elapsed_seconds * 1_000_000)
+
+    def record_set(self, category: str, elapsed_seconds: float, count: int = 1):
+        with self.lock:
+            stats = self._category(category)
+            stats.sets += count
+            stats.set_latency.record(elapsed_seconds * 1_000_000)
+            self.counters['sets'] += count
+
+    def record_delete(self, category: str, count: int = 1):
+        with self.lock:
+            self._category(category).deletes += count
+            self.counters['deletes'] += count
+
+    def record_error(self, category: str):
+        with self.lock:
+            self._category(category).errors += 1
+            self.counters['redis_errors'] += 1
+
+    def record_batch(self, operation: str, size: int):
+        with self.lock:
+            stats = self.batches.setdefault(operation, {'calls': 0, 'keys': 0, 'max': 0})
+            stats['calls'] += 1
+            stats['keys'] += size
+            stats['max'] = max(stats['max'], size)
+
+    def get_counters(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counters)
+
+    def get_batches(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {operation: dict(values) for operation, values in self.batches.items()}
+
+    def get_categories(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return {
+                category: stats.to_dict() for category, stats in sorted(self.categories.items())
+            }
@@ -1,6 +1,7 @@
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlsplit
 from pathlib import Path
 from datetime import datetime
 
@@ -26,12 +27,41 @@ class ATMConfig:
                 "service_fee_percent": 10.0,
                 "exchange_rate_source": "binance"
             },
+            "quotes": {
+                "fetch_deadline_seconds": 5.0,
+                "hedge_window_seconds": 0.25,
+                "lock_ttl_seconds": 60,
+                "max_parallel_sources": 3,
+                "disabled_sources": [],
+                "pricing_mode": "spot",
+                "twap_window_seconds": 300,
+                "history": {
+                    "dir": "data/quote_history",
+                    "flush_seconds": 30
+                },
+                "stream": {
+                    "client_queue_size": 32
+                },
+                "pairs": {
+                    "BTC:ARS": {"refresh_seconds": 45, "max_stale_seconds": 300},
+                    "BTC:USD": {"refresh_seconds": 45, "max_stale_seconds": 300},
+                    "USDT:ARS": {"refresh_seconds": 45, "max_stale_seconds": 600}
+                }
+            },
             "security": {
                 "max_daily_transactions": 50,
                 "max_daily_amount": 1000000,
                 "session_timeout_minutes": 5,
                 "require_kyc": False,
-                "fraud_detection_enabled": True
+                "fraud_detection_enabled": True,
+                "registered_atm_ids": [],  # ATMs com bucket próprio de rate limit (além de atm.id)
+                "rate_limit_lease": {
+                    "enabled": True,
+                    "fraction": 0.05,     # Lote = 5% do limite do escopo (1 = sem arrendamento)
+                    "max_batch": 20,
+                    "low_water": 0.25,    # Renovar em segundo plano abaixo de 25% do lote
+                    "ttl_seconds": 2      # Cota não gasta nesse prazo é descartada
+                }
             },
             "hardware": {
                 "printer_enabled": True,
@@ -49,10 +79,46 @@ class ATMConfig:
                 "level": "INFO",
                 "retention_days": 30,
                 "audit_enabled": True
+            },
+            "audit": {
+                "queue_size": 10000,          # Eventos aguardando gravação
+                "batch_size": 500,            # Eventos por INSERT
+                "flush_interval_seconds": 0.5,
+                "overflow_policy": "spill",   # spill (arquivo JSONL) | drop (descarta e conta)
+                "spill_dir": "logs/audit",
+                "spill_claim_timeout_seconds": 3600  # Após isso, reivindicação órfã é relida
+            },
+            "cache": {
+                "redis_retry_seconds": 5,
+                "invalidation_channel": "liquidgold:cache:invalidate",
+                "flush_batch_size": 500,
+                "codec": "orjson",
+                "compression_threshold_bytes": 1024,
+                "compression_level": 1,
+                "l1": {
+                    "max_entries": 10000,
+                    "ttl": {},
+                    "coherent_ttl": {}
+                }
+            },
+            "http": {
+                "timeout_seconds": 10.0,
+                "connect_timeout_seconds": 3.0,
+                "max_connections": 100,
+                "max_keepalive_connections": 20,
+                "keepalive_expiry_seconds": 30.0,
+                "http2": True
+            },
+            "simulator": {
+                "enabled": False,
+                "base_url": "http://127.0.0.1:8900"
             }
         }
         
         self.config = self.load_config()
+        
+        # Callbacks chamados após set() (ex: invalidação entre workers)
+        self.change_listeners: List[Callable[[str], None]] = []
     
     def load_config(self) -> Dict[str, Any]:
         """Carrega configuração do arquivo ou cria padrão"""
@@ -114,6 +180,27 @@ class ATMConfig:
         # Definir o valor final
         config[keys[-1]] = value
         self.save_config(self.config)
+        
+        for listener in list(self.change_listeners):
+            try:
+                listener(key)
+            except Exception as e:
+                print(f"Erro ao notificar alteração de configuração: {e}")
+    
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """Registra callback chamado com a chave alterada em set()"""
+        self.change_listeners.append(listener)
+    
+    def reload(self):
+        """Recarrega a configuração do arquivo (alterada por outro processo)"""
+        self.config = self.load_config()
+        
+        # Listeners recebem '*': qualquer chave pode ter mudado
+        for listener in list(self.change_listeners):
+            try:
+                listener('*')
+            except Exception as e:
+                print(f"Erro ao notificar alteração de configuração: {e}")
     
     def get_all(self) -> Dict[str, Any]:
         """Retorna todas as configurações"""
@@ -152,6 +239,28 @@ class ATMConfig:
             'webhook_enabled': self.get('notifications.webhook_enabled', False),
             'webhook_url': self.get('notifications.webhook_url', '')
         }
+    
+    def is_simulator_enabled(self) -> bool:
+        """Verifica se as APIs externas devem ser redirecionadas ao simulador local"""
+        if os.getenv('PROVIDER_SIMULATOR_URL'):
+            return True
+        return bool(self.get('simulator.enabled', False))
+    
+    def resolve_provider_url(self, provider: str, url: str) -> str:
+        """
+        Retorna a URL real do provedor ou, com o simulador habilitado,
+        a mesma rota sob {simulator.base_url}/{provider} (ex: /bitso/v3/ticker/?book=btc_ars)
+        """
+        if not url or not self.is_simulator_enabled():
+            return url
+        base_url = os.getenv('PROVIDER_SIMULATOR_URL') or self.get(
+            'simulator.base_url', 'http://127.0.0.1:8900'
+        )
+        parts = urlsplit(url)
+        resolved = f"{base_url.rstrip('/')}/{provider}{parts.path}"
+        if parts.query:
+            resolved += f"?{parts.query}"
+        return resolved
 
 # Instância global
 atm_config = ATMConfig() 
\ No newline at end of file
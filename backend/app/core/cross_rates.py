@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Motor de Taxas Cruzadas - LiquidGold ATM
+Mantém uma pequena matriz de pares observados e deriva pares ausentes por triangulação
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CrossRateEngine:
+    """
+    Matriz de cotações observadas diretamente (com timestamp); pares ausentes são
+    derivados em memória pelo caminho mais recente, ex: BTC/ARS = BTC/USDT x USDT/ARS
+    """
+
+    def __init__(self, max_legs: int = 2):
+        self.max_legs = max_legs
+        # (base, cotada) -> {'price', 'observed_at', 'source'}
+        self.rates: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, base: str, quote: str, price: float, observed_at: Optional[float] = None,
+                source: Optional[str] = None):
+        """
+        Registra uma cotação observada diretamente
+        """
+        if price <= 0:
+            return
+        with self.lock:
+            self.rates[(base, quote)] = {
+                'price': float(price),
+                'observed_at': observed_at if observed_at is not None else time.time(),
+                'source': source
+            }
+
+    def _edges(
+        self, now: float, max_age: Optional[float]
+    ) -> Dict[str, List[Tuple[str, float, float, str]]]:
+        """
+        Grafo de conversões válidas: moeda -> [(destino, taxa, observado_em, rótulo)]
+        """
+        graph: Dict[str, List[Tuple[str, float, float, str]]] = {}
+        with self.lock:
+            items = list(self.rates.items())
+        for (base, quote), rate in items:
+            if max_age is not None and now - rate['observed_at'] > max_age:
+                continue
+            label = f"{base}/{quote}"
+            graph.setdefault(base, []).append((quote, rate['price'], rate['observed_at'], label))
+            graph.setdefault(quote, []).append(
+                (base, 1.0 / rate['price'], rate['observed_at'], f"1/{label}")
+            )
+        return graph
+
+    def derive(
+        self, base: str, quote: str, max_age: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cotação base/cotada pelo caminho cuja perna mais antiga é a mais recente
+        """
+        now = time.time()
+        graph = self._edges(now, max_age)
+        best: Optional[Dict[str, Any]] = None
+
+        # Busca em profundidade limitada a max_legs pernas
+        stack = [(base, 1.0, float('inf'), [base], [])]
+        while stack:
+            currency, price, oldest, visited, path = stack.pop()
+            for target, rate, observed_at, label in graph.get(currency, []):
+                if target in visited:
+                    continue
+                leg_price = price * rate
+                leg_oldest = min(oldest, observed_at)
+                leg_path = path + [label]
+                if target == quote:
+                    if (
+                        best is None
+                        or leg_oldest > best['observed_at']
+                        or (leg_oldest == best['observed_at'] and len(leg_path) < len(best['path']))
+                    ):
+                        best = {
+                            'price': leg_price,
+                            'observed_at': leg_oldest,
+                            'path': leg_path
+                        }
+                elif len(leg_path) < self.max_legs:
+                    stack.append((target, leg_price, leg_oldest, visited + [target], leg_path))
+
+        if best is None:
+            return None
+
+        return {
+            **best,
+            'pair': f"{base}:{quote}",
+            'source': "cross:" + "*".join(best['path']),
+            'derived': len(best['path']) > 1 or best['path'][0].startswith("1/"),
+            'age_seconds': round(now - best['observed_at'], 3)
+        }
+
+    def get_matrix(self) -> Dict[str, Any]:
+        """
+        Retorna os pares observados diretamente com suas idades
+        """
+        now = time.time()
+        with self.lock:
+            items = list(self.rates.items())
+        return {
+            f"{base}:{quote}": {
+                'price': rate['price'],
+                'source': rate['source'],
+                'age_seconds': round(now - rate['observed_at'], 3)
+            }
+            for (base, quote), rate in items
+        }
+
+
+# Instância global
+cross_rate_engine = CrossRateEngine()
@@ -5,14 +5,43 @@ Suporte para Bitcoin (Lightning) e USDT (TRC20)
 Venda e Compra de criptomoedas
 """
 
-import requests
+import os
+import uuid
 import json
 import time
-from typing import Dict, Any, Optional
-from datetime import datetime
+import jwt
+import numpy as np
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
 from .config import atm_config
 from .logger import atm_logger
 from .cache_manager import cache_manager
+from .price_aggregator import price_aggregator
+from .price_sources import price_source_registry
+from .quote_refresher import quote_refresher
+from .cross_rates import cross_rate_engine
+from .quote_history import quote_history
+from .quote_stream import quote_broadcaster
+
+# Assinatura dos quote IDs (cotações com preço travado)
+QUOTE_TOKEN_SECRET = os.getenv(
+    "QUOTE_TOKEN_SECRET",
+    os.getenv("JWT_SECRET_KEY", "liquidgold_atm_secret_key_change_in_production"),
+)
+QUOTE_TOKEN_ALGORITHM = "HS256"
+
+# Campos da cotação travados no quote ID
+LOCKED_QUOTE_FIELDS = (
+    'crypto', 'network', 'crypto_ars_price', 'amount_ars', 'valor_liquido_ars',
+    'crypto_amount', 'service_fee_percent', 'service_fee_ars', 'transaction_type'
+)
+
+# Moedas de cada par do atualizador na matriz de taxas cruzadas (BTC/USD vem de BTCUSDT)
+PAIR_CURRENCIES = {
+    'BTC:ARS': ('BTC', 'ARS'),
+    'BTC:USD': ('BTC', 'USDT'),
+    'USDT:ARS': ('USDT', 'ARS')
+}
 
 class CryptoManager:
     """Gerenciador de múltiplas criptomoedas"""
@@ -21,10 +50,6 @@ class CryptoManager:
         self.config = atm_config
         self.logger = atm_logger
         
-        # APIs de cotação
-        self.bitso_url = "https://api.bitso.com/v3/ticker/?book=btc_ars"
-        self.binance_url = "https://api.binance.com/api/v3/ticker/price"
-        
         # Configurações de rede
         self.networks = {
             'BTC': {
@@ -47,141 +72,131 @@ class CryptoManager:
             }
         }
     
+    def get_pair_quote(self, pair: str) -> Dict[str, Any]:
+        """Obtém cotação do par com idade, servindo o último preço válido sem bloquear"""
+        try:
+            return quote_refresher.get(pair)
+        except Exception as e:
+            # Upstream indisponível: derivar o par das cotações já observadas
+            derived = self.get_cross_rate(pair)
+            if derived is None:
+                raise
+            self.logger.log_system('crypto_manager', 'cross_rate_fallback', {
+                'pair': pair,
+                'source': derived['source'],
+                'age_seconds': derived['age_seconds'],
+                'error': str(e)
+            })
+            return derived
+    
+    def get_cross_rate(self, pair: str) -> Optional[Dict[str, Any]]:
+        """Deriva a cotação do par pela matriz de taxas cruzadas, sem chamadas de rede"""
+        base, quote = PAIR_CURRENCIES.get(pair, tuple(pair.split(':')))
+        max_age = quote_refresher.get_pair_config(pair)['max_stale_seconds']
+        return cross_rate_engine.derive(base, quote, max_age=max_age)
+    
+    def get_quote_stats(self) -> Dict[str, Any]:
+        """Retorna estado das cotações, coalescência de misses, agregador e saúde das fontes"""
+        return {
+            **quote_refresher.get_stats(),
+            'aggregator': price_aggregator.get_stats(),
+            'sources': price_source_registry.get_health(),
+            'cross_rates': cross_rate_engine.get_matrix(),
+            'stream': quote_broadcaster.get_stats()
+        }
+    
     def get_btc_usd_quote(self) -> float:
         """Obtém cotação BTC/USD do Binance com cache"""
-        # Verificar cache primeiro
-        cached_quote = cache_manager.get("quotes:BTC:USD")
-        if cached_quote:
-            return float(cached_quote["price"])
-            
+        return float(self.get_pair_quote("BTC:USD")["price"])
+    
+    def get_btc_ars_quote(self) -> float:
+        """Obtém cotação BTC/ARS do Bitso com cache"""
+        return float(self.get_pair_quote("BTC:ARS")["price"])
+    
+    def get_usdt_ars_quote(self) -> float:
+        """Obtém cotação USDT/ARS via múltiplas APIs com cache"""
+        return float(self._get_usdt_ars_snapshot()["price"])
+    
+    def _get_usdt_ars_snapshot(self) -> Dict[str, Any]:
+        """Cotação USDT/ARS com fallback fixo quando nenhuma fonte responde"""
         try:
-            response = requests.get(f"{self.binance_url}?symbol=BTCUSDT", timeout=5)
-            data = response.json()
-            price = float(data["price"])
-            
-            # Armazenar no cache
-            cache_manager.set("quotes:BTC:USD", {"price": price, "timestamp": datetime.now().isoformat()}, category="quotes")
-            
-            return price
+            return self.get_pair_quote("USDT:ARS")
+        except Exception as e:
+            self.logger.log_system('crypto_manager', 'usdt_quote_error', {'error': str(e)})
+            return {'price': 1000.0, 'source': 'fallback', 'age_seconds': None}  # Fallback final
+    
+    def _fetch_pair_quote(self, pair: str) -> Dict[str, Any]:
+        """Busca o par nas fontes registradas, consultando as mais saudáveis em paralelo"""
+        sources = price_source_registry.sources_for(pair)
+        if not sources:
+            raise Exception(f"Nenhuma fonte disponível para {pair}")
+        
+        max_parallel = int(self.config.get('quotes.max_parallel_sources', 3))
+        label = pair.replace(':', '_').lower()
+        
+        # Um único prazo para a busca inteira: o segundo lote usa só o que sobrou
+        deadline = float(self.config.get('quotes.fetch_deadline_seconds', 5.0))
+        deadline_at = time.monotonic() + deadline
+        
+        # Primeiro as fontes mais saudáveis; as demais só se todas falharem
+        for batch in (sources[:max_parallel], sources[max_parallel:]):
+            remaining = deadline_at - time.monotonic()
+            if not batch or remaining <= 0:
+                continue
+            result = price_aggregator.fetch(
+                [(source.name, source.fetch) for source in batch],
+                deadline=remaining,
+                window=self.config.get('quotes.hedge_window_seconds', 0.25),
+                label=label
+            )
+            if result:
+                return {"price": result['price'], "source": result['source']}
+        
+        raise Exception(f"Não foi possível obter cotação {pair} de nenhuma fonte")
+    
+    def _fetch_btc_usd_quote(self) -> Dict[str, Any]:
+        """Busca BTC/USD (sem cache)"""
+        try:
+            return self._fetch_pair_quote("BTC:USD")
         except Exception as e:
             self.logger.log_system('crypto_manager', 'btc_usd_quote_error', {'error': str(e)})
             raise Exception(f"Erro ao buscar cotação BTC/USD: {e}")
     
-    def get_btc_ars_quote(self) -> float:
-        """Obtém cotação BTC/ARS do Bitso com cache"""
-        # Verificar cache primeiro
-        cached_quote = cache_manager.get("quotes:BTC:ARS")
-        if cached_quote:
-            return float(cached_quote["price"])
-            
+    def _fetch_btc_ars_quote(self) -> Dict[str, Any]:
+        """Busca BTC/ARS (sem cache)"""
         try:
-            response = requests.get(self.bitso_url, timeout=5)
-            data = response.json()
-            price = float(data["payload"]["last"])
-            
-            # Armazenar no cache
-            cache_manager.set("quotes:BTC:ARS", {"price": price, "timestamp": datetime.now().isoformat()}, category="quotes")
-            
-            return price
+            return self._fetch_pair_quote("BTC:ARS")
         except Exception as e:
             self.logger.log_system('crypto_manager', 'btc_quote_error', {'error': str(e)})
             raise Exception(f"Erro ao buscar cotação BTC/ARS: {e}")
     
-    def get_usdt_ars_quote(self) -> float:
-        """Obtém cotação USDT/ARS via múltiplas APIs com cache"""
-        # Verificar cache primeiro
-        cached_quote = cache_manager.get("quotes:USDT:ARS")
-        if cached_quote:
-            return float(cached_quote["price"])
-            
-        try:
-            # Tentar múltiplas APIs em ordem de prioridade
-            price = None
-            source = None
-            
-            # 1. Ripio API (corretora argentina)
-            try:
-                ripio_response = requests.get("https://api.ripio.com/public/v1/market/", timeout=5)
-                ripio_data = ripio_response.json()
-                for pair in ripio_data.get('data', []):
-                    if pair.get('pair') == 'USDT_ARS':
-                        price = float(pair.get('last_price', 0))
-                        source = "ripio"
-                        break
-            except Exception as e:
-                self.logger.log_error('crypto_manager', 'usdt_quote_ripio_error', {'error': str(e)})
-            
-            # 2. Buenbit API (corretora argentina)
-            if not price:
-                try:
-                    buenbit_response = requests.get("https://api.buenbit.com/api/v1/market/ticker", timeout=5)
-                    buenbit_data = buenbit_response.json()
-                    for ticker in buenbit_data.get('data', []):
-                        if ticker.get('symbol') == 'USDT_ARS':
-                            price = float(ticker.get('last_price', 0))
-                            source = "buenbit"
-                            break
-                except Exception as e:
-                    self.logger.log_error('crypto_manager', 'usdt_quote_buenbit_error', {'error': str(e)})
-            
-            # 3. Lemon API (corretora argentina)
-            if not price:
-                try:
-                    lemon_response = requests.get("https://api.lemon.com/v1/market/ticker", timeout=5)
-                    lemon_data = lemon_response.json()
-                    if 'USDT_ARS' in lemon_data:
-                        price = float(lemon_data['USDT_ARS'].get('last', 0))
-                        source = "lemon"
-                except Exception as e:
-                    self.logger.log_error('crypto_manager', 'usdt_quote_lemon_error', {'error': str(e)})
-            
-            # Se encontrou um preço, armazenar no cache
-            if price and price > 0:
-                cache_manager.set("quotes:USDT:ARS", {
-                    "price": price, 
-                    "timestamp": datetime.now().isoformat(),
-                    "source": source
-                }, category="quotes")
-                return price
-            else:
-                raise Exception("Não foi possível obter cotação USDT/ARS de nenhuma fonte")
-            
-            # 4. Binance + USD/ARS (fallback)
-            try:
-                # USDT/USD
-                binance_response = requests.get(f"{self.binance_url}?symbol=USDTUSD", timeout=5)
-                usdt_usd_data = binance_response.json()
-                usdt_usd_price = float(usdt_usd_data["price"])
-                
-                # USD/ARS (via API de câmbio)
-                usd_ars_response = requests.get("https://api.exchangerate-api.com/v4/latest/USD", timeout=5)
-                usd_ars_data = usd_ars_response.json()
-                usd_ars_rate = float(usd_ars_data['rates']['ARS'])
-                
-                usdt_ars_price = usdt_usd_price * usd_ars_rate
-                return usdt_ars_price
-            except:
-                pass
-            
-            # 5. CoinGecko API (fallback)
-            try:
-                coingecko_response = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=ars", timeout=5)
-                coingecko_data = coingecko_response.json()
-                return float(coingecko_data['tether']['ars'])
-            except:
-                pass
-            
-            # 6. Fallback final
-            self.logger.log_system('crypto_manager', 'usdt_quote_fallback', {
-                'message': 'Usando cotação de fallback para USDT/ARS'
-            })
-            return 1000.0  # 1 USDT = 1000 ARS (fallback)
-            
-        except Exception as e:
-            self.logger.log_system('crypto_manager', 'usdt_quote_error', {'error': str(e)})
-            return 1000.0  # Fallback final
+    def _fetch_usdt_ars_quote(self) -> Dict[str, Any]:
+        """Busca USDT/ARS nas corretoras argentinas e fontes alternativas (sem cache)"""
+        return self._fetch_pair_quote("USDT:ARS")
+    
+    def get_crypto_ars_price(self, crypto: str, use_twap: Optional[bool] = None) -> Dict[str, Any]:
+        """Preço da criptomoeda em ARS: spot ou TWAP do histórico (quotes.pricing_mode)"""
+        if crypto == 'BTC':
+            pair = "BTC:ARS"
+            price_data = self.get_pair_quote(pair)
+        elif crypto == 'USDT':
+            pair = "USDT:ARS"
+            price_data = self._get_usdt_ars_snapshot()
+        else:
+            raise Exception(f"Criptomoeda {crypto} não implementada")
+        
+        if use_twap is None:
+            use_twap = self.config.get('quotes.pricing_mode', 'spot') == 'twap'
+        if use_twap:
+            window = float(self.config.get('quotes.twap_window_seconds', 300))
+            twap = quote_history.twap(pair, window)
+            if twap:
+                return {**price_data, 'price': twap, 'source': f"twap:{int(window)}s"}
+        
+        return price_data
     
-    def get_quote(self, crypto: str, amount_ars: float, transaction_type: str = "VENDA") -> Dict[str, Any]:
+    def get_quote(self, crypto: str, amount_ars: float, transaction_type: str = "VENDA",
+                  use_twap: Optional[bool] = None) -> Dict[str, Any]:
         """Obtém cotação para qualquer criptomoeda (venda ou compra)"""
         if crypto not in self.networks:
             raise Exception(f"Criptomoeda {crypto} não suportada")
@@ -193,13 +208,9 @@ class CryptoManager:
             raise Exception(f"Valor fora dos limites para {crypto} (${network_config['min_amount']:,.2f} a ${network_config['max_amount']:,.2f} ARS)")
         
         try:
-            # Obter cotação
-            if crypto == 'BTC':
-                crypto_ars_price = self.get_btc_ars_quote()
-            elif crypto == 'USDT':
-                crypto_ars_price = self.get_usdt_ars_quote()
-            else:
-                raise Exception(f"Criptomoeda {crypto} não implementada")
+            # Obter cotação (último preço válido, com idade)
+            price_data = self.get_crypto_ars_price(crypto, use_twap)
+            crypto_ars_price = float(price_data['price'])
             
             # Calcular valores baseado no tipo de transação
             if transaction_type == "VENDA":
@@ -217,7 +228,7 @@ class CryptoManager:
             
             service_fee_ars = amount_ars * (service_fee_percent / 100)
             
-            return {
+            quote = {
                 'crypto': crypto,
                 'network': network_config['network'],
                 'crypto_ars_price': crypto_ars_price,
@@ -226,8 +237,12 @@ class CryptoManager:
                 'crypto_amount': crypto_amount,
                 'service_fee_percent': service_fee_percent,
                 'service_fee_ars': service_fee_ars,
-                'transaction_type': transaction_type
+                'transaction_type': transaction_type,
+                'price_age_seconds': price_data.get('age_seconds')
             }
+            quote.update(self.issue_quote_id(quote))
+            
+            return quote
             
         except Exception as e:
             self.logger.log_error('crypto_manager', 'quote_error', {
@@ -238,9 +253,161 @@ class CryptoManager:
             })
             raise
     
-    def create_invoice(self, crypto: str, amount_ars: float, session_code: str, transaction_type: str = "VENDA") -> Dict[str, Any]:
-        """Cria invoice para venda ou compra"""
-        quote_data = self.get_quote(crypto, amount_ars, transaction_type)
+    def get_quotes_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cotações em lote: cada preço resolvido uma vez; valores e taxas vetorizados"""
+        results: List[Dict[str, Any]] = [None] * len(items)
+        valid: List[int] = []
+        
+        # Validação por item (mesmas regras de get_quote)
+        for index, item in enumerate(items):
+            crypto = item.get('crypto')
+            amount_ars = float(item.get('amount_ars', 0))
+            transaction_type = item.get('transaction_type', 'VENDA')
+            network_config = self.networks.get(crypto)
+            
+            if network_config is None:
+                error = f"Criptomoeda {crypto} não suportada"
+            elif transaction_type not in ('VENDA', 'COMPRA'):
+                error = f"Tipo de transação {transaction_type} não suportado"
+            elif (
+                amount_ars < network_config['min_amount']
+                or amount_ars > network_config['max_amount']
+            ):
+                error = (
+                    f"Valor fora dos limites para {crypto} (${network_config['min_amount']:,.2f}"
+                    f" a ${network_config['max_amount']:,.2f} ARS)"
+                )
+            else:
+                valid.append(index)
+                continue
+            
+            results[index] = {'index': index, 'success': False, 'error': error}
+        
+        if not valid:
+            return results
+        
+        # Resolver cada preço uma única vez
+        price_data: Dict[str, Dict[str, Any]] = {}
+        for crypto in {items[i]['crypto'] for i in valid}:
+            try:
+                price_data[crypto] = self.get_crypto_ars_price(crypto)
+            except Exception as e:
+                self.logger.log_error('crypto_manager', 'quote_batch_price_error', {
+                    'crypto': crypto,
+                    'error': str(e)
+                })
+        
+        for i in [i for i in valid if items[i]['crypto'] not in price_data]:
+            results[i] = {
+                'index': i,
+                'success': False,
+                'error': f"Cotação indisponível para {items[i]['crypto']}",
+            }
+        valid = [i for i in valid if items[i]['crypto'] in price_data]
+        if not valid:
+            return results
+        
+        cryptos = [items[i]['crypto'] for i in valid]
+        transaction_types = [items[i].get('transaction_type', 'VENDA') for i in valid]
+        
+        amounts = np.array([float(items[i]['amount_ars']) for i in valid], dtype=np.float64)
+        prices = np.array([float(price_data[c]['price']) for c in cryptos], dtype=np.float64)
+        is_venda = np.array([t == 'VENDA' for t in transaction_types], dtype=bool)
+        fee_percent = np.where(
+            is_venda,
+            [self.networks[c]['service_fee'] for c in cryptos],
+            [self.networks[c]['purchase_fee'] for c in cryptos]
+        ).astype(np.float64)
+        scale = np.power(10.0, [self.networks[c]['decimals'] for c in cryptos])
+        
+        # VENDA: taxa descontada do valor; COMPRA: taxa cobrada por fora
+        valor_liquido = np.where(is_venda, amounts * (1 - fee_percent / 100), amounts)
+        crypto_amounts = np.round(valor_liquido / prices * scale) / scale
+        service_fee_ars = amounts * (fee_percent / 100)
+        
+        for pos, index in enumerate(valid):
+            crypto = cryptos[pos]
+            results[index] = {
+                'index': index,
+                'success': True,
+                'quote': {
+                    'crypto': crypto,
+                    'network': self.networks[crypto]['network'],
+                    'crypto_ars_price': float(prices[pos]),
+                    'amount_ars': float(amounts[pos]),
+                    'valor_liquido_ars': float(valor_liquido[pos]),
+                    'crypto_amount': float(crypto_amounts[pos]),
+                    'service_fee_percent': float(fee_percent[pos]),
+                    'service_fee_ars': float(service_fee_ars[pos]),
+                    'transaction_type': transaction_types[pos],
+                    'price_age_seconds': price_data[crypto].get('age_seconds')
+                }
+            }
+            results[index]['quote'].update(self.issue_quote_id(results[index]['quote']))
+        
+        return results
+    
+    def issue_quote_id(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Gera quote ID assinado e de curta duração com o preço e as taxas travados"""
+        ttl = int(self.config.get('quotes.lock_ttl_seconds', 60))
+        issued_at = datetime.utcnow()
+        expires_at = issued_at + timedelta(seconds=ttl)
+        
+        payload = {
+            'jti': uuid.uuid4().hex,
+            'iat': issued_at,
+            'exp': expires_at,
+            'quote': {field: quote_data[field] for field in LOCKED_QUOTE_FIELDS}
+        }
+        
+        return {
+            'quote_id': jwt.encode(payload, QUOTE_TOKEN_SECRET, algorithm=QUOTE_TOKEN_ALGORITHM),
+            'quote_expires_at': expires_at.isoformat()
+        }
+    
+    def redeem_quote_id(
+        self, quote_id: str, crypto: str, amount_ars: float, transaction_type: str
+    ) -> Dict[str, Any]:
+        """Valida quote ID e retorna a cotação travada (uso único)"""
+        try:
+            payload = jwt.decode(quote_id, QUOTE_TOKEN_SECRET, algorithms=[QUOTE_TOKEN_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise Exception("Cotação expirada. Solicite uma nova cotação")
+        except jwt.PyJWTError:
+            raise Exception("Cotação inválida")
+        
+        quote_data = payload['quote']
+        if (quote_data['crypto'] != crypto
+                or quote_data['transaction_type'] != transaction_type
+                or abs(float(quote_data['amount_ars']) - float(amount_ars)) > 0.005):
+            self.logger.log_security('quote_id_mismatch', 'medium', {
+                'crypto': crypto,
+                'amount_ars': amount_ars,
+                'transaction_type': transaction_type
+            })
+            raise Exception("Cotação não corresponde à transação solicitada")
+        
+        # Impedir reutilização da mesma cotação (SET NX atômico; sem Redis, recusar)
+        remaining = max(0.001, payload['exp'] - time.time())
+        claimed = cache_manager.claim_once(f"quote_tokens:{payload['jti']}", remaining)
+        if claimed is None:
+            raise Exception("Não foi possível validar a cotação. Solicite uma nova cotação")
+        if not claimed:
+            raise Exception("Cotação já utilizada")
+        
+        return quote_data
+    
+    def create_invoice(
+        self,
+        crypto: str,
+        amount_ars: float,
+        session_code: str,
+        transaction_type: str = "VENDA",
+        quote_data: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Cria invoice para venda ou compra (reutiliza a cotação travada se informada)"""
+        if quote_data is None:
+            quote_data = self.get_quote(crypto, amount_ars, transaction_type)
         
         if transaction_type == "VENDA":
             # Cliente vende cripto - gera invoice para receber cripto
@@ -259,9 +426,11 @@ class CryptoManager:
             'quote_data': quote_data
         }
     
-    def create_purchase_address(self, crypto: str, amount_ars: float, purchase_code: str) -> Dict[str, Any]:
+    def create_purchase_address(self, crypto: str, amount_ars: float, purchase_code: str,
+                                quote_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Cria endereço para receber criptomoeda na compra"""
-        quote_data = self.get_quote(crypto, amount_ars, "COMPRA")
+        if quote_data is None:
+            quote_data = self.get_quote(crypto, amount_ars, "COMPRA")
         
         if crypto == 'BTC':
             address = self._create_lightning_address(quote_data, purchase_code)
@@ -372,4 +541,23 @@ class CryptoManager:
         return config['min_amount'] <= amount_ars <= config['max_amount']
 
 # Instância global
-crypto_manager = CryptoManager()
\ No newline at end of file
+crypto_manager = CryptoManager()
+
+# Pares mantidos aquecidos pelo atualizador de cotações
+quote_refresher.register("BTC:ARS", crypto_manager._fetch_btc_ars_quote)
+quote_refresher.register("BTC:USD", crypto_manager._fetch_btc_usd_quote)
+quote_refresher.register("USDT:ARS", crypto_manager._fetch_usdt_ars_quote)
+
+
+def _observe_cross_rate(pair: str, snapshot: Dict[str, Any]):
+    """Alimenta a matriz de taxas cruzadas com cada cotação obtida no upstream"""
+    if pair in PAIR_CURRENCIES:
+        base, quote = PAIR_CURRENCIES[pair]
+        cross_rate_engine.observe(
+            base, quote, snapshot['price'], snapshot['fetched_at'], snapshot.get('source')
+        )
+
+
+quote_refresher.add_listener(_observe_cross_rate)
+quote_refresher.add_listener(quote_history.on_quote)
+quote_refresher.add_listener(quote_broadcaster.on_quote)
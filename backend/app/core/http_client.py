@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP Compartilhado - LiquidGold ATM
+Pools keep-alive por host (sync e async), HTTP/2 quando disponível, timeouts padrão
+e métricas por host de latência, utilização do pool e reuso de conexões
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import atm_config
+from app.core.logger import atm_logger
+
+try:
+    import h2  # noqa: F401  (dependência opcional: pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HostMetrics:
+    """
+    Métricas de chamadas para um host
+    """
+
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.latencies = deque(maxlen=window)  # ms
+        self.status_codes: Dict[int, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        total_connections = self.new_connections + self.reused_connections
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'new_connections': self.new_connections,
+            'reused_connections': self.reused_connections,
+            'reuse_rate': (
+                round(self.reused_connections / total_connections, 3) if total_connections else None
+            ),
+            'latency_avg_ms': round(sum(ordered) / count, 2) if count else None,
+            'latency_p50_ms': round(ordered[count // 2], 2) if count else None,
+            'latency_p95_ms': (
+                round(ordered[min(count - 1, int(count * 0.95))], 2) if count else None
+            ),
+            'status_codes': dict(self.status_codes),
+        }
+
+
+class HttpClientManager:
+    """
+    Ponto único de saída HTTP da aplicação; substitui requests.get/post avulsos
+    (uma conexão TCP+TLS nova por chamada) por pools reaproveitados
+    """
+
+    def __init__(self):
+        self.logger = atm_logger
+        self.config = atm_config
+        self.lock = threading.Lock()
+        self.client: Optional[httpx.Client] = None
+        self.async_client: Optional[httpx.AsyncClient] = None
+        self.async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closing_tasks: Set[asyncio.Task] = set()  # Fechamentos de clientes substituídos
+        self.host_metrics: Dict[str, HostMetrics] = {}
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            float(self.config.get('http.timeout_seconds', 10.0)),
+            connect=float(self.config.get('http.connect_timeout_seconds', 3.0))
+        )
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=int(self.config.get('http.max_connections', 100)),
+            max_keepalive_connections=int(self.config.get('http.max_keepalive_connections', 20)),
+            keepalive_expiry=float(self.config.get('http.keepalive_expiry_seconds', 30.0))
+        )
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            'timeout': self._timeout(),
+            'limits': self._limits(),
+            'http2': HTTP2_AVAILABLE and bool(self.config.get('http.http2', True)),
+            'follow_redirects': True,
+            'headers': {'User-Agent': 'LiquidGold-ATM/1.0'}
+        }
+
+    def get_client(self) -> httpx.Client:
+        """
+        Cliente síncrono compartilhado (thread-safe)
+        """
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = httpx.Client(**self._client_options())
+        return self.client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """
+        Cliente assíncrono compartilhado, vinculado ao event loop atual
+        """
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self.async_loop is not loop:
+            previous, previous_loop = self.async_client, self.async_loop
+            self.async_client = httpx.AsyncClient(**self._client_options())
+            self.async_loop = loop
+            if previous is not None:
+                self._close_async_client(previous, previous_loop, loop)
+        return self.async_client
+
+    def _close_async_client(self, client: httpx.AsyncClient,
+                            client_loop: Optional[asyncio.AbstractEventLoop],
+                            current_loop: asyncio.AbstractEventLoop):
+        """
+        Fecha o cliente substituído (e seu pool) no loop dele, se ainda rodar;
+        senão no loop atual, ignorando erros de transportes do loop encerrado
+        """
+        async def close_quietly():
+            try:
+                await client.aclose()
+            except Exception as e:
+                self.logger.log_error('http_client', 'async_client_close_error', {'error': str(e)})
+
+        if client_loop is not None and client_loop.is_running() and not client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(close_quietly(), client_loop)
+        else:
+            task = current_loop.create_task(close_quietly())
+            self.closing_tasks.add(task)
+            task.add_done_callback(self.closing_tasks.discard)
+
+    def _metrics_for(self, url: str) -> HostMetrics:
+        host = urlsplit(str(url)).netloc or 'unknown'
+        metrics = self.host_metrics.get(host)
+        if metrics is None:
+            with self.lock:
+                metrics = self.host_metrics.setdefault(host, HostMetrics())
+        return metrics
+
+    def _record(self, url: str, start: float, connected: bool,
+                response: Optional[httpx.Response], error: Optional[Exception]):
+        metrics = self._metrics_for(url)
+        with self.lock:
+            metrics.requests += 1
+            metrics.latencies.append((time.perf_counter() - start) * 1000)
+            if connected:
+                metrics.new_connections += 1
+            elif error is None:
+                metrics.reused_connections += 1
+            if error is not None:
+                metrics.errors += 1
+            else:
+                metrics.status_codes[response.status_code] = (
+                    metrics.status_codes.get(response.status_code, 0) + 1
+                )
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Requisição síncrona pelo pool compartilhado; aceita os mesmos argumentos
+        usados com requests (params, json, data, headers, timeout)
+        """
+        connected = []
+        extensions = kwargs.pop('extensions', {}) or {}
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == 'connection.connect_tcp.started':
+                connected.append(True)
+
+        start = time.perf_counter()
+        try:
+            response = self.get_client().request(
+                method, url, extensions={**extensions, 'trace': trace}, **kwargs
+            )
+        except Exception as e:
+            self._record(url, start, bool(connected), None, e)
+            raise
+        self._record(url, start, bool(connected), response, None)
+        return response
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('POST', url, **kwargs)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Requisição assíncrona pelo pool compartilhado
+        """
+        connected = []
+        extensions = kwargs.pop('extensions', {}) or {}
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == 'connection.connect_tcp.started':
+                connected.append(True)
+
+        start = time.perf_counter()
+        try:
+            response = await self.get_async_client().request(
+                method, url, extensions={**extensions, 'trace': trace}, **kwargs
+            )
+        except Exception as e:
+            self._record(url, start, bool(connected), None, e)
+            raise
+        self._record(url, start, bool(connected), response, None)
+        return response
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest('GET', url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest('POST', url, **kwargs)
+
+    def _pool_stats(self, client: Optional[Any]) -> Dict[str, Any]:
+        """
+        Utilização do pool (conexões abertas / ociosas por host)
+        """
+        if client is None:
+            return {'connections': 0, 'idle': 0, 'active': 0, 'hosts': {}}
+        # Internos do httpx/httpcore (não são API pública): ausentes, só não há detalhe
+        pool = getattr(getattr(client, '_transport', None), '_pool', None)
+        connections = getattr(pool, 'connections', None)
+        if connections is None:
+            return {'available': False}
+        connections = list(connections)
+
+        hosts: Dict[str, Dict[str, int]] = {}
+        idle = 0
+        for connection in connections:
+            is_idle_fn = getattr(connection, 'is_idle', None)
+            is_idle = bool(is_idle_fn()) if callable(is_idle_fn) else False
+            idle += 1 if is_idle else 0
+            origin_host = getattr(getattr(connection, '_origin', None), 'host', None)
+            if isinstance(origin_host, bytes):
+                host = origin_host.decode('ascii', 'replace')
+            else:
+                host = str(origin_host) if origin_host else 'unknown'
+            host_stats = hosts.setdefault(host, {'connections': 0, 'idle': 0})
+            host_stats['connections'] += 1
+            host_stats['idle'] += 1 if is_idle else 0
+
+        max_connections = int(self.config.get('http.max_connections', 100))
+        return {
+            'connections': len(connections),
+            'idle': idle,
+            'active': len(connections) - idle,
+            'utilization': (
+                round((len(connections) - idle) / max_connections, 3) if max_connections else None
+            ),
+            'hosts': hosts,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Métricas por host e utilização dos pools
+        """
+        with self.lock:
+            hosts = {host: metrics.to_dict() for host, metrics in self.host_metrics.items()}
+        return {
+            'http2_available': HTTP2_AVAILABLE,
+            'hosts': hosts,
+            'sync_pool': self._pool_stats(self.client),
+            'async_pool': self._pool_stats(self.async_client)
+        }
+
+    def close(self):
+        """
+        Fecha o cliente síncrono (o assíncrono é fechado em aclose)
+        """
+        with self.lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+            self.async_loop = None
+        self.close()
+
+
+# Instância global
+http_client = HttpClientManager()
@@ -4,6 +4,8 @@ import logging
 from sqlalchemy.orm import sessionmaker
 from app.models import Session as SessionModel, InvoiceStatusEnum, SessionStatusEnum
 from datetime import datetime
+from app.core.cache_manager import cache_manager
+from app.core.session_manager import session_status_snapshot
 
 def mock_check_invoice_paid(invoice: str) -> bool:
     """Mock: Simula que invoices terminados em '7' são pagos após 1 minuto"""
@@ -19,20 +21,30 @@ def invoice_checker_loop(db_session_factory: sessionmaker, interval: int = 30):
                 SessionModel.invoice.isnot(None)
             ).all()
             
+            updated = []
             for session in sessions:
                 # Verificar expiração automática
                 if session.status == SessionStatusEnum.aguardando_pagamento and datetime.utcnow() > session.expires_at:
                     session.invoice_status = InvoiceStatusEnum.expirado
                     session.status = SessionStatusEnum.expirada
+                    updated.append(session)
                     logging.info(f"[INVOICE CHECKER] Sessão {session.session_code} expirada automaticamente.")
                 
                 # Verificar pagamento (mock)
                 elif mock_check_invoice_paid(session.invoice):
                     session.invoice_status = InvoiceStatusEnum.pago
                     session.status = SessionStatusEnum.concluida
+                    updated.append(session)
                     logging.info(f"[INVOICE CHECKER] Invoice pago detectado para sessão {session.session_code}")
             
             db.commit()
+            
+            # Write-through do status no cache, em um único lote
+            if updated:
+                with cache_manager.pipeline() as pipe:
+                    for session in updated:
+                        pipe.set(f"session_status:{session.session_code}",
+                                 session_status_snapshot(session), category='session_status')
             db.close()
             
         except Exception as e:
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Allow-list de IPs - LiquidGold ATM
+Entradas (IPs e redes CIDR, IPv4 e IPv6) compiladas uma vez em intervalos inteiros
+ordenados e disjuntos; a consulta é uma busca binária, com LRU de veredictos na frente
+"""
+
+import bisect
+import ipaddress
+import socket
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.logger import atm_logger
+
+
+class _IntervalSet:
+    """
+    Intervalos [início, fim] ordenados e disjuntos de uma família de endereços
+    """
+
+    def __init__(self, ranges: List[Tuple[int, int]]):
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def contains(self, value: int) -> bool:
+        index = bisect.bisect_right(self.starts, value) - 1
+        return index >= 0 and value <= self.ends[index]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class IPAllowList:
+    """
+    Verifica se um IP pertence à allow-list; compile() substitui o conjunto atomicamente
+    """
+
+    def __init__(self, entries: Iterable[str] = (), cache_size: int = 4096):
+        self.logger = atm_logger
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.verdicts: "OrderedDict[str, bool]" = OrderedDict()
+        self.ipv4 = _IntervalSet([])
+        self.ipv6 = _IntervalSet([])
+        self.generation = 0
+        self.compile(entries)
+
+    def compile(self, entries: Iterable[str]):
+        """
+        Converte as entradas em intervalos; entradas inválidas são registradas e ignoradas
+        """
+        ranges = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = ipaddress.ip_network(str(entry).strip(), strict=False)
+            except ValueError as e:
+                self.logger.log_error('rate_limiter', 'invalid_whitelist_entry', {
+                    'entry': entry,
+                    'error': str(e)
+                })
+                continue
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        ipv4, ipv6 = _IntervalSet(ranges[4]), _IntervalSet(ranges[6])
+        with self.lock:
+            self.ipv4, self.ipv6 = ipv4, ipv6
+            self.generation += 1
+            self.verdicts.clear()
+
+    def _parse(self, ip: str) -> Optional[Tuple[int, int]]:
+        """
+        (família, valor inteiro) do IP; IPv4 mapeado em IPv6 (::ffff:a.b.c.d) vira IPv4
+        """
+        try:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except (OSError, ValueError, TypeError):
+            pass
+        try:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip.split('%', 1)[0]), 'big')
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+        if value >> 32 == 0xFFFF:
+            return 4, value & 0xFFFFFFFF
+        return 6, value
+
+    def contains(self, ip: str) -> bool:
+        verdict = self.verdicts.get(ip)
+        if verdict is not None:
+            try:
+                self.verdicts.move_to_end(ip)
+            except KeyError:  # Removido por outra thread entre get e move_to_end
+                pass
+            return verdict
+
+        generation = self.generation
+        parsed = self._parse(ip)
+        if parsed is None:
+            verdict = False
+        else:
+            family, value = parsed
+            verdict = (self.ipv4 if family == 4 else self.ipv6).contains(value)
+
+        with self.lock:
+            if generation != self.generation:
+                return verdict  # Lista recompilada durante a consulta: não guardar
+            self.verdicts[ip] = verdict
+            if len(self.verdicts) > self.cache_size:
+                self.verdicts.popitem(last=False)
+        return verdict
+
+    def get_stats(self):
+        return {
+            'ipv4_ranges': len(self.ipv4),
+            'ipv6_ranges': len(self.ipv6),
+            'cached_verdicts': len(self.verdicts)
+        }
@@ -4,7 +4,7 @@ Módulo de Integração Lightning Network - RedATM
 Integração com Strike API para recebimento de Bitcoin
 """
 
-import requests
+import httpx
 import json
 import time
 import hashlib
@@ -13,6 +13,9 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import logging
 
+from .config import atm_config
+from .http_client import http_client
+
 class LightningWallet:
     """Classe para gerenciar carteira Lightning Network"""
     
@@ -20,7 +23,7 @@ class LightningWallet:
         self.api_key = api_key
         self.account_id = account_id
         self.webhook_secret = webhook_secret
-        self.base_url = "https://api.strike.me/v1"
+        self.base_url = atm_config.resolve_provider_url("strike", "https://api.strike.me/v1")
         self.logger = logging.getLogger(__name__)
         
         # Headers padrão
@@ -53,7 +56,7 @@ class LightningWallet:
                 "webhook_version": "v1"
             }
             
-            response = requests.post(url, headers=self.headers, json=data)
+            response = http_client.post(url, headers=self.headers, json=data)
             response.raise_for_status()
             
             invoice_data = response.json()
@@ -69,7 +72,7 @@ class LightningWallet:
                 "status": "pending"
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao criar invoice: {e}")
             raise Exception(f"Falha ao criar invoice Lightning: {e}")
     
@@ -86,7 +89,7 @@ class LightningWallet:
         try:
             url = f"{self.base_url}/accounts/{self.account_id}/invoices/{invoice_id}"
             
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             payment_data = response.json()
@@ -99,7 +102,7 @@ class LightningWallet:
                 "fee_paid": payment_data.get("fee_paid")
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao verificar pagamento: {e}")
             raise Exception(f"Falha ao verificar pagamento: {e}")
     
@@ -113,7 +116,7 @@ class LightningWallet:
         try:
             url = f"{self.base_url}/accounts/{self.account_id}/balance"
             
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             balance_data = response.json()
@@ -124,7 +127,7 @@ class LightningWallet:
                 "last_updated": datetime.now().isoformat()
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao obter saldo: {e}")
             raise Exception(f"Falha ao obter saldo: {e}")
     
@@ -142,7 +145,7 @@ class LightningWallet:
             url = f"{self.base_url}/accounts/{self.account_id}/transactions"
             params = {"limit": limit}
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             transactions = response.json().get("transactions", [])
@@ -160,7 +163,7 @@ class LightningWallet:
                 for tx in transactions
             ]
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao obter histórico: {e}")
             raise Exception(f"Falha ao obter histórico: {e}")
     
@@ -242,7 +245,7 @@ class LightningWallet:
         try:
             url = f"{self.base_url}/network/status"
             
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             network_data = response.json()
@@ -255,7 +258,7 @@ class LightningWallet:
                 "last_updated": datetime.now().isoformat()
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao obter status da rede: {e}")
             return {
                 "network_status": "unknown",
@@ -276,7 +279,7 @@ class LightningWallet:
             url = f"{self.base_url}/network/fee-estimate"
             params = {"amount": amount_sats}
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             fee_data = response.json()
@@ -287,7 +290,7 @@ class LightningWallet:
                 "confidence": fee_data.get("confidence")
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Erro ao estimar taxa: {e}")
             return {
                 "estimated_fee_sats": 1,  # Taxa mínima
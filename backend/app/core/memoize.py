@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Memoização com Proteção contra Stampede - LiquidGold ATM
+Cache-aside sobre o CacheManager com expiração antecipada probabilística (XFetch)
+e lock distribuído: apenas um chamador recalcula uma chave; os demais recebem o valor anterior
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.cache_manager import cache_manager
+
+# Estatísticas por função memoizada
+_memo_stats: Dict[str, Dict[str, int]] = {}
+_memo_stats_lock = threading.Lock()
+
+
+def _count(name: str, field: str):
+    with _memo_stats_lock:
+        stats = _memo_stats.setdefault(name, {
+            'hits': 0, 'early_refreshes': 0, 'recomputes': 0, 'stale_served': 0, 'lock_waits': 0
+        })
+        stats[field] += 1
+
+
+def get_memoize_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Retorna contadores por função memoizada
+    """
+    with _memo_stats_lock:
+        return {name: dict(values) for name, values in _memo_stats.items()}
+
+
+def memoize(category: str = 'reports', ttl: Optional[int] = None, beta: float = 1.0,
+            stale_seconds: Optional[int] = None, lock_seconds: float = 30.0,
+            wait_seconds: float = 10.0, cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator cache-aside para funções síncronas ou assíncronas
+
+    - A chave é derivada do nome qualificado e dos argumentos (self é ignorado)
+    - Próximo do vencimento, cada chamada tem chance crescente de recalcular
+      (delta * beta * -log(rand)), espalhando o recálculo antes da expiração
+    - Só o dono do lock recalcula; os demais servem o valor anterior, mantido no
+      Redis por stale_seconds além do ttl lógico
+    - cache_if permite não armazenar resultados de erro
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+        parameters = list(inspect.signature(func).parameters)
+        skip_self = bool(parameters) and parameters[0] in ('self', 'cls')
+        logical_ttl = (
+            ttl
+            if ttl is not None
+            else cache_manager.ttl_config.get(category, cache_manager.ttl_config['default'])
+        )
+        grace = stale_seconds if stale_seconds is not None else logical_ttl
+
+        def cache_key(*args, **kwargs) -> str:
+            key_args = args[1:] if skip_self else args
+            raw = json.dumps([key_args, kwargs], sort_keys=True, default=str)
+            digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+            return f"{category}:memo:{name}:{digest}"
+
+        def is_fresh(entry: Dict[str, Any]) -> bool:
+            # XFetch: recalcular antecipadamente com probabilidade crescente perto do vencimento
+            early = entry['delta'] * beta * -math.log(max(random.random(), 1e-12))
+            return time.time() + early < entry['expires_at']
+
+        def store(key: str, value: Any, delta: float):
+            if cache_if is not None and not cache_if(value):
+                return
+            cache_manager.set(key, {
+                'value': value,
+                'delta': delta,
+                'expires_at': time.time() + logical_ttl
+            }, ttl=int(logical_ttl + grace), category=category)
+
+        def lookup(key: str):
+            entry = cache_manager.get(key, category=category)
+            if isinstance(entry, dict) and 'expires_at' in entry:
+                return entry
+            return None
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = cache_key(*args, **kwargs)
+                entry = lookup(key)
+                if entry is not None and is_fresh(entry):
+                    _count(name, 'hits')
+                    return entry['value']
+
+                deadline = time.monotonic() + wait_seconds
+                while True:
+                    token = cache_manager.acquire_lock(key, lock_seconds)
+                    if token:
+                        try:
+                            _count(name, 'early_refreshes' if entry is not None else 'recomputes')
+                            start = time.monotonic()
+                            value = await func(*args, **kwargs)
+                            store(key, value, time.monotonic() - start)
+                            return value
+                        finally:
+                            cache_manager.release_lock(key, token)
+                    if entry is not None:
+                        _count(name, 'stale_served')
+                        return entry['value']
+                    # Sem valor anterior: aguardar quem está recalculando
+                    _count(name, 'lock_waits')
+                    if time.monotonic() >= deadline:
+                        return await func(*args, **kwargs)
+                    await asyncio.sleep(0.05)
+                    entry = lookup(key)
+                    if entry is not None:
+                        _count(name, 'hits')
+                        return entry['value']
+
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                key = cache_key(*args, **kwargs)
+                entry = lookup(key)
+                if entry is not None and is_fresh(entry):
+                    _count(name, 'hits')
+                    return entry['value']
+
+                deadline = time.monotonic() + wait_seconds
+                while True:
+                    token = cache_manager.acquire_lock(key, lock_seconds)
+                    if token:
+                        try:
+                            _count(name, 'early_refreshes' if entry is not None else 'recomputes')
+                            start = time.monotonic()
+                            value = func(*args, **kwargs)
+                            store(key, value, time.monotonic() - start)
+                            return value
+                        finally:
+                            cache_manager.release_lock(key, token)
+                    if entry is not None:
+                        _count(name, 'stale_served')
+                        return entry['value']
+                    _count(name, 'lock_waits')
+                    if time.monotonic() >= deadline:
+                        return func(*args, **kwargs)
+                    time.sleep(0.05)
+                    entry = lookup(key)
+                    if entry is not None:
+                        _count(name, 'hits')
+                        return entry['value']
+
+            wrapper = sync_wrapper
+
+        def invalidate(*args, **kwargs) -> bool:
+            """
+            Remove o valor memoizado para os argumentos informados
+            """
+            return cache_manager.delete(cache_key(*args, **kwargs))
+
+        wrapper.cache_key = cache_key
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
+
+
+def not_error(result: Any) -> bool:
+    """
+    Predicado padrão para cache_if: resultados {'error': ...} não são armazenados
+    """
+    return not (isinstance(result, dict) and 'error' in result)
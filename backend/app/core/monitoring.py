@@ -1,11 +1,11 @@
 import psutil
-import requests
 import json
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from .config import atm_config
 from .logger import atm_logger
+from .http_client import http_client
 from .notifications import notification_manager
 from ..models import Session as SessionModel
 
@@ -93,11 +93,16 @@ class HealthMonitor:
         """Verifica conectividade de rede"""
         try:
             # Testar conectividade com Binance (para cotação)
-            binance_response = requests.get('https://api.binance.com/api/v3/ping', timeout=5)
+            binance_response = http_client.get(
+                atm_config.resolve_provider_url('binance', 'https://api.binance.com/api/v3/ping'),
+                timeout=5,
+            )
             binance_status = 'healthy' if binance_response.status_code == 200 else 'error'
             
             # Testar conectividade geral
-            google_response = requests.get('https://www.google.com', timeout=5)
+            google_response = http_client.get(
+                atm_config.resolve_provider_url('google', 'https://www.google.com/'), timeout=5
+            )
             general_status = 'healthy' if google_response.status_code == 200 else 'error'
             
             return {
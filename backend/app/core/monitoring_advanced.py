@@ -11,11 +11,11 @@ from datetime import datetime, timedelta
 from collections import defaultdict, deque
 from typing import Dict, List, Any, Optional
 import psutil
-import requests
 from dataclasses import dataclass, asdict
 
 from .config import atm_config
 from .logger import atm_logger
+from .http_client import http_client
 
 @dataclass
 class SystemMetrics:
@@ -363,8 +363,8 @@ class AdvancedMonitoring:
         
         for webhook_url in self.webhook_urls:
             try:
-                response = requests.post(
-                    webhook_url,
+                response = http_client.post(
+                    atm_config.resolve_provider_url('webhooks', webhook_url),
                     json=payload,
                     headers={'Content-Type': 'application/json'},
                     timeout=5
@@ -1,4 +1,3 @@
-import requests
 import smtplib
 import json
 from email.mime.text import MIMEText
@@ -8,6 +7,7 @@ from datetime import datetime
 import logging
 from .config import atm_config
 from .logger import atm_logger
+from .http_client import http_client
 
 class NotificationManager:
     def __init__(self):
@@ -27,8 +27,8 @@ class NotificationManager:
                 'atm_id': atm_config.get_atm_id()
             }
             
-            response = requests.post(
-                self.config['webhook_url'],
+            response = http_client.post(
+                atm_config.resolve_provider_url('webhooks', self.config['webhook_url']),
                 json=payload,
                 timeout=10,
                 headers={'Content-Type': 'application/json'}
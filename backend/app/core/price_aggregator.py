@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Agregador de Cotações - LiquidGold ATM
+Consulta várias fontes de preço em paralelo com prazo compartilhado
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.logger import atm_logger
+
+# Uma fonte é (nome, função que recebe o timeout restante e devolve o preço)
+PriceSourceFn = Callable[[float], float]
+
+
+class PriceAggregator:
+    """
+    Dispara todas as fontes ao mesmo tempo e devolve o primeiro preço válido,
+    ou a mediana das respostas que chegarem dentro da janela de hedge
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.logger = atm_logger
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="price-agg")
+        self.lock = threading.Lock()
+
+        # Estatísticas do agregador
+        self.stats = {
+            'requests': 0,
+            'successes': 0,
+            'failures': 0,
+            'median_used': 0
+        }
+
+    def _run_source(self, name: str, fetch: PriceSourceFn, timeout: float) -> Tuple[str, float]:
+        """
+        Executa uma fonte e valida o preço retornado
+        """
+        price = float(fetch(timeout))
+        if not price or price <= 0:
+            raise ValueError(f"Preço inválido retornado por {name}: {price}")
+        return name, price
+
+    def fetch(self, sources: List[Tuple[str, PriceSourceFn]], deadline: float = 5.0,
+              window: float = 0.25, label: str = "quote") -> Optional[Dict[str, Any]]:
+        """
+        Consulta as fontes concorrentemente
+
+        Retorna {'price', 'source', 'samples', 'latency_ms'} ou None se nenhuma
+        fonte responder com um preço válido antes do prazo
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+
+        if not sources:
+            return None
+
+        start = time.monotonic()
+        hard_deadline = start + deadline
+
+        pending: Dict[Future, str] = {
+            self.executor.submit(self._run_source, name, fetch, deadline): name
+            for name, fetch in sources
+        }
+        samples: Dict[str, float] = {}
+        first_at: Optional[float] = None
+
+        while pending:
+            now = time.monotonic()
+            # Após a primeira resposta válida, aguardar apenas a janela de hedge
+            limit = hard_deadline if first_at is None else min(hard_deadline, first_at + window)
+            remaining = limit - now
+            if remaining <= 0:
+                break
+
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    source_name, price = future.result()
+                    samples[source_name] = price
+                    if first_at is None:
+                        first_at = time.monotonic()
+                except Exception as e:
+                    self.logger.log_error(
+                        'price_aggregator', f'{label}_{name}_error', {'error': str(e)}
+                    )
+
+        # Fontes lentas continuam no executor, mas o resultado é descartado
+        for future in pending:
+            future.cancel()
+
+        latency_ms = round((time.monotonic() - start) * 1000, 2)
+
+        if not samples:
+            with self.lock:
+                self.stats['failures'] += 1
+            self.logger.log_error('price_aggregator', f'{label}_no_sources', {
+                'sources': [name for name, _ in sources],
+                'latency_ms': latency_ms
+            })
+            return None
+
+        if len(samples) == 1:
+            source, price = next(iter(samples.items()))
+        else:
+            price = statistics.median(samples.values())
+            source = "median:" + ",".join(sorted(samples))
+            with self.lock:
+                self.stats['median_used'] += 1
+
+        with self.lock:
+            self.stats['successes'] += 1
+
+        return {
+            'price': price,
+            'source': source,
+            'samples': samples,
+            'latency_ms': latency_ms
+        }
+
+    async def fetch_async(self, sources: List[Tuple[str, PriceSourceFn]], deadline: float = 5.0,
+                          window: float = 0.25, label: str = "quote") -> Optional[Dict[str, Any]]:
+        """
+        Versão assíncrona de fetch para uso direto em corrotinas
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.fetch, sources, deadline, window, label)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas do agregador
+        """
+        with self.lock:
+            return dict(self.stats)
+
+
+# Instância global
+price_aggregator = PriceAggregator()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Fontes de Cotação - LiquidGold ATM
+Registro de fontes de preço plugáveis com métricas de saúde e circuit breaker
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.core.config import atm_config
+from app.core.http_client import http_client
+from app.core.logger import atm_logger
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker fechado / aberto / semiaberto por fonte
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Indica se a fonte pode ser consultada agora
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trial_in_progress = False
+            # Semiaberto: apenas uma requisição de teste por vez
+            if self.trial_in_progress:
+                return False
+            self.trial_in_progress = True
+            return True
+
+    def is_available(self) -> bool:
+        """
+        Consulta sem efeitos colaterais (usada para ordenação)
+        """
+        with self.lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            if self.state == self.HALF_OPEN:
+                return not self.trial_in_progress
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.trial_in_progress = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class PriceSource:
+    """
+    Fonte de preço plugável; subclasses implementam fetch_price
+    """
+
+    name = "base"
+    pair = ""
+    priority = 100  # Menor = preferida em caso de empate de saúde
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latencies = deque(maxlen=window)  # Latência (ms) das respostas bem-sucedidas
+        self.outcomes = deque(maxlen=window)   # True = sucesso, False = erro
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def fetch_price(self, timeout: float) -> float:
+        raise NotImplementedError
+
+    def url(self, url: str, provider: Optional[str] = None) -> str:
+        """
+        URL do provedor (ou do simulador local, se habilitado em simulator.enabled)
+        """
+        return atm_config.resolve_provider_url(provider or self.name, url)
+
+    def fetch(self, timeout: float) -> float:
+        """
+        Consulta a fonte respeitando o circuit breaker e registrando métricas
+        """
+        if not self.breaker.allow():
+            raise Exception(f"Circuito aberto para {self.name}")
+
+        start = time.monotonic()
+        try:
+            price = float(self.fetch_price(timeout))
+            if price <= 0:
+                raise ValueError(f"Preço inválido: {price}")
+        except Exception as e:
+            with self.lock:
+                self.outcomes.append(False)
+                self.last_error = str(e)
+            self.breaker.record_failure()
+            raise
+
+        with self.lock:
+            self.outcomes.append(True)
+            self.latencies.append((time.monotonic() - start) * 1000)
+            self.last_success_at = time.time()
+        self.breaker.record_success()
+        return price
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency_p50(self) -> Optional[float]:
+        with self.lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def health_key(self):
+        """
+        Chave de ordenação: disponíveis primeiro, depois menor taxa de erro e latência
+        """
+        latency = self.latency_p50()
+        return (
+            0 if self.breaker.is_available() else 1,
+            round(self.error_rate(), 2),
+            latency if latency is not None else float('inf'),
+            self.priority
+        )
+
+    def get_health(self) -> Dict[str, Any]:
+        latency = self.latency_p50()
+        return {
+            'pair': self.pair,
+            'state': self.breaker.state,
+            'error_rate': round(self.error_rate(), 3),
+            'latency_p50_ms': round(latency, 2) if latency is not None else None,
+            'samples': len(self.outcomes),
+            'last_error': self.last_error,
+            'last_success_at': self.last_success_at
+        }
+
+
+class BitsoSource(PriceSource):
+    name = "bitso"
+    pair = "BTC:ARS"
+    priority = 10
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.bitso.com/v3/ticker/?book=btc_ars"), timeout=timeout
+        )
+        return float(response.json()["payload"]["last"])
+
+
+class BinanceSource(PriceSource):
+    name = "binance"
+    pair = "BTC:USD"
+    priority = 10
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT"), timeout=timeout
+        )
+        return float(response.json()["price"])
+
+
+class RipioSource(PriceSource):
+    name = "ripio"
+    pair = "USDT:ARS"
+    priority = 10
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.ripio.com/public/v1/market/"), timeout=timeout
+        )
+        for pair in response.json().get('data', []):
+            if pair.get('pair') == 'USDT_ARS':
+                return float(pair.get('last_price', 0))
+        raise Exception("Par USDT_ARS não encontrado na Ripio")
+
+
+class BuenbitSource(PriceSource):
+    name = "buenbit"
+    pair = "USDT:ARS"
+    priority = 20
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.buenbit.com/api/v1/market/ticker"), timeout=timeout
+        )
+        for ticker in response.json().get('data', []):
+            if ticker.get('symbol') == 'USDT_ARS':
+                return float(ticker.get('last_price', 0))
+        raise Exception("Par USDT_ARS não encontrado na Buenbit")
+
+
+class LemonSource(PriceSource):
+    name = "lemon"
+    pair = "USDT:ARS"
+    priority = 30
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.lemon.com/v1/market/ticker"), timeout=timeout
+        )
+        data = response.json()
+        if 'USDT_ARS' in data:
+            return float(data['USDT_ARS'].get('last', 0))
+        raise Exception("Par USDT_ARS não encontrado na Lemon")
+
+
+class CoinGeckoSource(PriceSource):
+    name = "coingecko"
+    pair = "USDT:ARS"
+    priority = 40
+
+    def fetch_price(self, timeout: float) -> float:
+        response = http_client.get(
+            self.url("https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=ars"),
+            timeout=timeout
+        )
+        return float(response.json()['tether']['ars'])
+
+
+class BinanceFxSource(PriceSource):
+    """
+    Triangulação USDT/ARS = USDT/USD (Binance) x USD/ARS (câmbio)
+    """
+
+    name = "binance_fx"
+    pair = "USDT:ARS"
+    priority = 50
+
+    def fetch_price(self, timeout: float) -> float:
+        deadline = time.monotonic() + timeout
+        usdt_usd_response = http_client.get(
+            self.url("https://api.binance.com/api/v3/ticker/price?symbol=USDTUSD", "binance"),
+            timeout=timeout,
+        )
+        usdt_usd_price = float(usdt_usd_response.json()["price"])
+
+        remaining = max(0.1, deadline - time.monotonic())
+        usd_ars_response = http_client.get(
+            self.url("https://api.exchangerate-api.com/v4/latest/USD", "exchangerate"),
+            timeout=remaining,
+        )
+        usd_ars_rate = float(usd_ars_response.json()['rates']['ARS'])
+
+        return usdt_usd_price * usd_ars_rate
+
+
+class PriceSourceRegistry:
+    """
+    Registro de fontes por par, ordenadas por saúde
+    """
+
+    def __init__(self):
+        self.logger = atm_logger
+        self.config = atm_config
+        self.sources: Dict[str, PriceSource] = {}
+        self.lock = threading.Lock()
+
+    def register(self, source: PriceSource):
+        """
+        Registra (ou substitui) uma fonte pelo nome
+        """
+        with self.lock:
+            self.sources[source.name] = source
+
+    def unregister(self, name: str) -> bool:
+        with self.lock:
+            return self.sources.pop(name, None) is not None
+
+    def get(self, name: str) -> Optional[PriceSource]:
+        return self.sources.get(name)
+
+    def sources_for(self, pair: str, include_unavailable: bool = False) -> List[PriceSource]:
+        """
+        Fontes habilitadas para o par, da mais saudável para a menos saudável
+        """
+        disabled = set(self.config.get('quotes.disabled_sources', []) or [])
+        with self.lock:
+            candidates = [
+                s for s in self.sources.values() if s.pair == pair and s.name not in disabled
+            ]
+        if not include_unavailable:
+            candidates = [s for s in candidates if s.breaker.is_available()]
+        return sorted(candidates, key=lambda s: s.health_key())
+
+    def get_health(self) -> Dict[str, Any]:
+        """
+        Retorna saúde de todas as fontes registradas
+        """
+        with self.lock:
+            sources = list(self.sources.values())
+        return {s.name: s.get_health() for s in sources}
+
+
+# Instância global com as fontes padrão
+price_source_registry = PriceSourceRegistry()
+for _source in (BitsoSource(), BinanceSource(), RipioSource(), BuenbitSource(),
+                LemonSource(), CoinGeckoSource(), BinanceFxSource()):
+    price_source_registry.register(_source)
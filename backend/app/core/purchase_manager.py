@@ -202,15 +202,21 @@ class PurchaseManager:
             raise
     
     def create_purchase(self, atm_id: str, amount_ars: float, crypto_type: str, 
-                       crypto_address: str, ars_payment_method: str, phone_number: str = None) -> Dict[str, Any]:
+                       crypto_address: str, ars_payment_method: str, phone_number: str = None,
+                       quote_id: Optional[str] = None) -> Dict[str, Any]:
         """Cria uma nova compra de criptomoeda"""
         try:
             # Validar criptomoeda
             if crypto_type not in ['BTC', 'USDT']:
                 raise Exception(f"Criptomoeda {crypto_type} não suportada")
             
-            # Obter cotação para compra
-            quote_data = self.crypto_manager.get_quote(crypto_type, amount_ars, "COMPRA")
+            # Obter cotação para compra (travada pelo quote ID, se informado)
+            if quote_id:
+                quote_data = self.crypto_manager.redeem_quote_id(
+                    quote_id, crypto_type, amount_ars, "COMPRA"
+                )
+            else:
+                quote_data = self.crypto_manager.get_quote(crypto_type, amount_ars, "COMPRA")
             
             # Gerar código único
             purchase_code = f"PURCHASE_{uuid.uuid4().hex[:8].upper()}"
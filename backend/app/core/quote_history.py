@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Histórico de Cotações - LiquidGold ATM
+Buffer circular em memória por par (array) com persistência em arquivo mapeado (mmap)
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import atm_config
+from app.core.logger import atm_logger
+
+try:
+    import fcntl  # Ausente no Windows (executável desktop, processo único)
+except ImportError:
+    fcntl = None
+
+
+class QuoteRingBuffer:
+    """
+    Amostras (timestamp, preço) em ordem cronológica, com capacidade fixa
+    """
+
+    def __init__(self, capacity: int = 8192):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.prices = array('d', bytes(8 * capacity))
+        self.start = 0        # Posição física da amostra mais antiga
+        self.count = 0
+        self.appended = 0     # Total de amostras já recebidas (para flush incremental)
+        self.lock = threading.Lock()
+
+    def append(self, timestamp: float, price: float) -> bool:
+        """
+        Adiciona amostra; amostras fora de ordem cronológica são descartadas
+        """
+        with self.lock:
+            if (
+                self.count
+                and timestamp <= self.timestamps[(self.start + self.count - 1) % self.capacity]
+            ):
+                return False
+            if self.count < self.capacity:
+                pos = (self.start + self.count) % self.capacity
+                self.count += 1
+            else:
+                pos = self.start
+                self.start = (self.start + 1) % self.capacity
+            self.timestamps[pos] = timestamp
+            self.prices[pos] = price
+            self.appended += 1
+            return True
+
+    def _ts(self, i: int) -> float:
+        return self.timestamps[(self.start + i) % self.capacity]
+
+    def _price(self, i: int) -> float:
+        return self.prices[(self.start + i) % self.capacity]
+
+    def _first_at_or_after(self, timestamp: float) -> int:
+        """
+        Índice lógico da primeira amostra com timestamp >= timestamp (busca binária)
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def since(self, appended_mark: int) -> Tuple[List[Tuple[float, float]], int]:
+        """
+        Amostras recebidas após a marca (ainda presentes no buffer) e a nova marca
+        """
+        with self.lock:
+            new = min(self.appended - appended_mark, self.count)
+            records = [(self._ts(i), self._price(i)) for i in range(self.count - new, self.count)]
+            return records, self.appended
+
+    def twap(self, start: float, end: float) -> Optional[float]:
+        """
+        Preço médio ponderado pelo tempo em [start, end]; cada amostra vale até a próxima
+        """
+        with self.lock:
+            if not self.count or end <= start:
+                return None
+            i = self._first_at_or_after(start)
+            # A amostra anterior ao início continua valendo dentro da janela
+            if i > 0:
+                i -= 1
+            if self._ts(i) >= end:
+                return None
+
+            weighted = 0.0
+            covered = 0.0
+            while i < self.count:
+                seg_start = max(self._ts(i), start)
+                if seg_start >= end:
+                    break
+                seg_end = min(self._ts(i + 1), end) if i + 1 < self.count else end
+                duration = seg_end - seg_start
+                weighted += self._price(i) * duration
+                covered += duration
+                i += 1
+
+            if covered <= 0:
+                return self._price(i - 1)
+            return weighted / covered
+
+    def min_max(self, start: float, end: float) -> Optional[Tuple[float, float]]:
+        with self.lock:
+            i = self._first_at_or_after(start)
+            j = self._first_at_or_after(end)
+            if j < self.count and self._ts(j) == end:
+                j += 1
+            if i >= j:
+                return None
+            prices = [self._price(k) for k in range(i, j)]
+        return min(prices), max(prices)
+
+    def candles(self, start: float, end: float, interval: float) -> List[Dict[str, float]]:
+        """
+        Velas OHLC de largura interval em [start, end)
+        """
+        result: List[Dict[str, float]] = []
+        with self.lock:
+            i = self._first_at_or_after(start)
+            current: Optional[Dict[str, float]] = None
+            while i < self.count:
+                ts = self._ts(i)
+                if ts >= end:
+                    break
+                price = self._price(i)
+                bucket = start + ((ts - start) // interval) * interval
+                if current is None or current['start'] != bucket:
+                    current = {'start': bucket, 'open': price, 'high': price, 'low': price,
+                               'close': price, 'samples': 0}
+                    result.append(current)
+                current['high'] = max(current['high'], price)
+                current['low'] = min(current['low'], price)
+                current['close'] = price
+                current['samples'] += 1
+                i += 1
+        return result
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        with self.lock:
+            if not self.count:
+                return None
+            return self._ts(self.count - 1), self._price(self.count - 1)
+
+
+class QuoteHistoryFile:
+    """
+    Arquivo append-only de registros (timestamp, preço) acessado via mmap.
+    Compartilhado pelos workers: cada acesso toma flock e relê a quantidade do cabeçalho
+    """
+
+    MAGIC = b'LGQHIST1'
+    HEADER = struct.Struct('<8sQ')   # magic, quantidade de registros
+    RECORD = struct.Struct('<dd')    # timestamp, preço
+    GROWTH = 1 << 20                 # Crescer o arquivo em blocos de 1 MiB
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # O_CREAT sem truncar: outro worker pode estar criando o mesmo arquivo
+        self.file = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        self.mm: Optional[mmap.mmap] = None
+        with self._locked(exclusive=True):
+            if os.fstat(self.file.fileno()).st_size < self.HEADER.size:
+                self.file.write(self.HEADER.pack(self.MAGIC, 0))
+                self.file.truncate(self.GROWTH)
+                self.file.flush()
+            self._remap()
+            magic, self.count = self.HEADER.unpack_from(self.mm, 0)
+        if magic != self.MAGIC:
+            raise Exception(f"Arquivo de histórico inválido: {self.path}")
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def _remap(self):
+        """
+        Mapeia o arquivo inteiro de novo se outro worker mudou seu tamanho
+        """
+        size = os.fstat(self.file.fileno()).st_size
+        if self.mm is not None:
+            if len(self.mm) == size:
+                return
+            self.mm.close()
+        self.mm = mmap.mmap(self.file.fileno(), size)
+
+    def _refresh(self):
+        """
+        Relê a quantidade de registros (chamar com o flock tomado)
+        """
+        self._remap()
+        self.count = self.HEADER.unpack_from(self.mm, 0)[1]
+
+    def _ensure_capacity(self, extra: int):
+        needed = self.HEADER.size + (self.count + extra) * self.RECORD.size
+        if needed <= len(self.mm):
+            return
+        new_size = ((needed // self.GROWTH) + 1) * self.GROWTH
+        self.mm.close()
+        self.mm = None
+        self.file.truncate(new_size)
+        self._remap()
+
+    def append_many(self, records: List[Tuple[float, float]]) -> int:
+        """
+        Acrescenta os registros mais novos que o último do arquivo; os workers gravam
+        as mesmas cotações, então o que outro worker já gravou é descartado
+        """
+        if not records:
+            return 0
+        with self._locked(exclusive=True):
+            self._refresh()
+            if self.count:
+                last_timestamp = self.RECORD.unpack_from(
+                    self.mm, self.HEADER.size + (self.count - 1) * self.RECORD.size
+                )[0]
+                records = [record for record in records if record[0] > last_timestamp]
+            if not records:
+                return 0
+            self._ensure_capacity(len(records))
+            offset = self.HEADER.size + self.count * self.RECORD.size
+            for timestamp, price in records:
+                self.RECORD.pack_into(self.mm, offset, timestamp, price)
+                offset += self.RECORD.size
+            self.count += len(records)
+            # Cabeçalho atualizado por último: registros parciais nunca são lidos
+            self.HEADER.pack_into(self.mm, 0, self.MAGIC, self.count)
+            self.mm.flush()
+        return len(records)
+
+    def read_tail(self, limit: int) -> List[Tuple[float, float]]:
+        with self._locked(exclusive=False):
+            self._refresh()
+            first = max(0, self.count - limit)
+            return [
+                self.RECORD.unpack_from(self.mm, self.HEADER.size + i * self.RECORD.size)
+                for i in range(first, self.count)
+            ]
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class QuoteHistory:
+    """
+    Histórico por par alimentado pelo atualizador de cotações
+    """
+
+    def __init__(self, capacity: int = 8192):
+        self.logger = atm_logger
+        self.config = atm_config
+        self.capacity = capacity
+        self.buffers: Dict[str, QuoteRingBuffer] = {}
+        self.files: Dict[str, QuoteHistoryFile] = {}
+        self.flushed_marks: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.running = False
+
+        self.history_dir = Path(self.config.get('quotes.history.dir', 'data/quote_history'))
+        self.flush_seconds = float(self.config.get('quotes.history.flush_seconds', 30))
+
+    def _file_for(self, pair: str) -> QuoteHistoryFile:
+        if not pair.replace(':', '').replace('_', '').isalnum():
+            raise Exception(f"Par inválido: {pair}")
+        if pair not in self.files:
+            self.files[pair] = QuoteHistoryFile(self.history_dir / f"{pair.replace(':', '_')}.bin")
+        return self.files[pair]
+
+    def _buffer(self, pair: str) -> QuoteRingBuffer:
+        buffer = self.buffers.get(pair)
+        if buffer is not None:
+            return buffer
+        with self.lock:
+            if pair not in self.buffers:
+                buffer = QuoteRingBuffer(self.capacity)
+                # Recarregar as amostras mais recentes do disco
+                try:
+                    with self.flush_lock:
+                        for timestamp, price in self._file_for(pair).read_tail(self.capacity):
+                            buffer.append(timestamp, price)
+                except Exception as e:
+                    self.logger.log_error(
+                        'quote_history', 'load_error', {'pair': pair, 'error': str(e)}
+                    )
+                self.flushed_marks[pair] = buffer.appended
+                self.buffers[pair] = buffer
+            return self.buffers[pair]
+
+    def record(self, pair: str, price: float, timestamp: Optional[float] = None) -> bool:
+        """
+        Registra amostra de preço do par
+        """
+        return self._buffer(pair).append(
+            timestamp if timestamp is not None else time.time(), float(price)
+        )
+
+    def on_quote(self, pair: str, snapshot: Dict[str, Any]):
+        """
+        Listener do atualizador de cotações
+        """
+        self.record(pair, snapshot['price'], snapshot.get('fetched_at'))
+
+    def twap(
+        self, pair: str, window_seconds: float, now: Optional[float] = None
+    ) -> Optional[float]:
+        now = now if now is not None else time.time()
+        return self._buffer(pair).twap(now - window_seconds, now)
+
+    def min_max(
+        self, pair: str, window_seconds: float, now: Optional[float] = None
+    ) -> Optional[Tuple[float, float]]:
+        now = now if now is not None else time.time()
+        return self._buffer(pair).min_max(now - window_seconds, now)
+
+    def candles(self, pair: str, window_seconds: float, interval_seconds: float,
+                now: Optional[float] = None) -> List[Dict[str, float]]:
+        now = now if now is not None else time.time()
+        start = now - window_seconds
+        # Alinhar as velas ao intervalo para resultados estáveis entre chamadas
+        start -= start % interval_seconds
+        return self._buffer(pair).candles(start, now, interval_seconds)
+
+    def get_summary(
+        self, pair: str, window_seconds: float, interval_seconds: float
+    ) -> Dict[str, Any]:
+        """
+        TWAP, mínimo/máximo e velas do par na janela (para o dashboard)
+        """
+        now = time.time()
+        min_max = self.min_max(pair, window_seconds, now)
+        latest = self._buffer(pair).latest()
+        return {
+            'pair': pair,
+            'window_seconds': window_seconds,
+            'interval_seconds': interval_seconds,
+            'last_price': latest[1] if latest else None,
+            'twap': self.twap(pair, window_seconds, now),
+            'min': min_max[0] if min_max else None,
+            'max': min_max[1] if min_max else None,
+            'candles': self.candles(pair, window_seconds, interval_seconds, now)
+        }
+
+    def flush(self) -> int:
+        """
+        Grava no arquivo mapeado as amostras recebidas desde o último flush
+        """
+        written = 0
+        with self.flush_lock:
+            for pair, buffer in list(self.buffers.items()):
+                mark = self.flushed_marks.get(pair, 0)
+                if buffer.appended == mark:
+                    continue
+                try:
+                    records, appended = buffer.since(mark)
+                    written += self._file_for(pair).append_many(records)
+                    self.flushed_marks[pair] = appended
+                except Exception as e:
+                    self.logger.log_error(
+                        'quote_history', 'flush_error', {'pair': pair, 'error': str(e)}
+                    )
+        return written
+
+    def _loop(self):
+        while self.running:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def start(self):
+        """
+        Inicia a thread de flush periódico
+        """
+        if self.running:
+            return
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True, name="quote-history-flush").start()
+
+    def stop(self):
+        """
+        Interrompe o flush periódico e grava as amostras pendentes
+        """
+        self.running = False
+        self.flush()
+
+
+# Instância global
+quote_history = QuoteHistory()
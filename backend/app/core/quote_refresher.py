@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Atualizador de Cotações - LiquidGold ATM
+Mantém as chaves quotes:* aquecidas em background (stale-while-revalidate)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.cache_manager import cache_manager
+from app.core.config import atm_config
+from app.core.logger import atm_logger
+from app.core.single_flight import SingleFlight
+
+# Função que busca a cotação no upstream e retorna {'price': float, 'source': str}
+QuoteFetcher = Callable[[], Dict[str, Any]]
+
+# Notificada a cada cotação obtida no upstream: (par, snapshot)
+QuoteListener = Callable[[str, Dict[str, Any]], None]
+
+
+class QuoteRefresher:
+    """
+    Atualiza periodicamente as cotações registradas antes do TTL do cache
+    e guarda o último preço válido de cada par para leitura sem bloqueio
+    """
+
+    def __init__(self):
+        self.logger = atm_logger
+        self.config = atm_config
+        self.cache = cache_manager
+
+        self.fetchers: Dict[str, QuoteFetcher] = {}
+        self.listeners: List[QuoteListener] = []
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quote-refresh")
+
+        # Misses simultâneos do mesmo par geram uma única chamada ao upstream
+        self.single_flight = SingleFlight()
+
+        self.running = False
+        self.tick_seconds = 1.0
+
+        # Limites padrão por par (sobrescritos em quotes.pairs.<PAR>)
+        self.default_pair_config = {
+            'refresh_seconds': 45,     # Atualizar antes do TTL de 60s do cache
+            'max_stale_seconds': 300   # Acima disso o preço não é mais servido
+        }
+
+    def register(self, pair: str, fetcher: QuoteFetcher):
+        """
+        Registra a função de busca de um par (ex: 'BTC:ARS')
+        """
+        with self.lock:
+            self.fetchers[pair] = fetcher
+
+    def add_listener(self, listener: QuoteListener):
+        """
+        Registra callback chamado a cada nova cotação obtida no upstream
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def get_pair_config(self, pair: str) -> Dict[str, float]:
+        """
+        Obtém limites de frescor e obsolescência do par
+        """
+        pair_config = dict(self.default_pair_config)
+        custom = self.config.get('quotes.pairs', {}) or {}
+        if isinstance(custom.get(pair), dict):
+            pair_config.update(custom[pair])
+        return pair_config
+
+    def _cache_key(self, pair: str) -> str:
+        return f"quotes:{pair}"
+
+    def refresh(self, pair: str) -> Dict[str, Any]:
+        """
+        Busca a cotação no upstream de forma síncrona e atualiza cache e snapshot
+        """
+        snapshot = self.single_flight.do(self._cache_key(pair), self._refresh_upstream, pair)
+        return self._with_age(pair, snapshot)
+
+    def _refresh_upstream(self, pair: str) -> Dict[str, Any]:
+        fetcher = self.fetchers.get(pair)
+        if fetcher is None:
+            raise Exception(f"Par {pair} não registrado no atualizador de cotações")
+
+        result = fetcher()
+        price = float(result['price'])
+        if price <= 0:
+            raise Exception(f"Cotação inválida para {pair}: {price}")
+
+        snapshot = {
+            'price': price,
+            'source': result.get('source'),
+            'timestamp': datetime.now().isoformat(),
+            'fetched_at': time.time()
+        }
+
+        with self.lock:
+            self.snapshots[pair] = snapshot
+        self.cache.set(self._cache_key(pair), snapshot, category='quotes')
+
+        for listener in list(self.listeners):
+            try:
+                listener(pair, snapshot)
+            except Exception as e:
+                self.logger.log_error('quote_refresher', 'listener_error', {
+                    'pair': pair,
+                    'error': str(e)
+                })
+
+        return snapshot
+
+    def _refresh_task(self, pair: str):
+        try:
+            self.refresh(pair)
+        except Exception as e:
+            self.logger.log_error('quote_refresher', 'refresh_error', {
+                'pair': pair,
+                'error': str(e)
+            })
+        finally:
+            with self.lock:
+                self.in_flight.discard(pair)
+
+    def refresh_in_background(self, pair: str) -> bool:
+        """
+        Agenda atualização sem bloquear o chamador; ignora se já houver uma em andamento
+        """
+        with self.lock:
+            if pair in self.in_flight or pair not in self.fetchers:
+                return False
+            self.in_flight.add(pair)
+        self.executor.submit(self._refresh_task, pair)
+        return True
+
+    def _with_age(self, pair: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        pair_config = self.get_pair_config(pair)
+        age = max(0.0, time.time() - float(snapshot.get('fetched_at', 0)))
+        return {
+            **snapshot,
+            'pair': pair,
+            'age_seconds': round(age, 3),
+            'stale': age >= pair_config['refresh_seconds'],
+            'expired': age > pair_config['max_stale_seconds']
+        }
+
+    def _adopt_cached(self, pair: str, cached: Any) -> Optional[Dict[str, Any]]:
+        """
+        Adota como snapshot local o valor do cache compartilhado (None se inválido)
+        """
+        if not cached or 'price' not in cached:
+            return None
+        cached = dict(cached)
+        if 'fetched_at' not in cached:
+            try:
+                cached['fetched_at'] = datetime.fromisoformat(cached['timestamp']).timestamp()
+            except Exception:
+                cached['fetched_at'] = time.time()
+        with self.lock:
+            return self.snapshots.setdefault(pair, cached)
+
+    def get_snapshot(self, pair: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o último preço válido do par com sua idade, ou None se não houver
+        """
+        with self.lock:
+            snapshot = self.snapshots.get(pair)
+
+        if snapshot is None:
+            # Outro worker pode ter aquecido o cache compartilhado
+            snapshot = self._adopt_cached(pair, self.cache.get(self._cache_key(pair)))
+            if snapshot is None:
+                return None
+
+        return self._with_age(pair, snapshot)
+
+    def get(self, pair: str) -> Dict[str, Any]:
+        """
+        Leitura stale-while-revalidate: serve o último preço válido e agenda
+        atualização quando estiver velho; só bloqueia se não houver preço utilizável
+        """
+        snapshot = self.get_snapshot(pair)
+        if snapshot and not snapshot['expired']:
+            if snapshot['stale']:
+                self.refresh_in_background(pair)
+            return snapshot
+        return self.refresh(pair)
+
+    def _loop(self):
+        while self.running:
+            try:
+                for pair in list(self.fetchers):
+                    snapshot = self.get_snapshot(pair)
+                    if snapshot is None or snapshot['stale']:
+                        self.refresh_in_background(pair)
+            except Exception as e:
+                self.logger.log_error('quote_refresher', 'loop_error', {'error': str(e)})
+            time.sleep(self.tick_seconds)
+
+    def start(self):
+        """
+        Inicia a thread de atualização em background
+        """
+        if self.running:
+            return
+        self.running = True
+        thread = threading.Thread(target=self._loop, daemon=True, name="quote-refresher")
+        thread.start()
+        self.logger.log_system('quote_refresher', 'started', {'pairs': list(self.fetchers)})
+
+    def stop(self):
+        """
+        Interrompe a thread de atualização
+        """
+        self.running = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Retorna idade e estado de cada par registrado
+        """
+        status = {}
+        pairs = list(self.fetchers)
+        # Pares sem snapshot local: buscar no cache compartilhado em um único lote
+        with self.lock:
+            missing = [pair for pair in pairs if pair not in self.snapshots]
+        cached = self.cache.get_many([self._cache_key(pair) for pair in missing], category='quotes')
+        for pair in missing:
+            self._adopt_cached(pair, cached.get(self._cache_key(pair)))
+        for pair in pairs:
+            with self.lock:
+                snapshot = self.snapshots.get(pair)
+            if snapshot is not None:
+                snapshot = self._with_age(pair, snapshot)
+            status[pair] = {
+                'price': snapshot['price'] if snapshot else None,
+                'source': snapshot.get('source') if snapshot else None,
+                'age_seconds': snapshot['age_seconds'] if snapshot else None,
+                'stale': snapshot['stale'] if snapshot else True,
+                'refreshing': pair in self.in_flight
+            }
+        return status
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estado dos pares e contadores de coalescência
+        """
+        return {
+            'pairs': self.get_status(),
+            'single_flight': self.single_flight.get_stats()
+        }
+
+
+# Instância global
+quote_refresher = QuoteRefresher()
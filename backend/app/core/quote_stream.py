@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Transmissão de Cotações - LiquidGold ATM
+Difunde cada mudança de preço uma única vez para todos os assinantes (/ws/quotes)
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Optional, Set
+
+from app.core.config import atm_config
+from app.core.logger import atm_logger
+
+
+class QuoteBroadcaster:
+    """
+    Recebe as cotações do atualizador (threads) e as entrega às filas dos assinantes
+    no event loop; a mensagem é serializada uma vez por atualização
+    """
+
+    def __init__(self):
+        self.logger = atm_logger
+        self.config = atm_config
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Dict[str, Dict[str, Any]] = {}  # Última cotação publicada por par
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+        self.queue_size = int(self.config.get('quotes.stream.client_queue_size', 32))
+
+        self.stats = {
+            'updates': 0,        # Atualizações recebidas do atualizador
+            'published': 0,      # Mensagens serializadas e difundidas
+            'unchanged': 0,      # Atualizações ignoradas (preço igual ao anterior)
+            'deliveries': 0,     # Mensagens colocadas em filas de assinantes
+            'dropped': 0         # Mensagens descartadas em assinantes lentos
+        }
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Define o event loop onde os assinantes vivem (chamado no startup)
+        """
+        self.loop = loop
+
+    def on_quote(self, pair: str, snapshot: Dict[str, Any]):
+        """
+        Listener do atualizador de cotações; executa na thread do atualizador
+        """
+        with self.lock:
+            self.stats['updates'] += 1
+            previous = self.latest.get(pair)
+            if previous is not None and previous['price'] == snapshot['price']:
+                self.stats['unchanged'] += 1
+                return
+
+            self.sequence += 1
+            update = {
+                'pair': pair,
+                'price': snapshot['price'],
+                'source': snapshot.get('source'),
+                'timestamp': snapshot.get('timestamp'),
+                'sequence': self.sequence
+            }
+            self.latest[pair] = update
+            message = json.dumps({'type': 'quote', **update})
+            self.stats['published'] += 1
+
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._fan_out, message)
+        except RuntimeError:
+            # Loop encerrado durante o shutdown
+            pass
+
+    def _fan_out(self, message: str):
+        """
+        Entrega a mesma string a todos os assinantes (executa no event loop)
+        """
+        for queue in list(self.subscribers):
+            if queue.full():
+                # Assinante lento: descartar a mensagem mais antiga
+                try:
+                    queue.get_nowait()
+                    self.stats['dropped'] += 1
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+            self.stats['deliveries'] += 1
+
+    def snapshot_message(self) -> str:
+        """
+        Estado atual de todos os pares, enviado ao assinante ao conectar
+        """
+        with self.lock:
+            quotes = {pair: dict(update) for pair, update in self.latest.items()}
+        return json.dumps({'type': 'snapshot', 'quotes': quotes})
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.stats,
+                'subscribers': len(self.subscribers),
+                'sequence': self.sequence,
+                'pairs': list(self.latest.keys())
+            }
+
+
+# Instância global
+quote_broadcaster = QuoteBroadcaster()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Políticas de Rate Limiting - LiquidGold ATM
+Tabela ordenada de políticas por rota (escopo, custo, chave de identificação),
+compilada em uma única expressão regular consultada uma vez por requisição
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import jwt
+
+from app.core.auth import ALGORITHM, SECRET_KEY
+from app.core.logger import atm_logger
+
+# Política padrão (primeira que casar vence). Padrões: {param} = um segmento,
+# * = qualquer sequência. key: ip | atm_id (token X-ATM-Token) | user (JWT Bearer);
+# atm_id e user caem para ip sem credencial válida. ip_scope: teto adicional por IP
+DEFAULT_POLICIES: List[Dict[str, Any]] = [
+    {"pattern": "*/login", "scope": "login", "key": "ip"},
+    {"pattern": "*/auth/*", "scope": "login", "key": "ip"},
+    {"pattern": "/api/reports/*", "scope": "reports", "key": "user", "cost": 10,
+     "ip_scope": "api"},
+    {"pattern": "/api/admin/*", "scope": "admin", "key": "user", "ip_scope": "admin"},
+    {"pattern": "/api/atm/sessions/{session_code}", "methods": ["GET"], "scope": "kiosk",
+     "key": "atm_id", "ip_scope": "api"},
+    {"pattern": "/api/atm/sessions/{session_code}/payment-status", "methods": ["GET"],
+     "scope": "kiosk", "key": "atm_id", "ip_scope": "api"},
+    {"pattern": "/api/atm/purchases/atm/{atm_id}", "scope": "kiosk", "key": "atm_id",
+     "ip_scope": "api"},
+    {"pattern": "/api/atm/quotes/batch", "scope": "kiosk", "key": "atm_id", "cost": 2,
+     "ip_scope": "api"},
+    {"pattern": "/api/atm/*", "scope": "kiosk", "key": "atm_id", "ip_scope": "api"},
+    {"pattern": "/api/*", "scope": "api", "key": "ip"},
+    {"pattern": "*", "scope": "ip", "key": "ip"}
+]
+
+KEY_TYPES = ("ip", "atm_id", "user")
+
+
+class RateLimitPolicy:
+    """
+    Uma linha da tabela de políticas
+    """
+    __slots__ = ('pattern', 'methods', 'scope', 'key', 'cost', 'ip_scope')
+
+    def __init__(self, pattern: str, scope: str, key: str = "ip", cost: int = 1,
+                 methods: Optional[List[str]] = None, ip_scope: Optional[str] = None):
+        if key not in KEY_TYPES:
+            raise Exception(f"Chave de rate limit inválida: {key}")
+        if int(cost) < 1:
+            raise Exception(f"Custo de rate limit inválido: {cost}")
+        self.pattern = pattern
+        self.methods = [m.upper() for m in methods] if methods else None
+        self.scope = scope
+        self.key = key
+        self.cost = int(cost)
+        # Sem sentido para chave ip: o próprio escopo já é por IP
+        self.ip_scope = ip_scope if key != "ip" else None
+
+    def to_regex(self, index: int) -> str:
+        """
+        Regex de "MÉTODO caminho"; parâmetros viram grupos p<índice>_<nome>
+        """
+        methods = "|".join(re.escape(m) for m in self.methods) if self.methods else "[A-Z]+"
+        parts = re.split(r"(\{[A-Za-z_][A-Za-z0-9_]*\}|\*)", self.pattern)
+        path = ""
+        for part in parts:
+            if part == "*":
+                path += ".*"
+            elif part.startswith("{") and part.endswith("}"):
+                path += f"(?P<p{index}_{part[1:-1]}>[^/]+)"
+            else:
+                path += re.escape(part)
+        return f"(?P<p{index}>(?:{methods}) {path})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pattern': self.pattern,
+            'methods': self.methods,
+            'scope': self.scope,
+            'key': self.key,
+            'cost': self.cost,
+            'ip_scope': self.ip_scope
+        }
+
+
+class PolicyRouter:
+    """
+    Resolve (escopo, identificador, custo) de uma requisição com um único regex.match
+    """
+
+    def __init__(self, policies: Optional[List[Dict[str, Any]]] = None):
+        self.logger = atm_logger
+        # ATMs cadastrados: um token válido de ATM fora desta lista não vale (revogação)
+        self.registered_atms: frozenset = frozenset()
+        # (políticas, regex) substituídos juntos em compile()
+        self.table: Tuple[List[RateLimitPolicy], Any] = ([], None)
+        self.compile(policies or DEFAULT_POLICIES)
+
+    def compile(self, policies: List[Dict[str, Any]]):
+        """
+        Compila a tabela; políticas inválidas são registradas e ignoradas
+        """
+        compiled: List[RateLimitPolicy] = []
+        for entry in policies:
+            try:
+                compiled.append(RateLimitPolicy(
+                    pattern=entry['pattern'],
+                    scope=entry['scope'],
+                    key=entry.get('key', 'ip'),
+                    cost=entry.get('cost', 1),
+                    methods=entry.get('methods'),
+                    ip_scope=entry.get('ip_scope')
+                ))
+            except Exception as e:
+                self.logger.log_error('rate_limiter', 'invalid_policy', {
+                    'policy': entry,
+                    'error': str(e)
+                })
+        # Sempre há uma política final para rotas não cobertas
+        if not compiled or compiled[-1].pattern != "*":
+            compiled.append(RateLimitPolicy("*", "ip"))
+
+        regex = re.compile(
+            "(?:" + "|".join(policy.to_regex(i) for i, policy in enumerate(compiled)) + r")\Z"
+        )
+        self.table = (compiled, regex)
+
+    def set_registered_atms(self, atm_ids: Iterable[str]):
+        """
+        Substitui o conjunto de ATMs aceitos como chave de rate limit
+        """
+        self.registered_atms = frozenset(str(atm_id) for atm_id in atm_ids if atm_id)
+
+    def match(self, method: str, path: str) -> Tuple[int, RateLimitPolicy, Optional[re.Match]]:
+        """
+        Retorna (índice, política, match) da primeira política que casar
+        """
+        policies, regex = self.table
+        match = regex.match(f"{method} {path}")
+        if match is None:
+            return len(policies) - 1, policies[-1], None
+        index = int(match.lastgroup[1:])
+        return index, policies[index], match
+
+    def resolve(self, method: str, path: str, client_ip: str,
+                headers: Mapping[str, str]) -> Tuple[str, str, int, Optional[str]]:
+        """
+        Retorna (escopo, identificador, custo, escopo do teto por IP); headers em minúsculas.
+        O teto vale também quando a chave cai para o IP (escopo do ATM pode ser maior)
+        """
+        _, policy, _ = self.match(method, path)
+        identifier = None
+        if policy.key == "atm_id":
+            # X-ATM-ID e {atm_id} na rota vêm do cliente: só o token assinado identifica o ATM
+            atm_id = self._verified_subject(headers.get("x-atm-token", ""), token_type="atm")
+            if atm_id is not None and atm_id in self.registered_atms:
+                identifier = f"atm:{atm_id}"
+        elif policy.key == "user":
+            authorization = headers.get("authorization", "")
+            if authorization.lower().startswith("bearer "):
+                subject = self._verified_subject(authorization[7:].strip(), token_type=None)
+                if subject is not None:
+                    identifier = f"user:{subject}"
+        ip_scope = policy.ip_scope
+        if identifier is None:
+            identifier = f"ip:{client_ip}"
+            # Mesmo bucket: o teto seria uma segunda cobrança da mesma chave
+            if ip_scope == policy.scope:
+                ip_scope = None
+        return policy.scope, identifier, policy.cost, ip_scope
+
+    def _verified_subject(self, token: str, token_type: Optional[str]) -> Optional[str]:
+        """
+        'sub' de um JWT com assinatura e expiração válidas e do tipo esperado
+        ('typ': atm para quiosques, ausente para usuários); None caso contrário
+        """
+        if not token:
+            return None
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            return None
+        if payload.get("typ") != token_type:
+            return None
+        subject = payload.get("sub")
+        return str(subject) if subject else None
+
+    def get_policies(self) -> List[Dict[str, Any]]:
+        return [policy.to_dict() for policy in self.table[0]]
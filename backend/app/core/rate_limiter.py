@@ -2,6 +2,10 @@
 """
 Sistema de Rate Limiting - LiquidGold ATM
 Implementação de limitação de taxa para proteção contra ataques de força bruta e DoS
+
+Algoritmo: GCRA (Generic Cell Rate Algorithm). Por chave guarda-se apenas o
+"theoretical arrival time" (TAT); cada decisão é O(1) e, no Redis, atômica em um
+único EVALSHA. Permite rajadas de até `rate` requisições e depois uma a cada per/rate s.
 """
 
 from fastapi import Request, HTTPException, status
@@ -9,12 +13,64 @@ from typing import Dict, List, Tuple, Optional, Callable, Any
 from datetime import datetime, timedelta
 import time
 import threading
-import ipaddress
-from collections import defaultdict, deque
+import math
+import queue
 
 from app.core.logger import atm_logger
 from app.core.config import atm_config
 from app.core.cache_manager import cache_manager
+from app.core.ip_allowlist import IPAllowList
+from app.core.rate_limit_policies import PolicyRouter
+
+# GCRA atômico no Redis. KEYS[1] = chave; ARGV = intervalo de emissão (ms),
+# tolerância de rajada (ms), unidades pedidas, mínimo aceitável. Concede até o pedido
+# (arrendamento de cota) ou nada se não couber o mínimo (decisão simples: pedido = mínimo
+# = custo). Usa o relógio do Redis (TIME) para que todos os workers compartilhem a mesma
+# referência de tempo. Retorna {concedidas, retry_after_ms, restantes}
+# (replicate_commands só é necessário antes do Redis 5, onde TIME antecede escritas;
+# nas versões novas é obsoleto e pode não existir)
+GCRA_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local minimum = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local available = math.floor((now + tolerance + emission - tat) / emission)
+if available > requested then
+    available = requested
+end
+if available < minimum then
+    return {0, tat + emission * (minimum - 1) - tolerance - now, 0}
+end
+
+local new_tat = tat + emission * available
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {available, 0, math.floor((now + tolerance + emission - new_tat) / emission)}
+"""
+
+
+class QuotaLease:
+    """
+    Cota arrendada do Redis por um worker para uma chave (escopo, identificador)
+    """
+    __slots__ = ('tokens', 'batch', 'expires_at', 'blocked_until', 'refilling')
+
+    def __init__(self, batch: int):
+        self.tokens = 0
+        self.batch = batch
+        self.expires_at = 0.0
+        self.blocked_until = 0.0    # Negação em cache até o retry_after devolvido pelo Redis
+        self.refilling = False
 
 class RateLimiter:
     """
@@ -32,14 +88,13 @@ class RateLimiter:
             "ip": {"rate": 100, "per": 60},      # 100 requisições por minuto por IP
             "login": {"rate": 5, "per": 60},     # 5 tentativas de login por minuto
             "api": {"rate": 200, "per": 60},     # 200 requisições de API por minuto
-            "admin": {"rate": 50, "per": 60}     # 50 requisições admin por minuto
+            "admin": {"rate": 50, "per": 60},    # 50 requisições admin por minuto
+            "kiosk": {"rate": 300, "per": 60},   # 300 requisições por minuto por ATM
+            "reports": {"rate": 60, "per": 60}   # 60 unidades de custo de relatório por minuto
         }
         
-        # Carregar configurações do arquivo de configuração
-        self._load_config()
-        
-        # Cache em memória para IPs com alta taxa de requisições
-        self.ip_cache = {}
+        # Tabela de políticas por rota (escopo, custo e chave)
+        self.policy_router = PolicyRouter()
         
         # Lista de IPs na whitelist (não sujeitos a rate limiting)
         self.whitelist = [
@@ -47,6 +102,30 @@ class RateLimiter:
             "::1",                 # Localhost IPv6
             "192.168.0.0/16"       # Rede local
         ]
+        self.allow_list = IPAllowList(
+            cache_size=int(self.config.get('security.rate_limit_whitelist_cache_size', 4096))
+        )
+        
+        # Carregar configurações do arquivo de configuração
+        self._load_config()
+        self.config.add_change_listener(self._on_config_change)
+        
+        # Fallback em memória (Redis indisponível): chave -> TAT em segundos
+        self.local_tats: Dict[str, float] = {}
+        self.local_lock = threading.Lock()
+        self.gcra_script = None
+        
+        # Arrendamento de cota: cada worker gasta localmente lotes obtidos do Redis
+        self.leases: Dict[str, QuotaLease] = {}
+        self.lease_lock = threading.Lock()
+        self.refill_queue: "queue.Queue" = queue.Queue()
+        self.refill_thread_started = False
+        self.lease_stats = {
+            'local_decisions': 0,   # Decididas sem ida ao Redis
+            'sync_acquires': 0,     # Lease vazio: requisição esperou o Redis
+            'async_refills': 0,     # Renovações em segundo plano
+            'denied_cached': 0      # Negadas pela negação em cache
+        }
         
         # Iniciar limpeza periódica do cache
         self._start_cleanup_thread()
@@ -59,18 +138,40 @@ class RateLimiter:
             rate_limits = self.config.get("security.rate_limits")
             if rate_limits:
                 for key, value in rate_limits.items():
-                    if key in self.default_limits and isinstance(value, dict):
+                    # Escopos novos podem ser definidos e referenciados pelas políticas
+                    if isinstance(value, dict):
                         if "rate" in value and "per" in value:
                             self.default_limits[key] = value
             
+            # Políticas por rota
+            policies = self.config.get("security.rate_limit_policies")
+            if policies and isinstance(policies, list):
+                self.policy_router.compile(policies)
+            
+            # ATMs cadastrados (chave atm_id); o ATM local sempre conta
+            registered_atms = self.config.get("security.registered_atm_ids") or []
+            self.policy_router.set_registered_atms(
+                list(registered_atms) + [self.config.get_atm_id()]
+            )
+            
             # Carregar whitelist
             whitelist = self.config.get("security.rate_limit_whitelist")
             if whitelist and isinstance(whitelist, list):
                 self.whitelist = whitelist
+            
+            # Compilar a whitelist uma vez (e não a cada requisição)
+            self.allow_list.compile(self.whitelist)
                 
         except Exception as e:
             self.logger.log_error('rate_limiter', 'config_load_error', {'error': str(e)})
     
+    def _on_config_change(self, key: str):
+        """
+        Recompila limites e whitelist quando a configuração muda ('*' = arquivo recarregado)
+        """
+        if key == '*' or key.startswith('security'):
+            self._load_config()
+    
     def _start_cleanup_thread(self):
         """
         Inicia thread para limpeza periódica do cache
@@ -79,25 +180,30 @@ class RateLimiter:
             while True:
                 try:
                     now = time.time()
-                    # Limpar entradas expiradas do cache em memória
-                    keys_to_remove = []
-                    for key, (timestamps, last_access) in self.ip_cache.items():
-                        # Remover timestamps antigos
-                        while timestamps and timestamps[0] < now - 3600:  # 1 hora
-                            timestamps.popleft()
-                        
-                        # Remover entradas não acessadas por mais de 1 hora
-                        if last_access < now - 3600:
-                            keys_to_remove.append(key)
+                    # TAT no passado: a chave voltou ao estado inicial e pode ser removida
+                    with self.local_lock:
+                        keys_to_remove = [key for key, tat in self.local_tats.items() if tat <= now]
+                        for key in keys_to_remove:
+                            del self.local_tats[key]
+                        remaining = len(self.local_tats)
                     
-                    for key in keys_to_remove:
-                        del self.ip_cache[key]
+                    # Leases vencidos e sem negação ativa
+                    monotonic_now = time.monotonic()
+                    with self.lease_lock:
+                        for key in [
+                            key
+                            for key, lease in self.leases.items()
+                            if lease.expires_at <= monotonic_now
+                            and lease.blocked_until <= monotonic_now
+                            and not lease.refilling
+                        ]:
+                            del self.leases[key]
                     
                     # Log da limpeza
                     if keys_to_remove:
                         self.logger.log_system('rate_limiter', 'cache_cleanup', {
                             'removed_entries': len(keys_to_remove),
-                            'remaining_entries': len(self.ip_cache)
+                            'remaining_entries': remaining
                         })
                         
                 except Exception as e:
@@ -114,24 +220,14 @@ class RateLimiter:
         """
         Verifica se um IP está na whitelist
         """
-        try:
-            client_ip = ipaddress.ip_address(ip)
-            
-            for item in self.whitelist:
-                # Verificar se é um CIDR (rede)
-                if '/' in item:
-                    network = ipaddress.ip_network(item, strict=False)
-                    if client_ip in network:
-                        return True
-                # Verificar IP individual
-                else:
-                    whitelist_ip = ipaddress.ip_address(item)
-                    if client_ip == whitelist_ip:
-                        return True
-            
-            return False
-        except Exception:
-            return False
+        return self.allow_list.contains(ip)
+    
+    def resolve(self, method: str, path: str, client_ip: str,
+                headers) -> Tuple[str, str, int, Optional[str]]:
+        """
+        Escopo, identificador, custo e escopo do teto por IP segundo a tabela de políticas
+        """
+        return self.policy_router.resolve(method, path, client_ip, headers)
     
     def _get_cache_key(self, scope: str, identifier: str) -> str:
         """
@@ -139,72 +235,185 @@ class RateLimiter:
         """
         return f"rate_limit:{scope}:{identifier}"
     
-    def _check_rate(self, scope: str, identifier: str) -> Tuple[bool, int]:
+    def _get_limit(self, scope: str) -> Tuple[int, float]:
+        """
+        Retorna (máximo de requisições, janela em segundos) do escopo
+        """
+        # Fallback para limites globais
+        limit = self.default_limits.get(scope) or self.default_limits["global"]
+        return int(limit["rate"]), float(limit["per"])
+    
+    def _acquire_redis(self, cache_key: str, emission: float, tolerance: float,
+                       requested: int, minimum: int) -> Tuple[int, float, int]:
+        """
+        Decisão GCRA no Redis (uma ida, atômica entre workers)
+        Retorna (unidades concedidas, retry_after em segundos, restantes)
+        """
+        if self.gcra_script is None or self.gcra_script.registered_client is not self.cache.redis:
+            # register_script usa EVALSHA e recarrega o script em NOSCRIPT
+            self.gcra_script = self.cache.redis.register_script(GCRA_SCRIPT)
+        granted, retry_after_ms, remaining = self.gcra_script(
+            keys=[cache_key],
+            args=[max(1, int(emission * 1000)), int(tolerance * 1000), requested, minimum]
+        )
+        return int(granted), retry_after_ms / 1000, int(remaining)
+    
+    def _acquire_local(self, cache_key: str, emission: float, tolerance: float,
+                       requested: int, minimum: int) -> Tuple[int, float, int]:
+        """
+        Mesma decisão GCRA em memória (por worker) quando o Redis está indisponível
+        """
+        now = time.time()
+        with self.local_lock:
+            tat = max(self.local_tats.get(cache_key, now), now)
+            available = min(requested, int((now + tolerance + emission - tat) / emission))
+            if available < minimum:
+                return 0, tat + emission * (minimum - 1) - tolerance - now, 0
+            new_tat = tat + emission * available
+            self.local_tats[cache_key] = new_tat
+            return available, 0.0, int((now + tolerance + emission - new_tat) / emission)
+    
+    def _lease_batch(self, max_requests: int) -> int:
+        """
+        Tamanho do lote arrendado: fração do limite, para que a soma dos lotes
+        parados nos workers distorça pouco o limite global (1 = sem arrendamento)
+        """
+        if not self.config.get('security.rate_limit_lease.enabled', True):
+            return 1
+        fraction = float(self.config.get('security.rate_limit_lease.fraction', 0.05))
+        max_batch = int(self.config.get('security.rate_limit_lease.max_batch', 20))
+        return max(1, min(max_batch, int(max_requests * fraction)))
+    
+    def _check_rate_leased(self, cache_key: str, emission: float, tolerance: float,
+                           cost: int, batch: int) -> Tuple[bool, float]:
+        """
+        Gasta a cota local; vai ao Redis apenas com o lease vazio. Abaixo do nível
+        mínimo, a renovação é agendada em segundo plano
+        """
+        now = time.monotonic()
+        with self.lease_lock:
+            lease = self.leases.get(cache_key)
+            if lease is None:
+                lease = self.leases[cache_key] = QuotaLease(batch)
+            if now < lease.blocked_until:
+                self.lease_stats['denied_cached'] += 1
+                return False, lease.blocked_until - now
+            if lease.expires_at <= now:
+                lease.tokens = 0
+            if lease.tokens >= cost:
+                lease.tokens -= cost
+                self.lease_stats['local_decisions'] += 1
+                low_water = float(self.config.get('security.rate_limit_lease.low_water', 0.25))
+                if lease.tokens <= batch * low_water and not lease.refilling:
+                    lease.refilling = True
+                    self._schedule_refill(cache_key, emission, tolerance)
+                return True, 0.0
+            self.lease_stats['sync_acquires'] += 1
+        
+        granted, retry_after, _ = self._acquire_redis(
+            cache_key, emission, tolerance, max(batch, cost), cost
+        )
+        with self.lease_lock:
+            if not granted:
+                lease.blocked_until = time.monotonic() + retry_after
+                return False, retry_after
+            lease.tokens += granted - cost
+            lease.expires_at = time.monotonic() + float(
+                self.config.get('security.rate_limit_lease.ttl_seconds', 2)
+            )
+            return True, 0.0
+    
+    def _schedule_refill(self, cache_key: str, emission: float, tolerance: float):
+        if not self.refill_thread_started:
+            self.refill_thread_started = True
+            threading.Thread(target=self._refill_loop, daemon=True, name="rate-limit-lease").start()
+        self.refill_queue.put((cache_key, emission, tolerance))
+    
+    def _refill_loop(self):
+        """
+        Renova leases fora do caminho da requisição
+        """
+        while True:
+            cache_key, emission, tolerance = self.refill_queue.get()
+            with self.lease_lock:
+                lease = self.leases.get(cache_key)
+            try:
+                if lease is None or not self.cache.redis_available():
+                    continue
+                granted, _, _ = self._acquire_redis(cache_key, emission, tolerance, lease.batch, 1)
+                with self.lease_lock:
+                    self.lease_stats['async_refills'] += 1
+                    if granted:
+                        now = time.monotonic()
+                        if lease.expires_at <= now:
+                            lease.tokens = 0
+                        lease.tokens += granted
+                        lease.expires_at = now + float(
+                            self.config.get('security.rate_limit_lease.ttl_seconds', 2)
+                        )
+            except Exception as e:
+                self.cache.mark_redis_failed('rate_limit', cache_key, e)
+            finally:
+                # Sob o lock: _check_rate_leased lê e liga o flag com o lock tomado
+                if lease is not None:
+                    with self.lease_lock:
+                        lease.refilling = False
+    
+    def _check_rate(self, scope: str, identifier: str, cost: int = 1) -> Tuple[bool, int]:
         """
         Verifica se o limite de taxa foi excedido
         Retorna (is_allowed, retry_after)
         """
-        # Obter limites para o escopo
-        if scope not in self.default_limits:
-            scope = "global"  # Fallback para limites globais
+        max_requests, window = self._get_limit(scope)
+        cache_key = self._get_cache_key(
+            scope if scope in self.default_limits else "global", identifier
+        )
         
-        limit = self.default_limits[scope]
-        max_requests = limit["rate"]
-        window = limit["per"]
+        # Uma requisição a cada window/max_requests s, com rajada de até max_requests
+        emission = window / max_requests
+        tolerance = window - emission
         
-        now = time.time()
-        cache_key = self._get_cache_key(scope, identifier)
+        allowed: Optional[bool] = None
+        retry_after = 0.0
+        if self.cache.redis_available():
+            try:
+                batch = self._lease_batch(max_requests)
+                if batch > 1 and cost <= batch:
+                    allowed, retry_after = self._check_rate_leased(
+                        cache_key, emission, tolerance, cost, batch
+                    )
+                else:
+                    granted, retry_after, _ = self._acquire_redis(
+                        cache_key, emission, tolerance, cost, cost
+                    )
+                    allowed = granted > 0
+            except Exception as e:
+                # Fallback para memória em caso de erro no Redis
+                self.cache.mark_redis_failed('rate_limit', cache_key, e)
+        if allowed is None:
+            granted, retry_after, _ = self._acquire_local(
+                cache_key, emission, tolerance, cost, cost
+            )
+            allowed = granted > 0
         
-        # Verificar no Redis primeiro
-        try:
-            # Tentar obter do Redis
-            rate_data = self.cache.get(cache_key, category="rate_limits")
-            if rate_data:
-                timestamps = rate_data.get("timestamps", [])
-                # Filtrar timestamps dentro da janela de tempo
-                valid_timestamps = [ts for ts in timestamps if ts > now - window]
-                
-                # Verificar se excedeu o limite
-                if len(valid_timestamps) >= max_requests:
-                    oldest = min(valid_timestamps) if valid_timestamps else now
-                    retry_after = int(oldest + window - now) + 1
-                    return False, retry_after
-                
-                # Atualizar timestamps
-                valid_timestamps.append(now)
-                self.cache.set(cache_key, {"timestamps": valid_timestamps}, 
-                               ttl=window*2, category="rate_limits")
-                return True, 0
-            else:
-                # Criar novo registro
-                self.cache.set(cache_key, {"timestamps": [now]}, 
-                               ttl=window*2, category="rate_limits")
-                return True, 0
-        except Exception as e:
-            # Fallback para cache em memória em caso de erro no Redis
-            self.logger.log_error('rate_limiter', 'redis_error', {'error': str(e)})
-            
-            # Usar cache em memória
-            if identifier not in self.ip_cache:
-                self.ip_cache[identifier] = (deque([now]), now)
-                return True, 0
-            
-            timestamps, _ = self.ip_cache[identifier]
-            
-            # Filtrar timestamps dentro da janela de tempo
-            while timestamps and timestamps[0] < now - window:
-                timestamps.popleft()
-            
-            # Verificar se excedeu o limite
-            if len(timestamps) >= max_requests:
-                oldest = timestamps[0] if timestamps else now
-                retry_after = int(oldest + window - now) + 1
-                return False, retry_after
-            
-            # Atualizar timestamps
-            timestamps.append(now)
-            self.ip_cache[identifier] = (timestamps, now)
+        if allowed:
             return True, 0
+        return False, max(1, math.ceil(retry_after))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Estatísticas do rate limiter (leases e chaves em memória)
+        """
+        with self.lease_lock:
+            stats = dict(self.lease_stats)
+            stats['leases'] = len(self.leases)
+        total = stats['local_decisions'] + stats['sync_acquires'] + stats['denied_cached']
+        stats['local_ratio'] = (
+            round((stats['local_decisions'] + stats['denied_cached']) / total, 4) if total else None
+        )
+        with self.local_lock:
+            stats['local_fallback_keys'] = len(self.local_tats)
+        return stats
     
     def limit(self, scope: str = "global"):
         """
@@ -6,6 +6,7 @@ from sqlalchemy import func, desc
 from .config import atm_config
 from .logger import atm_logger
 from .notifications import notification_manager
+from .memoize import memoize, not_error
 from ..models import Session as SessionModel
 
 class ReportGenerator:
@@ -14,6 +15,7 @@ class ReportGenerator:
         self.logger = atm_logger
         self.notifications = notification_manager
     
+    @memoize(category='reports', ttl=300, cache_if=not_error)
     def generate_daily_report(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """Gera relatório diário de transações"""
         if date is None:
@@ -288,6 +290,7 @@ class ReportGenerator:
             self.logger.log_system('reports', 'history_report_error', {'error': str(e)})
             return {'error': str(e)}
     
+    @memoize(category='reports', ttl=300, cache_if=not_error)
     def generate_performance_metrics(self) -> Dict[str, Any]:
         """Gera métricas de performance do ATM"""
         try:
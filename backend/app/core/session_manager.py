@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session as DBSession
 from app.models import Session as SessionModel, SessionStatusEnum, InvoiceStatusEnum, CryptoTypeEnum, NetworkTypeEnum, TransactionTypeEnum
 from app.schemas import (
@@ -15,6 +15,24 @@ from .notifications import notification_manager
 from .security import SecurityManager
 from .i18n import i18n_manager
 from .crypto_manager import crypto_manager
+from .cache_manager import cache_manager
+
+
+def session_status_snapshot(session: SessionModel) -> Dict[str, Any]:
+    """Status da sessão no formato armazenado em cache (session_status:<código>)"""
+    return {
+        'session_code': session.session_code,
+        'status': session.status.value,
+        'amount_ars': session.amount_ars,
+        'crypto_amount': session.crypto_amount,
+        'crypto_type': session.crypto_type.value,
+        'network_type': session.network_type.value,
+        'transaction_type': session.transaction_type.value,
+        'invoice': session.invoice,
+        'invoice_status': session.invoice_status.value,
+        'created_at': session.created_at.isoformat(),
+        'expires_at': session.expires_at.isoformat()
+    }
 
 class SessionManager:
     def __init__(self, db_session_factory):
@@ -24,6 +42,48 @@ class SessionManager:
         self.config = atm_config
         self.security_manager = SecurityManager(db_session_factory)
         self.crypto_manager = crypto_manager
+        self.cache = cache_manager
+
+    def _write_through(self, session: SessionModel) -> Dict[str, Any]:
+        """Grava o estado atual da sessão no cache (chamar após o commit, com o db aberto)"""
+        status_data = session_status_snapshot(session)
+        if not self.cache.set_session_status(session.session_code, status_data):
+            # Sem escrita garantida, não deixar um status antigo para trás
+            self.cache.invalidate_session_status(session.session_code)
+        return status_data
+
+    def _load_status(self, session_code: str) -> Dict[str, Any]:
+        """Status da sessão: cache primeiro, banco apenas em cache miss"""
+        status_data = self.cache.get_session_status(session_code)
+        if status_data is not None:
+            return status_data
+
+        db = self.db_session_factory()
+        try:
+            session = (
+                db.query(SessionModel).filter(SessionModel.session_code == session_code).first()
+            )
+            if not session:
+                raise Exception("Sessão não encontrada")
+            return self._write_through(session)
+        finally:
+            db.close()
+
+    def _expire_session(self, session_code: str) -> Dict[str, Any]:
+        """Marca a sessão como expirada no banco e atualiza o cache"""
+        db = self.db_session_factory()
+        try:
+            session = (
+                db.query(SessionModel).filter(SessionModel.session_code == session_code).first()
+            )
+            if not session:
+                self.cache.invalidate_session_status(session_code)
+                raise Exception("Sessão não encontrada")
+            session.status = SessionStatusEnum.expirada
+            db.commit()
+            return self._write_through(session)
+        finally:
+            db.close()
 
     def create_session(self, request: SessionCreateRequest) -> SessionCreateResponse:
         """Cria uma nova sessão de transação"""
@@ -77,12 +137,23 @@ class SessionManager:
             session_code = f"{uuid.uuid4().int % 1000:03d}-{uuid.uuid4().int % 1000:03d}"
             expires_at = datetime.utcnow() + timedelta(minutes=self.config.get('security.session_timeout_minutes', 5))
             
+            # Reutilizar cotação travada exibida ao cliente, se houver
+            quote_data = None
+            if request.quote_id:
+                quote_data = self.crypto_manager.redeem_quote_id(
+                    request.quote_id,
+                    request.crypto_type,
+                    request.amount_ars,
+                    request.transaction_type
+                )
+            
             # Obter cotação e criar invoice usando crypto manager
             invoice_data = self.crypto_manager.create_invoice(
                 request.crypto_type, 
                 request.amount_ars, 
                 session_code,
-                request.transaction_type
+                request.transaction_type,
+                quote_data=quote_data
             )
             
             # Determinar tipos de enum
@@ -108,6 +179,7 @@ class SessionManager:
             db.add(session)
             db.commit()
             db.refresh(session)
+            self._write_through(session)
             
             # Log de sucesso
             self.logger.log_transaction('session_created', 'session_creation_success', {
@@ -152,31 +224,14 @@ class SessionManager:
     def get_status(self, session_code: str) -> SessionStatusResponse:
         """Obtém status de uma sessão"""
         try:
-            db = self.db_session_factory()
-            session = db.query(SessionModel).filter(SessionModel.session_code == session_code).first()
-            
-            if not session:
-                raise Exception("Sessão não encontrada")
+            status_data = self._load_status(session_code)
             
             # Verificar se expirou
-            if datetime.utcnow() > session.expires_at:
-                session.status = SessionStatusEnum.expirada
-                db.commit()
+            if (status_data['status'] != SessionStatusEnum.expirada.value and
+                    datetime.utcnow() > datetime.fromisoformat(status_data['expires_at'])):
+                status_data = self._expire_session(session_code)
             
-            db.close()
-            
-            return SessionStatusResponse(
-                session_code=session.session_code,
-                status=session.status.value,
-                amount_ars=session.amount_ars,
-                crypto_amount=session.crypto_amount,
-                crypto_type=session.crypto_type.value,
-                network_type=session.network_type.value,
-                invoice=session.invoice,
-                invoice_status=session.invoice_status.value,
-                created_at=session.created_at,
-                expires_at=session.expires_at
-            )
+            return SessionStatusResponse(**status_data)
             
         except Exception as e:
             self.logger.log_transaction(session_code, 'status_check_failed', {'error': str(e)})
@@ -200,6 +255,7 @@ class SessionManager:
             session.invoice = request.invoice
             session.invoice_status = InvoiceStatusEnum.aguardando
             db.commit()
+            self._write_through(session)
             db.close()
             
             self.logger.log_transaction(session_code, 'invoice_associated', {
@@ -223,34 +279,26 @@ class SessionManager:
     def get_payment_status(self, session_code: str) -> PaymentStatusResponse:
         """Obtém status do pagamento"""
         try:
-            db = self.db_session_factory()
-            session = db.query(SessionModel).filter(SessionModel.session_code == session_code).first()
-            
-            if not session:
-                db.close()
-                raise Exception("Sessão não encontrada")
+            status_data = self._load_status(session_code)
             
             # Verificar pagamento usando crypto manager
             payment_status = "aguardando"
-            if session.invoice_status == InvoiceStatusEnum.pago:
+            if status_data['invoice_status'] == InvoiceStatusEnum.pago.value:
                 payment_status = "pago"
-            elif session.invoice_status == InvoiceStatusEnum.expirado:
+            elif status_data['invoice_status'] == InvoiceStatusEnum.expirado.value:
                 payment_status = "expirado"
             
-            db.close()
-            
             return PaymentStatusResponse(
                 session_code=session_code,
                 payment_status=payment_status,
-                amount_ars=session.amount_ars,
-                crypto_amount=session.crypto_amount,
-                crypto_type=session.crypto_type.value,
-                network_type=session.network_type.value
+                amount_ars=status_data['amount_ars'],
+                crypto_amount=status_data['crypto_amount'],
+                crypto_type=status_data['crypto_type'],
+                network_type=status_data['network_type'],
+                transaction_type=status_data['transaction_type']
             )
             
         except Exception as e:
-            if 'db' in locals():
-                db.close()
             self.logger.log_transaction(session_code, 'payment_status_check_failed', {'error': str(e)})
             raise e
 
@@ -290,6 +338,7 @@ class SessionManager:
                 })
             
             db.commit()
+            self._write_through(session)
             db.close()
             
             self.logger.log_transaction(session_code, 'invoice_status_updated', {
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Coalescência de Requisições (single-flight) - LiquidGold ATM
+Garante uma única chamada ao upstream por chave, compartilhada entre threads e corrotinas
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class SingleFlight:
+    """
+    N chamadas simultâneas para a mesma chave resultam em uma única execução;
+    os demais chamadores recebem o mesmo resultado ou a mesma exceção
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, Future] = {}
+
+        # Estatísticas de coalescência
+        self.stats = {
+            'calls': 0,        # Total de chamadas recebidas
+            'executions': 0,   # Chamadas que foram ao upstream
+            'collapsed': 0,    # Chamadas atendidas por uma execução em andamento
+            'errors': 0        # Execuções que terminaram em erro
+        }
+        self.key_stats: Dict[str, Dict[str, int]] = {}
+
+    def _join(self, key: str):
+        """
+        Retorna (future, is_leader) para a chave
+        """
+        with self.lock:
+            self.stats['calls'] += 1
+            key_stats = self.key_stats.setdefault(key, {'executions': 0, 'collapsed': 0})
+
+            future = self.calls.get(key)
+            if future is not None:
+                self.stats['collapsed'] += 1
+                key_stats['collapsed'] += 1
+                return future, False
+
+            future = Future()
+            self.calls[key] = future
+            self.stats['executions'] += 1
+            key_stats['executions'] += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future):
+        with self.lock:
+            if self.calls.get(key) is future:
+                del self.calls[key]
+
+    def _record_error(self):
+        with self.lock:
+            self.stats['errors'] += 1
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa fn uma única vez por chave entre todas as threads concorrentes
+        """
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._record_error()
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def do_async(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Variante para corrotinas; compartilha as mesmas chamadas em andamento de do()
+        """
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+        except BaseException as e:
+            self._record_error()
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores globais e por chave
+        """
+        with self.lock:
+            return {
+                **self.stats,
+                'in_flight': len(self.calls),
+                'keys': {key: dict(values) for key, values in self.key_stats.items()}
+            }
@@ -14,6 +14,8 @@ from infobip_api_python_sdk import SendSmsApi, SmsDestination, SmsTextualMessage
 from infobip_api_python_sdk import Configuration
 from infobip_api_python_sdk import ApiException
 
+from .config import atm_config
+
 # Configurar logger
 logger = logging.getLogger(__name__)
 
@@ -24,7 +26,9 @@ class SMSManager:
         """Inicializa o gerenciador de SMS"""
         # Configurações padrão (para desenvolvimento)
         self.api_key = os.getenv('INFOBIP_API_KEY', '79bec273e41a23ad3b8faa773e443ab8-deb0d324-2fb7-484e-9133-03c2a215c1d6')
-        self.base_url = os.getenv('INFOBIP_BASE_URL', 'https://9kegvy.api.infobip.com')
+        self.base_url = atm_config.resolve_provider_url(
+            'infobip', os.getenv('INFOBIP_BASE_URL', 'https://9kegvy.api.infobip.com')
+        )
         self.sender = os.getenv('INFOBIP_SENDER', 'LiquidGold')
         
         if not self.api_key:
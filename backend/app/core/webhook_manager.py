@@ -9,12 +9,12 @@ import time
 import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-import requests
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 from .config import atm_config
 from .logger import atm_logger
+from .http_client import http_client
 
 class WebhookEventType(Enum):
     """Tipos de eventos para webhooks"""
@@ -139,8 +139,8 @@ class WebhookManager:
         """Envia webhook para URL específica com retry"""
         for attempt in range(self.webhook_config['retry_attempts']):
             try:
-                response = requests.post(
-                    url,
+                response = http_client.post(
+                    atm_config.resolve_provider_url('webhooks', url),
                     json=payload,
                     headers={
                         'Content-Type': 'application/json',
@@ -20,7 +20,9 @@ class WhatsAppManager:
         self.config = atm_config
         
         # Configurações de WhatsApp Business (mock para desenvolvimento)
-        self.whatsapp_api_url = "https://graph.facebook.com/v17.0/phone_number_id/messages"
+        self.whatsapp_api_url = atm_config.resolve_provider_url(
+            "whatsapp", "https://graph.facebook.com/v17.0/phone_number_id/messages"
+        )
         self.whatsapp_token = "mock_token_for_development"
         self.phone_number_id = "mock_phone_number_id"
         
@@ -6,7 +6,7 @@ import json
 import asyncio
 from typing import List
 
-from app.middleware import RateLimitMiddleware, AuditMiddleware
+from app.middleware import SecurityMiddleware
 from app.api import atm, admin, auth as auth_api
 from app.core.logger import atm_logger
 from app.core.config import atm_config
@@ -20,6 +20,11 @@ from app.core.backup_manager import backup_manager
 from app.core.auto_reports import auto_report_generator
 from app.core.monitoring import health_monitor
 from app.core.session_manager import SessionManager
+from app.core.quote_refresher import quote_refresher
+from app.core.quote_history import quote_history
+from app.core.quote_stream import quote_broadcaster
+from app.core.http_client import http_client
+from app.core.cache_manager import cache_manager
 from app.deps import get_db_session_factory
 
 import threading
@@ -62,9 +67,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Adicionar middlewares de segurança
-app.add_middleware(RateLimitMiddleware)
-app.add_middleware(AuditMiddleware)
+# Adicionar middleware de segurança (rate limiting + auditoria, ASGI puro)
+app.add_middleware(SecurityMiddleware)
 
 # Importar APIs
 from app.api import backup as backup_api
@@ -202,10 +206,24 @@ async def startup_event():
         cleanup_thread = threading.Thread(target=cleanup_expired_sessions, daemon=True)
         cleanup_thread.start()
         
+        # Manter cotações aquecidas antes do TTL do cache
+        quote_refresher.start()
+        quote_history.start()
+        
+        # Invalidação do cache L1 entre workers
+        cache_manager.start_invalidation_listener()
+        
+        # Difusão de cotações para /ws/quotes
+        quote_broadcaster.attach_loop(asyncio.get_running_loop())
+        
         atm_logger.log_system('startup', 'background_tasks_started', {
             'health_check': True,
             'daily_reports': True,
-            'session_cleanup': True
+            'session_cleanup': True,
+            'quote_refresher': True,
+            'quote_history': True,
+            'quote_stream': True,
+            'cache_invalidation': cache_manager.redis is not None
         })
         
     except Exception as e:
@@ -215,6 +233,15 @@ async def startup_event():
 async def shutdown_event():
     """Evento executado no encerramento da aplicação"""
     try:
+        quote_refresher.stop()
+        quote_history.stop()
+        await http_client.aclose()
+        cache_manager.stop_invalidation_listener()
+        
+        # Gravar eventos de auditoria pendentes antes de encerrar
+        from app.core.audit import audit_manager
+        audit_manager.flush()
+        
         atm_logger.log_system('shutdown', 'application_shutdown', {
             'timestamp': datetime.utcnow().isoformat()
         })
@@ -687,6 +714,28 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+# Endpoint WebSocket de cotações: uma mensagem por mudança de preço para todos os quiosques
+@app.websocket("/ws/quotes")
+async def quotes_websocket_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    queue = quote_broadcaster.subscribe()
+
+    async def sender():
+        await websocket.send_text(quote_broadcaster.snapshot_message())
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender_task = asyncio.create_task(sender())
+    try:
+        while True:
+            # Mantém a conexão e detecta desconexão do cliente
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender_task.cancel()
+        quote_broadcaster.unsubscribe(queue)
+
 # Função para notificar todos os admins conectados
 async def notify_admins(event_type: str, data: dict):
     print(f"DEBUG: notify_admins chamada - tipo: {event_type}, conexões ativas: {len(manager.active_connections)}")
@@ -3,7 +3,6 @@
 Pacote de Middlewares - LiquidGold ATM
 """
 
-from app.middleware.rate_limit_middleware import RateLimitMiddleware
-from app.middleware.audit_middleware import AuditMiddleware
+from app.middleware.security_middleware import SecurityMiddleware
 
-__all__ = ['RateLimitMiddleware', 'AuditMiddleware']
\ No newline at end of file
+__all__ = ['SecurityMiddleware']
\ No newline at end of file
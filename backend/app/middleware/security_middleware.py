@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Middleware de Segurança - LiquidGold ATM
+Middleware ASGI puro que aplica rate limiting e registra a auditoria de cada requisição HTTP
+em uma única passagem: o caminho e os cabeçalhos são lidos uma vez, o recurso é classificado
+por tabela pré-compilada e cada requisição gera um único registro de tempo.
+Substitui RateLimitMiddleware e AuditMiddleware (BaseHTTPMiddleware), que criavam uma
+tarefa e um memory stream por requisição e quebravam respostas em streaming.
+"""
+
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.audit import audit_manager
+from app.core.logger import atm_logger
+from app.core.rate_limiter import rate_limiter
+
+# Rotas não auditadas: recursos estáticos, documentação, saúde e métricas (alto volume)
+_SKIP_AUDIT_PREFIXES = ("/static/", "/docs", "/redoc")
+_SKIP_AUDIT_PATHS = frozenset({"/openapi.json", "/api/health", "/api/metrics"})
+
+# Recursos cujo segundo segmento compõe o nome (atm_sessions, admin_config...)
+_NESTED_RESOURCES = frozenset({"atm", "admin"})
+_RESOURCE_PATTERN = re.compile(r"/*(?:api/)?([^/]*)/*([^/]*)")
+
+# Cabeçalhos usados pelo rate limiter e pela auditoria
+_WANTED_HEADERS = {
+    b"host": "host",
+    b"x-atm-token": "x-atm-token",
+    b"authorization": "authorization"
+}
+
+# Requisições mais lentas que isso geram log de performance
+SLOW_REQUEST_SECONDS = 1.0
+
+
+def classify_resource(path: str) -> Tuple[str, Optional[str]]:
+    """
+    Retorna (recurso, id do recurso) do caminho
+    """
+    match = _RESOURCE_PATTERN.match(path)
+    first, second = match.group(1), match.group(2)
+    if first in _NESTED_RESOURCES and second:
+        resource = f"{first}_{second}"
+    else:
+        resource = first or "unknown"
+
+    # Geralmente o ID está no terceiro segmento do caminho completo
+    parts = path.strip("/").split("/")
+    resource_id = parts[2] if len(parts) >= 3 and parts[2].isalnum() else None
+    return resource, resource_id
+
+
+class SecurityMiddleware:
+    """
+    Rate limiting + auditoria em ASGI puro (requisições HTTP; websockets passam direto)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        path = scope["path"]
+        method = scope["method"]
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
+        headers: Dict[str, str] = {}
+        for name, value in scope["headers"]:
+            wanted = _WANTED_HEADERS.get(name)
+            if wanted is not None:
+                headers[wanted] = value.decode("latin-1")
+
+        # Rate limiting (IPs da whitelist não são limitados)
+        rate_scope = None
+        if not rate_limiter._is_whitelisted(client_ip):
+            rate_scope, identifier, cost, ip_scope = rate_limiter.resolve(
+                method, path, client_ip, headers
+            )
+            # Teto por IP primeiro (uma unidade, como o limite por IP antigo):
+            # trocar de ATM/usuário não ultrapassa o limite do IP
+            is_allowed, retry_after = True, 0
+            if ip_scope is not None:
+                is_allowed, retry_after = rate_limiter._check_rate(ip_scope, f"ip:{client_ip}")
+            if is_allowed:
+                is_allowed, retry_after = rate_limiter._check_rate(rate_scope, identifier, cost)
+            if not is_allowed:
+                atm_logger.log_security('rate_limiter', 'rate_limit_exceeded', {
+                    'ip': client_ip,
+                    'identifier': identifier,
+                    'path': path,
+                    'scope': rate_scope,
+                    'cost': cost,
+                    'retry_after': retry_after
+                })
+                await self._send_rate_limited(send, retry_after)
+                self._audit(scope, method, path, client_ip, headers, 429, None, start_time)
+                return
+
+        status_code = 500
+        scope_header = rate_scope.encode("latin-1") if rate_scope else None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if scope_header is not None:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-rate-limit-scope", scope_header)
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            self._audit(scope, method, path, client_ip, headers, None, e, start_time)
+            atm_logger.log_error('api', 'request_error', {
+                'path': self._full_url(scope, path, headers),
+                'method': method,
+                'error': str(e)
+            })
+            # Re-lançar a exceção para ser tratada pelo FastAPI
+            raise
+        self._audit(scope, method, path, client_ip, headers, status_code, None, start_time)
+
+    async def _send_rate_limited(self, send, retry_after: int):
+        body = f"Muitas requisições. Tente novamente em {retry_after} segundos.".encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _full_url(self, scope: Dict[str, Any], path: str, headers: Dict[str, str]) -> str:
+        host = headers.get("host")
+        if host is None:
+            server = scope.get("server")
+            host = f"{server[0]}:{server[1]}" if server else "localhost"
+        query = scope.get("query_string", b"")
+        url = f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}{path}"
+        return f"{url}?{query.decode('latin-1')}" if query else url
+
+    def _audit(self, scope: Dict[str, Any], method: str, path: str, client_ip: str,
+               headers: Dict[str, str], status_code: Optional[int], error: Optional[Exception],
+               start_time: float):
+        """
+        Registro único de auditoria/tempo da requisição
+        """
+        process_time = time.perf_counter() - start_time
+        if process_time > SLOW_REQUEST_SECONDS:
+            atm_logger.log_system('performance', 'slow_request', {
+                'ip': client_ip,
+                'path': path,
+                'process_time': round(process_time, 3),
+                'status_code': status_code
+            })
+
+        if path.startswith(_SKIP_AUDIT_PREFIXES) or path in _SKIP_AUDIT_PATHS:
+            return
+
+        details: Dict[str, Any] = {
+            'path': self._full_url(scope, path, headers),
+            'method': method,
+            'process_time_ms': round(process_time * 1000, 2)
+        }
+        if error is not None:
+            details['error'] = str(error)
+            status = "failure"
+        else:
+            details['status_code'] = status_code
+            status = (
+                "failure" if status_code >= 400 else "warning" if status_code >= 300 else "success"
+            )
+
+        resource, resource_id = classify_resource(path)
+        audit_manager.log_event(
+            action=f"{method}_REQUEST",
+            resource=resource,
+            resource_id=resource_id,
+            # O token JWT não é decodificado aqui (mesmo comportamento anterior)
+            user_id=None,
+            ip_address=client_ip,
+            details=details,
+            status=status
+        )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class SessionCreateRequest(BaseModel):
@@ -7,6 +7,9 @@ class SessionCreateRequest(BaseModel):
     amount_ars: float = Field(..., description="Valor em pesos argentinos")
     crypto_type: str = Field(..., description="Tipo de criptomoeda (BTC ou USDT)")
     transaction_type: str = Field(default="VENDA", description="Tipo de transação (VENDA ou COMPRA)")
+    quote_id: Optional[str] = Field(
+        None, description="Quote ID com preço travado retornado por /quote"
+    )
 
 class SessionCreateResponse(BaseModel):
     session_code: str = Field(..., description="Código da sessão")
@@ -55,6 +58,9 @@ class PurchaseCreateRequest(BaseModel):
     crypto_type: str = Field(..., description="Tipo de criptomoeda (BTC ou USDT)")
     crypto_address: str = Field(..., description="Endereço para receber criptomoeda")
     ars_payment_method: str = Field(..., description="Método de pagamento ARS")
+    quote_id: Optional[str] = Field(
+        None, description="Quote ID com preço travado retornado por /quote"
+    )
 
 class PurchaseCreateResponse(BaseModel):
     purchase_code: str = Field(..., description="Código da compra")
@@ -94,6 +100,26 @@ class QuoteResponse(BaseModel):
     service_fee_percent: float = Field(..., description="Taxa de serviço em %")
     service_fee_ars: float = Field(..., description="Taxa de serviço em ARS")
     transaction_type: str = Field(..., description="Tipo de transação")
+    price_age_seconds: Optional[float] = Field(None, description="Idade da cotação em segundos")
+    quote_id: Optional[str] = Field(
+        None, description="Quote ID assinado com preço e taxas travados"
+    )
+    quote_expires_at: Optional[str] = Field(None, description="Validade do quote ID")
+
+class QuoteBatchRequest(BaseModel):
+    quotes: List[QuoteRequest] = Field(..., description="Lista de cotações solicitadas")
+
+class QuoteBatchItemResponse(BaseModel):
+    index: int = Field(..., description="Posição do item na requisição")
+    success: bool = Field(..., description="Se a cotação foi calculada")
+    quote: Optional[QuoteResponse] = Field(None, description="Cotação calculada")
+    error: Optional[str] = Field(None, description="Motivo da falha")
+
+class QuoteBatchResponse(BaseModel):
+    quotes: List[QuoteBatchItemResponse] = Field(
+        ..., description="Cotações na mesma ordem da requisição"
+    )
+    count: int = Field(..., description="Quantidade de itens")
 
 class SupportedCryptosResponse(BaseModel):
     cryptos: dict = Field(..., description="Criptomoedas suportadas")
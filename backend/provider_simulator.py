@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Simulador local de exchanges e provedores de pagamento - LiquidGold ATM
+Serve os mesmos formatos de ticker (Bitso, Binance, Ripio, Buenbit, Lemon, CoinGecko,
+exchangerate-api), invoices Strike, SMS Infobip e um coletor de webhooks, com latência,
+erros e limite de vazão configuráveis por provedor, para benchmarks reproduzíveis.
+
+Uso:
+    python provider_simulator.py --port 8900 --latency-ms 80 --error-rate 0.02
+    PROVIDER_SIMULATOR_URL=http://127.0.0.1:8900 python run_server.py
+
+Com o backend apontado para o simulador (simulator.enabled ou PROVIDER_SIMULATOR_URL),
+https://api.bitso.com/v3/ticker/?book=btc_ars vira {base_url}/bitso/v3/ticker/?book=btc_ars.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Configurações padrão
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8900
+
+PROVIDERS = [
+    "bitso", "binance", "ripio", "buenbit", "lemon", "coingecko", "exchangerate",
+    "strike", "infobip", "whatsapp", "webhooks", "google"
+]
+
+DEFAULT_PROFILE = {
+    "latency": {
+        "distribution": "fixed",  # fixed | uniform | normal | lognormal | exponential
+        "ms": 50.0,               # Média (ou valor fixo)
+        "stddev_ms": 10.0,        # normal / lognormal
+        "min_ms": 0.0,            # uniform e limite inferior
+        "max_ms": 5000.0          # uniform e limite superior
+    },
+    "error_rate": 0.0,            # Fração de respostas com erro
+    "error_status": 503,
+    "timeout_rate": 0.0,          # Fração de respostas que travam por hang_seconds
+    "hang_seconds": 30.0,
+    "max_rps": 0.0                # 0 = sem limite; acima disso responde 429
+}
+
+
+class TokenBucket:
+    """
+    Limite de vazão por provedor
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class ProviderSimulator:
+    """
+    Estado do simulador: perfis por provedor, preços em passeio aleatório,
+    invoices, SMS e webhooks recebidos
+    """
+
+    def __init__(self, profile: Dict[str, Any], seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.invoice_paid_after = float(profile.get("invoice_paid_after_seconds", 20))
+
+        for provider in PROVIDERS:
+            self.set_profile(provider, self._merge(DEFAULT_PROFILE, profile.get("default", {})))
+        for provider, custom in profile.get("providers", {}).items():
+            self.set_profile(
+                provider, self._merge(self.profiles.get(provider, DEFAULT_PROFILE), custom)
+            )
+
+        # Preços base (ARS / USD) com passeio aleatório a cada consulta
+        self.prices = {
+            "BTC_ARS": 95_000_000.0,
+            "BTC_USDT": 68_000.0,
+            "USDT_USD": 1.0,
+            "USDT_ARS": 1_400.0,
+            "USD_ARS": 1_390.0
+        }
+        self.volatility = float(profile.get("volatility", 0.0005))
+
+        self.invoices: Dict[str, Dict[str, Any]] = {}
+        self.sms_messages = []
+        self.webhooks = []
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.reset_stats()
+
+    def _merge(self, base: Dict[str, Any], custom: Dict[str, Any]) -> Dict[str, Any]:
+        result = json.loads(json.dumps(base))
+        for key, value in custom.items():
+            if isinstance(value, dict) and isinstance(result.get(key), dict):
+                result[key].update(value)
+            else:
+                result[key] = value
+        return result
+
+    def set_profile(self, provider: str, profile: Dict[str, Any]):
+        with self.lock:
+            self.profiles[provider] = profile
+            self.buckets[provider] = TokenBucket(float(profile.get("max_rps", 0) or 0))
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {
+                provider: {
+                    "requests": 0,
+                    "errors": 0,
+                    "timeouts": 0,
+                    "throttled": 0,
+                    "latency_ms_total": 0.0,
+                }
+                for provider in PROVIDERS
+            }
+
+    def sample_latency(self, provider: str) -> float:
+        """
+        Latência simulada (segundos) segundo a distribuição do provedor
+        """
+        latency = self.profiles[provider]["latency"]
+        distribution = latency.get("distribution", "fixed")
+        mean = float(latency.get("ms", 0))
+        stddev = float(latency.get("stddev_ms", 0))
+        low = float(latency.get("min_ms", 0))
+        high = float(latency.get("max_ms", 5000))
+
+        with self.lock:
+            if distribution == "uniform":
+                value = self.random.uniform(low, high)
+            elif distribution == "normal":
+                value = self.random.gauss(mean, stddev)
+            elif distribution == "lognormal" and mean > 0:
+                # Parâmetros da normal subjacente a partir de média e desvio desejados
+                variance = stddev ** 2
+                sigma2 = max(1e-9, math.log(1 + variance / mean ** 2))
+                mu = math.log(mean) - sigma2 / 2
+                value = self.random.lognormvariate(mu, sigma2 ** 0.5)
+            elif distribution == "exponential" and mean > 0:
+                value = self.random.expovariate(1.0 / mean)
+            else:
+                value = mean
+        return max(low, min(high, value)) / 1000.0
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < probability
+
+    def price(self, symbol: str) -> float:
+        with self.lock:
+            current = self.prices[symbol] * (1 + self.random.gauss(0, self.volatility))
+            self.prices[symbol] = current
+            return round(current, 2 if current > 10 else 6)
+
+    def record(self, provider: str, key: str, latency: float = 0.0):
+        with self.lock:
+            stats = self.stats.setdefault(provider, {
+                "requests": 0, "errors": 0, "timeouts": 0, "throttled": 0, "latency_ms_total": 0.0
+            })
+            stats[key] += 1
+            stats["latency_ms_total"] += latency * 1000
+
+    def invoice_view(self, invoice: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Invoices passam a PAID após invoice_paid_after_seconds
+        """
+        if (
+            invoice["status"] == "UNPAID"
+            and time.time() - invoice["created_ts"] >= self.invoice_paid_after
+        ):
+            invoice["status"] = "PAID"
+            invoice["paid_at"] = datetime.utcnow().isoformat()
+            invoice["amount_paid"] = invoice["amount"]
+            invoice["fee_paid"] = 0
+        return {k: v for k, v in invoice.items() if k != "created_ts"}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = {}
+            for provider, values in self.stats.items():
+                served = values["requests"] - values["throttled"]
+                stats[provider] = {
+                    **values,
+                    "avg_latency_ms": (
+                        round(values["latency_ms_total"] / served, 2) if served else None
+                    ),
+                }
+            return {
+                "providers": stats,
+                "invoices": len(self.invoices),
+                "sms_messages": len(self.sms_messages),
+                "webhooks_received": len(self.webhooks)
+            }
+
+
+def create_app(simulator: ProviderSimulator) -> FastAPI:
+    app = FastAPI(title="LiquidGold Provider Simulator", version="1.0.0")
+
+    @app.middleware("http")
+    async def simulate_provider_conditions(request: Request, call_next):
+        provider = request.url.path.strip("/").split("/", 1)[0]
+        if provider not in simulator.profiles:
+            return await call_next(request)
+
+        profile = simulator.profiles[provider]
+        if not simulator.buckets[provider].consume():
+            simulator.record(provider, "requests")
+            simulator.record(provider, "throttled")
+            return JSONResponse({"error": "rate limit exceeded"}, status_code=429)
+
+        latency = simulator.sample_latency(provider)
+        if simulator.roll(float(profile.get("timeout_rate", 0))):
+            simulator.record(provider, "timeouts")
+            latency = float(profile.get("hang_seconds", 30))
+        await asyncio.sleep(latency)
+        simulator.record(provider, "requests", latency)
+
+        if simulator.roll(float(profile.get("error_rate", 0))):
+            simulator.record(provider, "errors")
+            status = int(profile.get("error_status", 503))
+            return JSONResponse({"error": "simulated upstream error"}, status_code=status)
+
+        return await call_next(request)
+
+    # Tickers
+    @app.get("/bitso/v3/ticker/")
+    async def bitso_ticker(book: str = "btc_ars"):
+        return {"success": True, "payload": {"book": book, "last": str(simulator.price("BTC_ARS"))}}
+
+    @app.get("/binance/api/v3/ticker/price")
+    async def binance_ticker(symbol: str = "BTCUSDT"):
+        key = {"BTCUSDT": "BTC_USDT", "USDTUSD": "USDT_USD"}.get(symbol)
+        if key is None:
+            return JSONResponse({"code": -1121, "msg": "Invalid symbol."}, status_code=400)
+        return {"symbol": symbol, "price": f"{simulator.price(key):.8f}"}
+
+    @app.get("/binance/api/v3/ping")
+    async def binance_ping():
+        return {}
+
+    @app.get("/ripio/public/v1/market/")
+    async def ripio_market():
+        return {"data": [{"pair": "USDT_ARS", "last_price": str(simulator.price("USDT_ARS"))}]}
+
+    @app.get("/buenbit/api/v1/market/ticker")
+    async def buenbit_ticker():
+        return {"data": [{"symbol": "USDT_ARS", "last_price": str(simulator.price("USDT_ARS"))}]}
+
+    @app.get("/lemon/v1/market/ticker")
+    async def lemon_ticker():
+        return {"USDT_ARS": {"last": str(simulator.price("USDT_ARS"))}}
+
+    @app.get("/coingecko/api/v3/simple/price")
+    async def coingecko_price(ids: str = "tether", vs_currencies: str = "ars"):
+        return {"tether": {"ars": simulator.price("USDT_ARS")}}
+
+    @app.get("/exchangerate/v4/latest/USD")
+    async def exchangerate_latest():
+        return {"base": "USD", "rates": {"USD": 1.0, "ARS": simulator.price("USD_ARS")}}
+
+    @app.get("/google/")
+    async def google_home():
+        return {"status": "ok"}
+
+    # Strike (Lightning)
+    @app.post("/strike/v1/accounts/{account_id}/invoices")
+    async def strike_create_invoice(account_id: str, request: Request):
+        body = await request.json()
+        invoice_id = str(uuid.uuid4())
+        invoice = {
+            "invoice_id": invoice_id,
+            "payment_request": f"lnbcsim{int(body.get('amount', 0))}n1{uuid.uuid4().hex}",
+            "amount": body.get("amount"),
+            "description": body.get("description"),
+            "status": "UNPAID",
+            "created_at": datetime.utcnow().isoformat(),
+            "expires_at": (
+                datetime.utcnow() + timedelta(seconds=int(body.get("expiration", 3600)))
+            ).isoformat(),
+            "created_ts": time.time(),
+        }
+        with simulator.lock:
+            simulator.invoices[invoice_id] = invoice
+        return simulator.invoice_view(invoice)
+
+    @app.get("/strike/v1/accounts/{account_id}/invoices/{invoice_id}")
+    async def strike_get_invoice(account_id: str, invoice_id: str):
+        invoice = simulator.invoices.get(invoice_id)
+        if invoice is None:
+            return JSONResponse({"error": "invoice not found"}, status_code=404)
+        return simulator.invoice_view(invoice)
+
+    @app.get("/strike/v1/accounts/{account_id}/balance")
+    async def strike_balance(account_id: str):
+        return {"btc_balance": 1.5, "usd_balance": 10_000.0}
+
+    @app.get("/strike/v1/accounts/{account_id}/transactions")
+    async def strike_transactions(account_id: str, limit: int = 50):
+        paid = [simulator.invoice_view(i) for i in list(simulator.invoices.values())][-limit:]
+        return {"transactions": [{
+            "transaction_id": invoice["invoice_id"],
+            "type": "invoice",
+            "amount": invoice["amount"],
+            "currency": "BTC",
+            "status": invoice["status"],
+            "timestamp": invoice["created_at"],
+            "description": invoice["description"]
+        } for invoice in paid]}
+
+    @app.get("/strike/v1/network/status")
+    async def strike_network_status():
+        return {"status": "online", "node_count": 15000, "channel_count": 60000, "capacity": 5000}
+
+    @app.get("/strike/v1/network/fee-estimate")
+    async def strike_fee_estimate(amount: int = 0):
+        return {"fee_sats": max(1, amount // 1000), "fee_usd": 0.01}
+
+    # Infobip (SMS)
+    @app.post("/infobip/sms/2/text/advanced")
+    async def infobip_send_sms(request: Request):
+        body = await request.json()
+        messages = []
+        for message in body.get("messages", []):
+            for destination in message.get("destinations", []):
+                message_id = str(uuid.uuid4())
+                simulator.sms_messages.append(
+                    {"to": destination.get("to"), "text": message.get("text")}
+                )
+                messages.append({
+                    "to": destination.get("to"),
+                    "messageId": message_id,
+                    "status": {
+                        "groupId": 1, "groupName": "PENDING", "id": 26,
+                        "name": "PENDING_ACCEPTED", "description": "Message sent to next instance"
+                    }
+                })
+        return {"bulkId": str(uuid.uuid4()), "messages": messages}
+
+    # WhatsApp Business
+    @app.post("/whatsapp/{version}/{phone_number_id}/messages")
+    async def whatsapp_send(version: str, phone_number_id: str):
+        return {"messaging_product": "whatsapp", "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]}
+
+    # Coletor de webhooks
+    @app.post("/webhooks/{path:path}")
+    async def webhook_sink(path: str, request: Request):
+        body = await request.body()
+        with simulator.lock:
+            simulator.webhooks.append({"path": path, "size": len(body), "received_at": time.time()})
+            # Manter apenas os últimos 1000 webhooks
+            del simulator.webhooks[:-1000]
+        return {"received": True}
+
+    # Controle do simulador
+    @app.get("/_sim/stats")
+    async def sim_stats():
+        return simulator.get_stats()
+
+    @app.post("/_sim/reset")
+    async def sim_reset():
+        simulator.reset_stats()
+        return {"success": True}
+
+    @app.get("/_sim/profiles")
+    async def sim_profiles():
+        return simulator.profiles
+
+    @app.put("/_sim/profiles/{provider}")
+    async def sim_update_profile(provider: str, request: Request):
+        if provider not in simulator.profiles:
+            return JSONResponse({"error": f"provedor desconhecido: {provider}"}, status_code=404)
+        simulator.set_profile(
+            provider, simulator._merge(simulator.profiles[provider], await request.json())
+        )
+        return simulator.profiles[provider]
+
+    return app
+
+
+def parse_arguments():
+    """
+    Processa argumentos da linha de comando
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulador local de provedores externos do LiquidGold ATM"
+    )
+    parser.add_argument(
+        "--host", type=str, default=DEFAULT_HOST, help=f"Endereço IP (padrão: {DEFAULT_HOST})"
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT})"
+    )
+    parser.add_argument("--profile", type=str, help="Arquivo JSON com perfis por provedor")
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Semente aleatória para execuções reproduzíveis"
+    )
+    parser.add_argument("--latency-ms", type=float, help="Latência média padrão (ms)")
+    parser.add_argument("--latency-distribution", type=str,
+                        choices=["fixed", "uniform", "normal", "lognormal", "exponential"],
+                        help="Distribuição de latência padrão")
+    parser.add_argument("--error-rate", type=float, help="Fração padrão de respostas com erro")
+    parser.add_argument(
+        "--max-rps", type=float, help="Limite padrão de requisições por segundo por provedor"
+    )
+    return parser.parse_args()
+
+
+def build_profile(args) -> Dict[str, Any]:
+    profile: Dict[str, Any] = {}
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+
+    default = profile.setdefault("default", {})
+    latency = default.setdefault("latency", {})
+    if args.latency_ms is not None:
+        latency["ms"] = args.latency_ms
+    if args.latency_distribution:
+        latency["distribution"] = args.latency_distribution
+    if args.error_rate is not None:
+        default["error_rate"] = args.error_rate
+    if args.max_rps is not None:
+        default["max_rps"] = args.max_rps
+    return profile
+
+
+def main():
+    args = parse_arguments()
+    simulator = ProviderSimulator(build_profile(args), seed=args.seed)
+    print(f"🧪 Simulador de provedores em http://{args.host}:{args.port}")
+    print(f"📊 Estatísticas: http://{args.host}:{args.port}/_sim/stats")
+    print(f"🔧 Backend: PROVIDER_SIMULATOR_URL=http://{args.host}:{args.port}")
+    uvicorn.run(create_app(simulator), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Configuração comum dos testes - LiquidGold ATM
+Os módulos do app criam config/, logs/ e o banco SQLite no diretório atual ao
+serem importados: os testes rodam em um diretório temporário
+"""
+
+import os
+import tempfile
+
+import fakeredis
+import pytest
+
+
+def pytest_configure(config):
+    # Depois de o pytest resolver testpaths e antes de importar os módulos de teste
+    workdir = tempfile.mkdtemp(prefix="liquidgold-tests-")
+    os.chdir(workdir)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/liquidgold_atm.db")
+    # Porta sem servidor: testes que precisam de Redis usam o fixture fake_redis
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    CacheManager ligado a um Redis em memória (com suporte a scripts Lua)
+    """
+    from app.core.cache_manager import cache_manager
+
+    server = fakeredis.FakeRedis()
+    monkeypatch.setattr(cache_manager, "redis", server)
+    monkeypatch.setattr(cache_manager, "redis_retry_at", 0.0)
+    cache_manager.memory_cache.entries.clear()
+    yield server
+    cache_manager.memory_cache.entries.clear()
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """
+    CacheManager sem Redis (apenas o L1 do processo)
+    """
+    from app.core.cache_manager import cache_manager
+
+    monkeypatch.setattr(cache_manager, "redis", None)
+    cache_manager.memory_cache.entries.clear()
+    yield
+    cache_manager.memory_cache.entries.clear()
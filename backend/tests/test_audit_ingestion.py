@@ -0,0 +1,110 @@
+import json
+import os
+import queue
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.core.audit import AuditLog, AuditManager
+
+
+def _count(manager, action):
+    engine = manager.db_session_factory.kw['bind']
+    with engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(AuditLog).where(AuditLog.action == action)
+        ).scalar()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """
+    AuditManager sem a thread de gravação, com spill em um diretório temporário
+    """
+    monkeypatch.setattr(AuditManager, "_start_processing_thread", lambda self: None)
+    manager = AuditManager()
+    manager.spill_dir = str(tmp_path / "spill")
+    return manager
+
+
+def test_events_are_written_in_batches_by_the_background_writer():
+    manager = AuditManager()
+    for i in range(50):
+        manager.log_event("TEST_BATCH_WRITE", "tests", resource_id=str(i))
+
+    assert manager.flush(timeout=10)
+
+    assert _count(manager, "TEST_BATCH_WRITE") == 50
+    stats = manager.get_ingestion_stats()
+    assert stats['written'] == 50
+    assert stats['batches'] < 50
+
+
+def test_full_queue_spills_to_disk_or_drops_by_policy(manager):
+    manager.event_queue = queue.Queue(maxsize=2)
+    for i in range(5):
+        manager.log_event("TEST_OVERFLOW", "tests", resource_id=str(i))
+
+    files = os.listdir(manager.spill_dir)
+    assert len(files) == 1 and files[0].startswith("audit_spill_") and files[0].endswith(".jsonl")
+    with open(os.path.join(manager.spill_dir, files[0]), encoding="utf-8") as f:
+        assert [json.loads(line)['resource_id'] for line in f] == ["2", "3", "4"]
+
+    manager.overflow_policy = 'drop'
+    manager.log_event("TEST_OVERFLOW", "tests")
+    stats = manager.get_ingestion_stats()
+    assert (stats['enqueued'], stats['spilled'], stats['dropped']) == (2, 3, 1)
+
+
+def test_failed_db_batches_spill_where_replay_finds_them(manager, tmp_path):
+    working_factory = manager.db_session_factory
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'audit.db'}")
+    manager.db_session_factory = SimpleNamespace(kw={'bind': broken})
+
+    manager._process_events([
+        {'action': "TEST_DB_DOWN", 'resource': "tests", 'details': {'n': i}} for i in range(3)
+    ])
+
+    assert manager.get_ingestion_stats()['db_errors'] == 1
+    assert os.listdir(manager.spill_dir)[0].startswith("audit_spill_")
+
+    manager.db_session_factory = working_factory
+    manager._replay_spill_files()
+    assert _count(manager, "TEST_DB_DOWN") == 3
+    assert os.listdir(manager.spill_dir) == []
+
+
+def test_replay_skips_bad_lines_and_files_claimed_by_live_workers(manager):
+    os.makedirs(manager.spill_dir)
+    good = json.dumps({'action': "TEST_REPLAY", 'resource': "tests",
+                       'timestamp': "2026-10-16T12:00:00"})
+    with open(os.path.join(manager.spill_dir, "audit_spill_20261016.jsonl"), "w") as f:
+        f.write(good + "\n{truncated\n\n" + good + "\n")
+    live = os.path.join(manager.spill_dir, "audit_spill_20261015.4242-abcd1234.claimed")
+    stale = os.path.join(manager.spill_dir, "audit_spill_20261014.4343-dcba4321.claimed")
+    for path in (live, stale):
+        with open(path, "w") as f:
+            f.write(good + "\n")
+    old = time.time() - 2 * 3600
+    os.utime(stale, (old, old))
+
+    manager._replay_spill_files()
+
+    # Arquivo do dia (2 linhas válidas) + reivindicação abandonada (1 linha)
+    assert _count(manager, "TEST_REPLAY") == 3
+    assert os.listdir(manager.spill_dir) == [os.path.basename(live)]
+
+
+def test_only_one_worker_wins_the_claim(manager):
+    os.makedirs(manager.spill_dir)
+    path = os.path.join(manager.spill_dir, "audit_spill_20261016.jsonl")
+    open(path, "w").close()
+
+    first = manager._claim_spill_file("audit_spill_20261016.jsonl", path)
+    second = manager._claim_spill_file("audit_spill_20261016.jsonl", path)
+
+    assert first is not None and first.endswith(".claimed")
+    assert second is None
+    assert manager._claim_spill_file("other.jsonl", path) is None
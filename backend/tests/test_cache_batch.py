@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from app.core.cache_manager import cache_manager
+from app.core.quote_refresher import QuoteRefresher
+
+
+@pytest.fixture
+def round_trips(fake_redis, monkeypatch):
+    """
+    Conta as idas ao Redis (execuções de pipeline)
+    """
+    count = []
+    pipeline = fake_redis.pipeline
+
+    def counting_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def counted_execute(*a, **k):
+            count.append(len(pipe))
+            return execute(*a, **k)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    monkeypatch.setattr(fake_redis, "pipeline", counting_pipeline)
+    return count
+
+
+def test_set_many_and_get_many_use_one_round_trip_each(round_trips):
+    mapping = {f"quotes:PAIR{i}": {"price": i} for i in range(20)}
+
+    assert cache_manager.set_many(mapping, category="quotes")
+    assert len(round_trips) == 1
+
+    cache_manager.memory_cache.entries.clear()
+    found = cache_manager.get_many(list(mapping) + ["quotes:MISSING"], category="quotes")
+
+    assert found == mapping
+    assert len(round_trips) == 2
+
+
+def test_get_many_only_asks_redis_for_l1_misses(round_trips):
+    cache_manager.set_many({"reports:a": 1, "reports:b": 2}, category="reports")
+    cache_manager.memory_cache.delete("reports:b")
+
+    assert cache_manager.get_many(["reports:a", "reports:b"]) == {"reports:a": 1, "reports:b": 2}
+    # GET + PTTL apenas para a chave ausente do L1
+    assert round_trips[-1] == 2
+
+
+def test_pipeline_context_batches_sets_and_deletes(round_trips, fake_redis):
+    cache_manager.set("session_status:OLD", {"status": "expired"})
+    before = len(round_trips)
+
+    with cache_manager.pipeline() as pipe:
+        pipe.set("quotes:BTC", 1, category="quotes").set("quotes:USDT", 2, category="quotes")
+        pipe.delete("session_status:OLD")
+
+    assert len(round_trips) == before + 1
+    assert fake_redis.exists("session_status:OLD") == 0
+    assert cache_manager.get("session_status:OLD") is None
+    assert cache_manager.get_many(["quotes:BTC", "quotes:USDT"]) == {
+        "quotes:BTC": 1, "quotes:USDT": 2
+    }
+    assert cache_manager.delete_many(["quotes:BTC", "quotes:USDT"]) == 2
+
+
+def test_quote_status_adopts_shared_snapshots_from_one_batch(round_trips):
+    refresher = QuoteRefresher()
+    for pair in ("TEST:ARS", "TEST:USD", "TEST:EUR"):
+        refresher.register(pair, lambda: {'price': 1.0})
+    # Outro worker aqueceu o cache compartilhado para dois dos pares
+    cache_manager.set_many({
+        refresher._cache_key("TEST:ARS"): {'price': 10.0, 'source': 'a', 'fetched_at': time.time()},
+        refresher._cache_key("TEST:USD"): {'price': 20.0, 'source': 'b', 'fetched_at': time.time()},
+    }, category="quotes")
+    cache_manager.memory_cache.entries.clear()
+    before = len(round_trips)
+
+    status = refresher.get_status()
+
+    assert len(round_trips) == before + 1
+    assert status["TEST:ARS"]['price'] == 10.0
+    assert status["TEST:USD"]['stale'] is False
+    assert status["TEST:EUR"]['price'] is None
+    assert refresher.get_snapshot("TEST:USD")['price'] == 20.0
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app.core.cache_codec import FLAG_ZLIB, HEADER_MARKER, CacheCodec, orjson
+
+VALUE = {"pair": "BTC:ARS", "price": 98765432.1, "samples": [1, 2, 3], "stale": False}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_round_trip_with_versioned_header(name):
+    codec = CacheCodec(codec=name)
+
+    data = codec.encode(VALUE)
+
+    assert data[0] == HEADER_MARKER
+    assert data[2] == codec.codec.id
+    assert codec.decode(data) == VALUE
+
+
+def test_large_values_are_compressed_and_small_ones_are_not():
+    codec = CacheCodec(codec="json", compression_threshold=256)
+    large = {"history": [VALUE] * 50}
+
+    small_data, large_data = codec.encode(VALUE), codec.encode(large)
+
+    assert not small_data[3] & FLAG_ZLIB
+    assert large_data[3] & FLAG_ZLIB
+    assert len(large_data) < len(json.dumps(large))
+    assert codec.decode(large_data) == large
+    assert codec.get_stats()['compressed'] == 1
+
+
+def test_decodes_legacy_json_and_values_from_another_codec():
+    writer, reader = CacheCodec(codec="json"), CacheCodec(codec="msgpack")
+
+    assert reader.decode(json.dumps(VALUE)) == VALUE
+    assert reader.decode(writer.encode(VALUE)) == VALUE
+    assert reader.get_stats()['legacy_decoded'] == 1
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson não instalado")
+def test_falls_back_to_json_for_values_the_codec_cannot_encode():
+    codec = CacheCodec(codec="orjson")
+    value = {"big": 2 ** 70}
+
+    data = codec.encode(value)
+
+    assert data[2] == codec.fallback.id
+    assert codec.decode(data) == value
+    assert codec.get_stats()['fallback_encoded'] == 1
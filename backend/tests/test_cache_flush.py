@@ -0,0 +1,45 @@
+import time
+
+from app.core.cache_manager import cache_manager
+
+
+def test_flush_category_removes_only_that_category(fake_redis, monkeypatch):
+    def no_keys_scan(*args, **kwargs):
+        raise AssertionError("flush_category não deve varrer o keyspace")
+
+    monkeypatch.setattr(fake_redis, "keys", no_keys_scan)
+    monkeypatch.setattr(fake_redis, "scan_iter", no_keys_scan)
+    monkeypatch.setattr(cache_manager, "flush_batch_size", 3)
+    cache_manager.set_many({f"reports:{i}": i for i in range(10)}, category="reports")
+    cache_manager.set("quotes:BTC", 1, category="quotes")
+
+    assert cache_manager.flush_category("reports") == 10
+
+    assert fake_redis.exists(*[f"reports:{i}" for i in range(10)]) == 0
+    assert fake_redis.get("quotes:BTC") is not None
+    assert cache_manager.get("reports:1") is None
+    assert fake_redis.exists("cache:index:reports") == 0
+
+
+def test_index_is_scored_by_expiry_and_pruned_on_write(fake_redis):
+    cache_manager.set("reports:old", 1, ttl=1, category="reports")
+    score = fake_redis.zscore("cache:index:reports", "reports:old")
+    assert time.time() < score <= time.time() + 1
+
+    # Chave vencida no Redis: a próxima escrita da categoria a retira do índice
+    fake_redis.zadd("cache:index:reports", {"reports:old": time.time() - 1})
+    fake_redis.delete("reports:old")
+    cache_manager.set("reports:new", 2, category="reports")
+
+    members = fake_redis.zrange("cache:index:reports", 0, -1)
+    assert members == [b"reports:new"]
+    assert fake_redis.ttl("cache:index:reports") >= cache_manager.ttl_config["reports"]
+
+
+def test_delete_removes_key_from_index(fake_redis):
+    cache_manager.set_many({"reports:a": 1, "reports:b": 2}, category="reports")
+
+    cache_manager.delete("reports:a")
+    cache_manager.delete_many(["reports:b"])
+
+    assert fake_redis.zcard("cache:index:reports") == 0
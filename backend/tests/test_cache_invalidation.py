@@ -0,0 +1,80 @@
+import time
+
+import fakeredis
+import pytest
+
+from app.core.cache_manager import CacheManager
+
+
+@pytest.fixture
+def workers():
+    """
+    Dois workers com L1 próprio e o mesmo Redis
+    """
+    server = fakeredis.FakeServer()
+    managers = []
+    for _ in range(2):
+        manager = CacheManager()
+        manager.redis = fakeredis.FakeRedis(server=server)
+        manager.redis_retry_at = 0.0
+        managers.append(manager)
+    yield managers
+    for manager in managers:
+        manager.stop_invalidation_listener()
+        manager.config.change_listeners.remove(manager._on_config_change)
+
+
+def _published(manager, action):
+    pubsub = manager.redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(manager.invalidation_channel)
+    action()
+    deadline = time.monotonic() + 1.0
+    message = None
+    while message is None and time.monotonic() < deadline:
+        message = pubsub.get_message(timeout=0.1)
+    pubsub.close()
+    return message['data']
+
+
+def test_writes_evict_the_key_from_other_workers_l1(workers):
+    writer, reader = workers
+    writer.set("session_status:ABC", {"status": "pending"})
+    assert reader.get("session_status:ABC") == {"status": "pending"}
+    assert "session_status:ABC" in reader.memory_cache.entries
+
+    data = _published(writer, lambda: writer.set("session_status:ABC", {"status": "paid"}))
+    reader._handle_invalidation(data)
+
+    assert "session_status:ABC" not in reader.memory_cache.entries
+    assert reader.get("session_status:ABC") == {"status": "paid"}
+
+
+def test_flush_invalidates_by_prefix_and_ignores_own_messages(workers):
+    writer, reader = workers
+    for key in ("reports:a", "reports:b", "config:x"):
+        writer.set(key, 1)
+        reader.get(key)
+
+    data = _published(writer, lambda: writer.flush_category("reports"))
+    writer._handle_invalidation(data)
+    reader._handle_invalidation(data)
+
+    assert set(reader.memory_cache.entries) == {"config:x"}
+    assert writer.telemetry.get_counters().get('invalidations_received', 0) == 0
+
+
+def test_listener_thread_applies_invalidations(workers):
+    writer, reader = workers
+    reader.start_invalidation_listener()
+    deadline = time.monotonic() + 2.0
+    while not reader.invalidation_active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert reader.invalidation_active
+
+    writer.set("config:fees", {"service": 5})
+    reader.get("config:fees")
+    writer.delete("config:fees")
+
+    while "config:fees" in reader.memory_cache.entries and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "config:fees" not in reader.memory_cache.entries
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from app.core.cache_manager import cache_manager
+from app.core.cache_telemetry import CacheTelemetry, LatencyHistogram
+
+
+def test_concurrent_updates_are_not_lost():
+    telemetry = CacheTelemetry()
+    threads_count, per_thread = 8, 2000
+
+    def worker():
+        for i in range(per_thread):
+            telemetry.record_get('quotes', 'l1' if i % 2 else None, 0.00001)
+            telemetry.increment('invalidations_sent')
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = threads_count * per_thread
+    counters = telemetry.get_counters()
+    assert counters['hits'] + counters['misses'] == total
+    assert counters['invalidations_sent'] == total
+    quotes = telemetry.get_categories()['quotes']
+    assert quotes['hit_ratio'] == 0.5
+    assert quotes['get_latency']['count'] == total
+
+
+def test_histogram_percentiles_stay_within_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(99):
+        histogram.record(40.0)   # bucket (20, 50]
+    histogram.record(3_000.0)    # bucket (2000, 5000]
+
+    stats = histogram.to_dict()
+
+    assert 20 <= stats['p50_us'] <= 50
+    assert 20 <= stats['p99_us'] <= 50
+    assert histogram.percentile(1.0) == pytest.approx(3_000.0)
+    assert stats['max_us'] == 3_000.0
+    assert LatencyHistogram().to_dict()['p50_us'] is None
+
+
+def test_cache_manager_reports_hits_by_backend_per_category(fake_redis):
+    cache_manager.telemetry.reset()
+    cache_manager.set('reports:a', 1, category='reports')
+    cache_manager.get('reports:a')                 # L1
+    cache_manager.memory_cache.delete('reports:a')
+    cache_manager.get('reports:a')                 # Redis
+    cache_manager.get('reports:missing')           # miss
+
+    reports = cache_manager.get_category_stats()['categories']['reports']
+
+    assert reports['hits_by_backend'] == {'l1': 1, 'redis': 1, 'fallback': 0}
+    assert reports['misses'] == 1
+    assert reports['sets'] == 1
+    assert reports['ttl_seconds'] == cache_manager.ttl_config['reports']
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from app.core.cross_rates import CrossRateEngine
+
+
+def test_derives_missing_pair_through_intermediate_currency():
+    engine = CrossRateEngine()
+    now = time.time()
+    engine.observe("BTC", "USDT", 100_000.0, observed_at=now - 5)
+    engine.observe("USDT", "ARS", 1_200.0, observed_at=now - 2)
+
+    derived = engine.derive("BTC", "ARS")
+
+    assert derived['price'] == pytest.approx(120_000_000.0)
+    assert derived['path'] == ["BTC/USDT", "USDT/ARS"]
+    assert derived['derived'] is True
+    # A idade do caminho é a da perna mais antiga
+    assert derived['observed_at'] == pytest.approx(now - 5)
+    assert engine.derive("ARS", "BTC")['price'] == pytest.approx(1 / 120_000_000.0)
+
+
+def test_prefers_freshest_path_and_honors_max_age():
+    engine = CrossRateEngine()
+    now = time.time()
+    engine.observe("BTC", "ARS", 110_000_000.0, observed_at=now - 120)
+    engine.observe("BTC", "USDT", 100_000.0, observed_at=now - 1)
+    engine.observe("USDT", "ARS", 1_200.0, observed_at=now - 1)
+
+    assert engine.derive("BTC", "ARS")['path'] == ["BTC/USDT", "USDT/ARS"]
+
+    engine.observe("USDT", "ARS", 1_200.0, observed_at=now - 300)
+    direct = engine.derive("BTC", "ARS")
+    assert direct['path'] == ["BTC/ARS"]
+    assert direct['derived'] is False
+    assert engine.derive("BTC", "ARS", max_age=60) is None
+
+
+@pytest.mark.parametrize("max_legs, expected", [(2, None), (3, 120_000_000.0)])
+def test_limits_path_length_to_max_legs(max_legs, expected):
+    engine = CrossRateEngine(max_legs=max_legs)
+    engine.observe("BTC", "USDT", 100_000.0)
+    engine.observe("USDT", "USD", 1.0)
+    engine.observe("USD", "ARS", 1_200.0)
+
+    derived = engine.derive("BTC", "ARS")
+
+    if expected is None:
+        assert derived is None
+    else:
+        assert derived['price'] == pytest.approx(expected)
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import HttpClientManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = HttpClientManager()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    options = manager._client_options
+
+    def mocked_options():
+        return {**options(), 'transport': transport, 'http2': False}
+
+    monkeypatch.setattr(manager, '_client_options', mocked_options)
+    yield manager
+    manager.close()
+
+
+def test_sync_requests_share_one_client_and_record_host_metrics(manager):
+    client = manager.get_client()
+
+    for _ in range(3):
+        assert manager.get("https://api.bitso.com/v3/ticker/").json() == {"ok": True}
+    manager.post("https://api.strike.me/v1/invoices", json={})
+
+    assert manager.get_client() is client
+    hosts = manager.get_stats()['hosts']
+    assert hosts['api.bitso.com']['requests'] == 3
+    assert hosts['api.bitso.com']['status_codes'] == {200: 3}
+    assert hosts['api.strike.me']['requests'] == 1
+
+
+def test_async_client_from_a_finished_loop_is_replaced_and_closed(manager):
+    async def current_client():
+        return manager.get_async_client()
+
+    first = asyncio.run(current_client())
+
+    async def next_loop():
+        client = manager.get_async_client()
+        # O fechamento do cliente antigo roda como tarefa no loop atual
+        await asyncio.gather(*manager.closing_tasks)
+        return client
+
+    second = asyncio.run(next_loop())
+
+    assert second is not first
+    assert first.is_closed
+    assert not second.is_closed
+    assert not manager.closing_tasks
+    asyncio.run(manager.aclose())
+    assert second.is_closed
+
+
+def test_pool_stats_degrade_when_httpx_internals_are_missing():
+    manager = HttpClientManager()
+
+    assert manager._pool_stats(None)['connections'] == 0
+    assert manager._pool_stats(object()) == {'available': False}
+    # Cliente real sem conexões abertas
+    assert manager.get_stats()['sync_pool']['connections'] == 0
+    assert manager._pool_stats(manager.get_client())['connections'] == 0
+    manager.close()
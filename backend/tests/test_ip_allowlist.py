@@ -0,0 +1,60 @@
+import ipaddress
+import random
+
+import pytest
+
+from app.core.ip_allowlist import IPAllowList
+
+ENTRIES = ["127.0.0.1", "192.168.0.0/16", "10.1.2.0/24", "10.1.3.0/24", "::1", "2001:db8::/32"]
+
+
+@pytest.mark.parametrize("ip, expected", [
+    ("127.0.0.1", True),
+    ("127.0.0.2", False),
+    ("192.168.255.255", True),
+    ("192.169.0.0", False),
+    ("10.1.3.200", True),
+    ("::1", True),
+    ("2001:db8:ffff::1", True),
+    ("2001:db9::1", False),
+    ("::ffff:192.168.1.10", True),   # IPv4 mapeado em IPv6
+    ("fe80::1%eth0", False),
+    ("not-an-ip", False),
+    ("", False),
+])
+def test_membership_for_ipv4_ipv6_and_invalid_input(ip, expected):
+    assert IPAllowList(ENTRIES).contains(ip) is expected
+
+
+def test_matches_ipaddress_for_random_addresses():
+    allow_list = IPAllowList(ENTRIES)
+    networks = [ipaddress.ip_network(entry) for entry in ENTRIES if ":" not in entry]
+    rng = random.Random(7)
+
+    for _ in range(2000):
+        ip = ipaddress.IPv4Address(rng.choice([
+            rng.getrandbits(32),
+            int(ipaddress.IPv4Address("10.1.0.0")) + rng.getrandbits(16),
+            int(ipaddress.IPv4Address("192.168.0.0")) + rng.getrandbits(17),
+        ]) & 0xFFFFFFFF)
+        assert allow_list.contains(str(ip)) is any(ip in network for network in networks)
+
+
+def test_adjacent_ranges_are_merged_and_invalid_entries_skipped():
+    allow_list = IPAllowList(ENTRIES + ["999.1.1.1", "10.1.2.128/25"])
+
+    # 10.1.2.0/24 e 10.1.3.0/24 são contíguos; /25 está contido
+    assert allow_list.get_stats()['ipv4_ranges'] == 3
+    assert allow_list.get_stats()['ipv6_ranges'] == 2
+
+
+def test_recompile_clears_cached_verdicts_and_cache_is_bounded():
+    allow_list = IPAllowList(ENTRIES, cache_size=2)
+    assert allow_list.contains("10.9.9.9") is False
+
+    allow_list.compile(ENTRIES + ["10.0.0.0/8"])
+
+    assert allow_list.contains("10.9.9.9") is True
+    for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+        allow_list.contains(ip)
+    assert allow_list.get_stats()['cached_verdicts'] == 2
@@ -0,0 +1,64 @@
+import time
+
+from app.core.cache_manager import _MISSING, LocalCache, cache_manager
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is _MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_local_cache_expires_entries_by_ttl():
+    cache = LocalCache()
+    cache.set("short", "x", ttl=0.02)
+    cache.set("long", "y", ttl=60)
+    cache.set("none", "z", ttl=0)
+
+    time.sleep(0.03)
+
+    assert cache.get("short") is _MISSING
+    assert cache.get("long") == "y"
+    assert cache.get("none") is _MISSING
+    assert cache.expirations == 1
+
+
+def test_l1_serves_hits_without_redis_round_trip(fake_redis):
+    cache_manager.set("reports:daily", {"total": 3}, category="reports")
+    # Remover só do Redis: o L1 ainda responde dentro do seu TTL curto
+    fake_redis.delete("reports:daily")
+
+    assert cache_manager.get("reports:daily", category="reports") == {"total": 3}
+    assert cache_manager.memory_cache.entries["reports:daily"][0] - time.monotonic() <= 30
+
+
+def test_l1_ttl_never_outlives_the_redis_key(fake_redis):
+    fake_redis.set("reports:weekly", cache_manager.codec.encode([1, 2]), px=1500)
+
+    assert cache_manager.get("reports:weekly", category="reports") == [1, 2]
+    assert cache_manager.memory_cache.entries["reports:weekly"][0] - time.monotonic() <= 1.5
+
+
+def test_redis_failure_falls_back_to_l1(fake_redis, monkeypatch):
+    cache_manager.set("config:atm", {"fee": 5}, category="config")
+
+    def broken_pipeline(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(fake_redis, "pipeline", broken_pipeline)
+    cache_manager.memory_cache.delete("config:atm")
+    assert cache_manager.get("config:atm", "missing", category="config") == "missing"
+    assert not cache_manager.redis_available()
+
+    # Sem Redis o L1 guarda o TTL integral da categoria
+    cache_manager.set("config:atm", {"fee": 6}, category="config")
+    ttl = cache_manager.memory_cache.entries["config:atm"][0] - time.monotonic()
+    assert ttl > cache_manager.l1_ttl_config["config"]
+    assert cache_manager.get("config:atm", category="config") == {"fee": 6}
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from app.core import memoize as memoize_module
+from app.core.cache_manager import cache_manager
+from app.core.memoize import memoize, not_error
+
+
+def test_concurrent_misses_compute_once(fake_redis):
+    calls = []
+
+    @memoize(category='reports', ttl=60)
+    def report(day):
+        calls.append(day)
+        time.sleep(0.2)
+        return {'day': day, 'total': 10}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(report('2026-10-16')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['2026-10-16']
+    assert results == [{'day': '2026-10-16', 'total': 10}] * 8
+
+
+def test_expiring_value_is_served_stale_while_another_caller_recomputes(fake_redis):
+    calls = []
+
+    @memoize(category='reports', ttl=60)
+    def report():
+        calls.append(1)
+        return len(calls)
+
+    assert report() == 1
+    key = report.cache_key()
+    entry = cache_manager.get(key)
+    cache_manager.set(key, {**entry, 'expires_at': time.time() - 1}, category='reports')
+
+    token = cache_manager.acquire_lock(key)
+    assert report() == 1  # Lock com outro chamador: valor anterior
+    cache_manager.release_lock(key, token)
+
+    assert report() == 2
+    assert report() == 2
+    stats = memoize_module.get_memoize_stats()[report.__module__ + '.' + report.__qualname__]
+    assert stats['stale_served'] == 1
+
+
+def test_xfetch_refreshes_early_when_recompute_is_slow(fake_redis, monkeypatch):
+    calls = []
+
+    @memoize(category='reports', ttl=60)
+    def report():
+        calls.append(1)
+        return len(calls)
+
+    report()
+    key = report.cache_key()
+    monkeypatch.setattr(memoize_module.random, 'random', lambda: 0.5)
+    # 10s para vencer: delta de 1s ainda é fresco, delta de 60s recalcula antes
+    cache_manager.set(key, {'value': 1, 'delta': 1.0, 'expires_at': time.time() + 10})
+    assert report() == 1
+    cache_manager.set(key, {'value': 1, 'delta': 60.0, 'expires_at': time.time() + 10})
+    assert report() == 2
+
+
+def test_error_results_are_not_cached_and_async_functions_are_supported(fake_redis):
+    calls = []
+
+    @memoize(category='reports', ttl=60, cache_if=not_error)
+    async def report(fail):
+        calls.append(fail)
+        return {'error': 'db down'} if fail else {'total': 1}
+
+    async def scenario():
+        await report(True)
+        await report(True)
+        await report(False)
+        await report(False)
+
+    asyncio.run(scenario())
+
+    assert calls == [True, True, False]
+    assert report.invalidate(False) is True
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from app.core.price_aggregator import PriceAggregator
+
+
+def _source(price, delay=0.0, release=None):
+    def fetch(timeout):
+        if release is not None:
+            # Fonte travada: ignora o timeout recebido até ser liberada
+            release.wait(5.0)
+        else:
+            time.sleep(delay)
+        return price
+    return fetch
+
+
+def test_sources_run_concurrently_under_one_deadline():
+    aggregator = PriceAggregator()
+    release = threading.Event()
+    start = time.monotonic()
+    result = aggregator.fetch(
+        [("slow", _source(1000.0, release=release)), ("fast", _source(1010.0, delay=0.05))],
+        deadline=3.0,
+        window=0.05
+    )
+    elapsed = time.monotonic() - start
+    release.set()
+
+    # O mais rápido responde sem esperar o lento, que é descartado ao fim da janela
+    assert result['source'] == "fast"
+    assert result['price'] == 1010.0
+    assert elapsed < 0.9
+
+
+def test_hung_sources_do_not_exceed_the_deadline():
+    aggregator = PriceAggregator()
+    release = threading.Event()
+    start = time.monotonic()
+    result = aggregator.fetch(
+        [(f"hung{i}", _source(1000.0, release=release)) for i in range(3)],
+        deadline=0.2
+    )
+    elapsed = time.monotonic() - start
+    release.set()
+
+    assert result is None
+    assert elapsed < 0.9
+
+
+def test_answers_inside_the_hedge_window_are_combined_by_median():
+    aggregator = PriceAggregator()
+    result = aggregator.fetch(
+        [("a", _source(100.0)), ("b", _source(300.0)), ("c", _source(200.0))],
+        deadline=1.0,
+        window=0.5
+    )
+    assert result['price'] == 200.0
+    assert result['source'] == "median:a,b,c"
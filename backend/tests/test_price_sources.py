@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from app.core.price_sources import CircuitBreaker, PriceSource, PriceSourceRegistry
+
+
+class FakeSource(PriceSource):
+    pair = "TEST:ARS"
+
+    def __init__(self, name, price=100.0, priority=100, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.price = price
+        self.priority = priority
+        self.calls = 0
+
+    def fetch_price(self, timeout):
+        self.calls += 1
+        if isinstance(self.price, Exception):
+            raise self.price
+        return self.price
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial():
+    source = FakeSource("flaky", price=RuntimeError("down"), reset_timeout=0.05)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            source.fetch(1.0)
+    assert source.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(Exception, match="Circuito aberto"):
+        source.fetch(1.0)
+    assert source.calls == 3
+
+    time.sleep(0.06)
+    source.price = 123.0
+    assert source.breaker.allow() is True
+    assert source.breaker.state == CircuitBreaker.HALF_OPEN
+    # Apenas uma requisição de teste por vez no estado semiaberto
+    assert source.breaker.allow() is False
+    source.breaker.trial_in_progress = False
+
+    assert source.fetch(1.0) == 123.0
+    assert source.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_registry_orders_by_health_and_skips_open_circuits():
+    registry = PriceSourceRegistry()
+    healthy = FakeSource("healthy", priority=50)
+    preferred = FakeSource("preferred", priority=10)
+    erratic = FakeSource("erratic", priority=1)
+    dead = FakeSource("dead", price=RuntimeError("down"))
+    for source in (healthy, preferred, erratic, dead):
+        registry.register(source)
+
+    for _ in range(4):
+        healthy.fetch(1.0)
+        preferred.fetch(1.0)
+    erratic.price = RuntimeError("blip")
+    with pytest.raises(RuntimeError):
+        erratic.fetch(1.0)
+    erratic.price = 100.0
+    erratic.fetch(1.0)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            dead.fetch(1.0)
+
+    names = [source.name for source in registry.sources_for("TEST:ARS")]
+    assert names[-1] == "erratic"
+    assert "dead" not in names
+    assert set(names[:2]) == {"healthy", "preferred"}
+    everything = registry.sources_for("TEST:ARS", include_unavailable=True)
+    assert everything[-1] is dead
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from provider_simulator import ProviderSimulator, TokenBucket, create_app
+
+from app.core.config import atm_config
+
+FAST = {"default": {"latency": {"ms": 0.0}}}
+
+
+def test_serves_provider_ticker_formats():
+    client = TestClient(create_app(ProviderSimulator(FAST, seed=1)))
+
+    bitso = client.get("/bitso/v3/ticker/", params={"book": "btc_ars"}).json()
+    binance = client.get("/binance/api/v3/ticker/price", params={"symbol": "BTCUSDT"}).json()
+
+    assert float(bitso["payload"]["last"]) > 0
+    assert float(binance["price"]) > 0
+    assert client.get("/binance/api/v3/ticker/price", params={"symbol": "X"}).status_code == 400
+
+
+def test_profiles_inject_errors_and_throttling_per_provider():
+    simulator = ProviderSimulator({
+        **FAST,
+        "providers": {
+            "ripio": {"error_rate": 1.0, "error_status": 502},
+            "lemon": {"max_rps": 2},
+        },
+    }, seed=1)
+    client = TestClient(create_app(simulator))
+
+    assert client.get("/ripio/public/v1/market/").status_code == 502
+    assert client.get("/buenbit/api/v1/market/ticker").status_code == 200
+    statuses = [client.get("/lemon/v1/market/ticker").status_code for _ in range(4)]
+    assert statuses[:2] == [200, 200]
+    assert 429 in statuses[2:]
+
+    stats = simulator.get_stats()["providers"]
+    assert stats["ripio"]["errors"] == 1
+    assert stats["lemon"]["throttled"] >= 1
+
+
+def test_latency_sampling_is_reproducible_and_clamped():
+    profile = {"default": {"latency": {
+        "distribution": "normal", "ms": 50.0, "stddev_ms": 500.0, "min_ms": 10.0, "max_ms": 80.0
+    }}}
+    simulators = ProviderSimulator(profile, seed=7), ProviderSimulator(profile, seed=7)
+    samples = [[s.sample_latency("bitso") for _ in range(50)] for s in simulators]
+
+    assert samples[0] == samples[1]
+    assert all(0.010 <= value <= 0.080 for value in samples[0])
+    assert TokenBucket(0).consume() is True
+
+
+def test_backend_urls_point_at_simulator_when_enabled(monkeypatch):
+    monkeypatch.setenv("PROVIDER_SIMULATOR_URL", "http://127.0.0.1:8900/")
+    monkeypatch.setattr(atm_config, "is_simulator_enabled", lambda: True)
+
+    url = atm_config.resolve_provider_url("bitso", "https://api.bitso.com/v3/ticker/?book=btc_ars")
+
+    assert url == "http://127.0.0.1:8900/bitso/v3/ticker/?book=btc_ars"
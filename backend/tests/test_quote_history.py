@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.quote_history import QuoteHistoryFile, QuoteRingBuffer
+
+
+def test_ring_buffer_twap_weights_each_sample_until_the_next():
+    buffer = QuoteRingBuffer(capacity=8)
+    for timestamp, price in [(0.0, 100.0), (10.0, 200.0), (15.0, 300.0)]:
+        assert buffer.append(timestamp, price)
+    assert buffer.append(12.0, 999.0) is False
+
+    # 100 x 10s + 200 x 5s + 300 x 5s
+    assert buffer.twap(0.0, 20.0) == pytest.approx(3500.0 / 20.0)
+    # A amostra anterior ao início continua valendo dentro da janela
+    assert buffer.twap(5.0, 10.0) == pytest.approx(100.0)
+    assert buffer.min_max(10.0, 15.0) == (200.0, 300.0)
+
+
+def test_ring_buffer_overwrites_oldest_samples_at_capacity():
+    buffer = QuoteRingBuffer(capacity=3)
+    for second in range(5):
+        buffer.append(float(second), float(second * 10))
+
+    records, mark = buffer.since(0)
+
+    assert records == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0)]
+    assert mark == 5
+    assert buffer.since(mark) == ([], 5)
+
+
+def test_history_file_shared_by_workers_never_overwrites_records(tmp_path):
+    path = tmp_path / "BTC_ARS.bin"
+    worker_a = QuoteHistoryFile(path)
+    worker_b = QuoteHistoryFile(path)
+
+    assert worker_a.append_many([(1.0, 10.0), (2.0, 20.0)]) == 2
+    # O segundo worker grava as mesmas cotações e mais uma nova: só a nova entra
+    assert worker_b.append_many([(2.0, 20.0), (3.0, 30.0)]) == 1
+    assert worker_a.append_many([(4.0, 40.0)]) == 1
+
+    expected = [(1.0, 10.0), (2.0, 20.0), (3.0, 30.0), (4.0, 40.0)]
+    assert worker_b.read_tail(10) == expected
+    worker_a.close()
+    worker_b.close()
+
+    reopened = QuoteHistoryFile(path)
+    assert reopened.read_tail(2) == expected[2:]
+    reopened.close()
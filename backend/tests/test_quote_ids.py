@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.crypto_manager import LOCKED_QUOTE_FIELDS, CryptoManager
+
+
+@pytest.fixture
+def locked_quote():
+    manager = CryptoManager()
+    quote = {
+        'crypto': 'BTC', 'network': 'lightning', 'crypto_ars_price': 98_000_000.0,
+        'amount_ars': 50_000.0, 'valor_liquido_ars': 47_500.0, 'crypto_amount': 0.00048469,
+        'service_fee_percent': 5.0, 'service_fee_ars': 2_500.0, 'transaction_type': 'VENDA',
+    }
+    return manager, quote, manager.issue_quote_id(quote)['quote_id']
+
+
+def test_quote_id_locks_fields_and_redeems_once(fake_redis, locked_quote):
+    manager, quote, quote_id = locked_quote
+
+    redeemed = manager.redeem_quote_id(quote_id, 'BTC', 50_000.0, 'VENDA')
+
+    assert redeemed == {field: quote[field] for field in LOCKED_QUOTE_FIELDS}
+    with pytest.raises(Exception, match="já utilizada"):
+        manager.redeem_quote_id(quote_id, 'BTC', 50_000.0, 'VENDA')
+
+
+def test_quote_id_rejects_mismatched_transaction(fake_redis, locked_quote):
+    manager, _, quote_id = locked_quote
+
+    with pytest.raises(Exception, match="não corresponde"):
+        manager.redeem_quote_id(quote_id, 'BTC', 60_000.0, 'VENDA')
+    with pytest.raises(Exception, match="inválida"):
+        manager.redeem_quote_id(quote_id + "x", 'BTC', 50_000.0, 'VENDA')
+
+
+def test_quote_id_fails_closed_without_redis(no_redis, locked_quote):
+    manager, _, quote_id = locked_quote
+
+    with pytest.raises(Exception, match="Não foi possível validar"):
+        manager.redeem_quote_id(quote_id, 'BTC', 50_000.0, 'VENDA')
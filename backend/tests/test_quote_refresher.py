@@ -0,0 +1,65 @@
+import threading
+import time
+
+from app.core.quote_refresher import QuoteRefresher
+
+PAIR = "TEST:ARS"  # Sem entrada em quotes.pairs: limites padrão (45s / 300s)
+
+
+def _refresher(fetcher):
+    refresher = QuoteRefresher()
+    refresher.register(PAIR, fetcher)
+    return refresher
+
+
+def _age(refresher, seconds):
+    with refresher.lock:
+        refresher.snapshots[PAIR]['fetched_at'] = time.time() - seconds
+
+
+def test_stale_quote_is_served_immediately_and_refreshed_in_background(no_redis):
+    calls = []
+    release = threading.Event()
+
+    def fetcher():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(2)
+        return {'price': 1000.0 + len(calls), 'source': 'test'}
+
+    refresher = _refresher(fetcher)
+    refresher.refresh(PAIR)
+    _age(refresher, 60)
+
+    start = time.monotonic()
+    snapshot = refresher.get(PAIR)
+    # Um segundo leitor não agenda outra atualização enquanto a primeira corre
+    refresher.get(PAIR)
+    elapsed = time.monotonic() - start
+
+    assert snapshot['price'] == 1001.0
+    assert snapshot['stale'] is True
+    assert elapsed < 0.5
+    release.set()
+    for _ in range(100):
+        if refresher.get_snapshot(PAIR)['price'] == 1002.0:
+            break
+        time.sleep(0.01)
+    assert refresher.get_snapshot(PAIR)['price'] == 1002.0
+    assert len(calls) == 2
+
+
+def test_expired_quote_blocks_for_a_fresh_upstream_value(no_redis):
+    calls = []
+
+    def fetcher():
+        calls.append(1)
+        return {'price': 1000.0 + len(calls), 'source': 'test'}
+
+    refresher = _refresher(fetcher)
+    refresher.refresh(PAIR)
+    _age(refresher, 301)
+
+    snapshot = refresher.get(PAIR)
+    assert snapshot['price'] == 1002.0
+    assert snapshot['stale'] is False
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import threading
+
+from app.core.quote_stream import QuoteBroadcaster
+
+
+async def _drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(json.loads(queue.get_nowait()))
+    return messages
+
+
+def test_publishes_changed_prices_once_to_every_subscriber():
+    async def scenario():
+        broadcaster = QuoteBroadcaster()
+        broadcaster.attach_loop(asyncio.get_running_loop())
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+        # O atualizador chama on_quote na sua própria thread
+        def updater():
+            for price in (100.0, 100.0, 101.0):
+                broadcaster.on_quote("BTC:ARS", {'price': price, 'source': 'test'})
+
+        thread = threading.Thread(target=updater)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.01)
+
+        return broadcaster, await _drain(first), await _drain(second)
+
+    broadcaster, first, second = asyncio.run(scenario())
+
+    assert [m['price'] for m in first] == [100.0, 101.0]
+    assert first == second
+    assert [m['sequence'] for m in first] == [1, 2]
+    stats = broadcaster.get_stats()
+    assert (stats['updates'], stats['published'], stats['unchanged']) == (3, 2, 1)
+    assert json.loads(broadcaster.snapshot_message())['quotes']['BTC:ARS']['price'] == 101.0
+
+
+def test_slow_subscriber_drops_oldest_messages():
+    async def scenario():
+        broadcaster = QuoteBroadcaster()
+        broadcaster.queue_size = 2
+        broadcaster.attach_loop(asyncio.get_running_loop())
+        queue = broadcaster.subscribe()
+        for price in (1.0, 2.0, 3.0, 4.0):
+            broadcaster.on_quote("USDT:ARS", {'price': price})
+        await asyncio.sleep(0.01)
+        return broadcaster, await _drain(queue)
+
+    broadcaster, messages = asyncio.run(scenario())
+
+    assert [m['price'] for m in messages] == [3.0, 4.0]
+    assert broadcaster.get_stats()['dropped'] == 2
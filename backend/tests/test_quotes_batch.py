@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.crypto_manager import CryptoManager
+
+PRICES = {'BTC': 98_765_432.1, 'USDT': 1_234.5}
+FIELDS = ('crypto_amount', 'service_fee_percent', 'service_fee_ars', 'valor_liquido_ars',
+          'crypto_ars_price', 'network')
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = CryptoManager()
+    calls = []
+
+    def price(crypto, use_twap=None):
+        calls.append(crypto)
+        return {'price': PRICES[crypto], 'source': 'test', 'age_seconds': 1.0}
+
+    monkeypatch.setattr(manager, 'get_crypto_ars_price', price)
+    manager.price_calls = calls
+    return manager
+
+
+def _amounts(manager, crypto):
+    network = manager.networks[crypto]
+    low, high = network['min_amount'], network['max_amount']
+    return [low, low + (high - low) / 3, high]
+
+
+def test_batch_matches_single_quotes_and_resolves_each_price_once(manager):
+    items = [
+        {'crypto': crypto, 'amount_ars': amount, 'transaction_type': transaction_type}
+        for crypto in PRICES
+        for amount in _amounts(manager, crypto)
+        for transaction_type in ('VENDA', 'COMPRA')
+    ]
+
+    results = manager.get_quotes_batch(items)
+
+    assert sorted(manager.price_calls) == sorted(PRICES)
+    for item, result in zip(items, results):
+        assert result['success'] is True
+        single = manager.get_quote(item['crypto'], item['amount_ars'], item['transaction_type'])
+        for field in FIELDS:
+            assert result['quote'][field] == pytest.approx(single[field]), field
+
+
+def test_invalid_items_fail_individually(manager):
+    network = manager.networks['BTC']
+    items = [
+        {'crypto': 'DOGE', 'amount_ars': 1000},
+        {'crypto': 'BTC', 'amount_ars': network['max_amount'] * 10},
+        {'crypto': 'BTC', 'amount_ars': network['min_amount'], 'transaction_type': 'TROCA'},
+        {'crypto': 'BTC', 'amount_ars': network['min_amount']},
+    ]
+
+    results = manager.get_quotes_batch(items)
+
+    assert [result['success'] for result in results] == [False, False, False, True]
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from app.core.cache_manager import cache_manager
+from app.core.rate_limiter import RateLimiter
+
+
+def _limiter(monkeypatch):
+    limiter = RateLimiter()
+    # 100 por minuto: lotes de 5% = 5 unidades
+    monkeypatch.setitem(limiter.default_limits, "test", {"rate": 100, "per": 60})
+    return limiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    return _limiter(monkeypatch)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_leased_quota_is_spent_locally_and_refilled_in_background(fake_redis, limiter):
+    assert limiter._lease_batch(100) == 5
+
+    decisions = [limiter._check_rate("test", "atm-1")[0] for _ in range(5)]
+
+    assert decisions == [True] * 5
+    stats = limiter.get_stats()
+    assert stats['sync_acquires'] == 1
+    assert stats['local_decisions'] == 4
+    # Abaixo do nível mínimo a renovação corre fora do caminho da requisição
+    assert _wait_for(lambda: limiter.get_stats()['async_refills'] >= 1)
+    assert _wait_for(lambda: not limiter.leases["rate_limit:test:atm-1"].refilling)
+    assert limiter._check_rate("test", "atm-1")[0] is True
+    assert limiter.get_stats()['sync_acquires'] == 1
+
+
+def test_leases_never_exceed_the_shared_limit(fake_redis, limiter, monkeypatch):
+    workers = [limiter, _limiter(monkeypatch)]
+
+    allowed = sum(workers[i % 2]._check_rate("test", "atm-1")[0] for i in range(150))
+
+    assert 90 <= allowed <= 100
+    denied = workers[0]._check_rate("test", "atm-1")
+    assert denied[0] is False and denied[1] >= 1
+
+
+def test_redis_errors_fall_back_to_local_gcra_through_the_public_api(
+    fake_redis, limiter, monkeypatch
+):
+    def broken(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(limiter, "_acquire_redis", broken)
+
+    assert limiter._check_rate("test", "atm-1") == (True, 0)
+    assert cache_manager.redis_available() is False
+    assert "rate_limit:test:atm-1" in limiter.local_tats
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.core.auth import ALGORITHM, auth_manager
+from app.core.rate_limit_policies import PolicyRouter
+
+
+@pytest.fixture
+def router():
+    router = PolicyRouter()
+    router.set_registered_atms(["ATM001"])
+    return router
+
+
+def test_routes_resolve_to_the_first_matching_policy(router):
+    assert router.resolve("POST", "/api/auth/login", "1.2.3.4", {}) == (
+        "login", "ip:1.2.3.4", 1, None
+    )
+    assert router.resolve("POST", "/api/atm/quotes/batch", "1.2.3.4", {})[2] == 2
+    # Método fora da política específica cai na genérica
+    assert router.resolve("DELETE", "/api/atm/sessions/X1", "1.2.3.4", {})[0] == "kiosk"
+    assert router.resolve("GET", "/health", "1.2.3.4", {}) == ("ip", "ip:1.2.3.4", 1, None)
+
+
+def test_kiosk_bucket_requires_a_signed_token_of_a_registered_atm(router):
+    path = "/api/atm/sessions/ABC123"
+    token = auth_manager.create_atm_token("ATM001")
+
+    assert router.resolve("GET", path, "1.2.3.4", {"x-atm-token": token}) == (
+        "kiosk", "atm:ATM001", 1, "api"
+    )
+    # Cabeçalhos e rota controlados pelo cliente não escolhem o bucket
+    spoofed = {"x-atm-id": "ATM001", "x-atm-token": "ATM001"}
+    assert router.resolve("GET", path, "1.2.3.4", spoofed)[1] == "ip:1.2.3.4"
+    unregistered = {"x-atm-token": auth_manager.create_atm_token("ATM999")}
+    assert router.resolve("GET", path, "1.2.3.4", unregistered)[1] == "ip:1.2.3.4"
+    forged = {"x-atm-token": jwt.encode({"sub": "ATM001", "typ": "atm"}, "x" * 32, ALGORITHM)}
+    assert router.resolve("GET", path, "1.2.3.4", forged)[1] == "ip:1.2.3.4"
+
+
+def test_user_and_atm_tokens_are_not_interchangeable(router):
+    user_token = auth_manager.create_access_token({"sub": "admin"})
+    atm_token = auth_manager.create_atm_token("ATM001")
+    expired = auth_manager.create_access_token({"sub": "admin"}, timedelta(seconds=-1))
+
+    def identifier(method, path, headers):
+        return router.resolve(method, path, "1.2.3.4", headers)[1]
+
+    assert identifier("GET", "/api/admin/x", {"authorization": f"Bearer {user_token}"}) == (
+        "user:admin"
+    )
+    assert identifier("GET", "/api/admin/x", {"authorization": f"Bearer {atm_token}"}) == (
+        "ip:1.2.3.4"
+    )
+    assert identifier("GET", "/api/admin/x", {"authorization": f"Bearer {expired}"}) == (
+        "ip:1.2.3.4"
+    )
+    assert identifier("GET", "/api/atm/sessions/X", {"x-atm-token": user_token}) == "ip:1.2.3.4"
+
+
+def test_ip_ceiling_still_applies_when_the_key_falls_back_to_ip(router):
+    # Sem credencial o escopo do ATM (maior) vale por IP, mas o teto por IP continua
+    assert router.resolve("GET", "/api/atm/status", "1.2.3.4", {}) == (
+        "kiosk", "ip:1.2.3.4", 1, "api"
+    )
+    assert router.resolve("GET", "/api/admin/users", "1.2.3.4", {}) == (
+        "admin", "ip:1.2.3.4", 1, None
+    )
+
+
+def test_invalid_policies_are_skipped_and_a_catch_all_is_added():
+    router = PolicyRouter([
+        {"pattern": "/api/x", "scope": "api", "key": "cookie"},
+        {"pattern": "/api/y", "scope": "api", "cost": 0},
+        {"pattern": "/api/{name}/z", "scope": "reports", "cost": 5},
+    ])
+
+    assert [p['pattern'] for p in router.get_policies()] == ["/api/{name}/z", "*"]
+    assert router.resolve("GET", "/api/a/z", "1.2.3.4", {})[0:3] == ("reports", "ip:1.2.3.4", 5)
+    assert router.resolve("GET", "/api/a/b/z", "1.2.3.4", {})[0] == "ip"
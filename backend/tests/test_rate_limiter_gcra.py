@@ -0,0 +1,50 @@
+import pytest
+
+from app.core.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter()
+    # Sem arrendamento: cada decisão vai ao Redis (o arrendamento tem seu próprio teste)
+    monkeypatch.setattr(limiter, "_lease_batch", lambda max_requests: 1)
+    monkeypatch.setitem(limiter.default_limits, "test", {"rate": 5, "per": 60})
+    return limiter
+
+
+def test_redis_gcra_allows_burst_then_denies_with_retry_after(fake_redis, limiter):
+    decisions = [limiter._check_rate("test", "10.0.0.1") for _ in range(6)]
+
+    assert decisions[:5] == [(True, 0)] * 5
+    allowed, retry_after = decisions[5]
+    assert allowed is False
+    # Uma requisição a cada 60/5 = 12 s após a rajada
+    assert 11 <= retry_after <= 12
+    # Apenas o TAT é guardado, com expiração
+    assert fake_redis.pttl("rate_limit:test:10.0.0.1") > 0
+    assert limiter._check_rate("test", "10.0.0.2") == (True, 0)
+
+
+def test_workers_share_one_budget_through_redis(fake_redis, limiter, monkeypatch):
+    other_worker = RateLimiter()
+    monkeypatch.setattr(other_worker, "_lease_batch", lambda max_requests: 1)
+    monkeypatch.setitem(other_worker.default_limits, "test", {"rate": 5, "per": 60})
+
+    results = [
+        (limiter if i % 2 else other_worker)._check_rate("test", "10.0.0.1")[0] for i in range(8)
+    ]
+
+    assert results.count(True) == 5
+
+
+def test_cost_consumes_several_units_atomically(fake_redis, limiter):
+    assert limiter._check_rate("test", "atm", cost=3) == (True, 0)
+    assert limiter._check_rate("test", "atm", cost=3)[0] is False
+    assert limiter._check_rate("test", "atm", cost=2) == (True, 0)
+
+
+def test_in_memory_gcra_applies_the_same_limit_without_redis(no_redis, limiter):
+    decisions = [limiter._check_rate("test", "10.0.0.1")[0] for _ in range(6)]
+
+    assert decisions == [True] * 5 + [False]
+    assert "rate_limit:test:10.0.0.1" in limiter.local_tats
@@ -0,0 +1,80 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.audit import audit_manager
+from app.core.rate_limiter import rate_limiter
+from app.middleware.security_middleware import SecurityMiddleware, classify_resource
+
+
+@pytest.fixture
+def audited(monkeypatch):
+    events = []
+    monkeypatch.setattr(audit_manager, "log_event", lambda **event: events.append(event))
+    return events
+
+
+@pytest.fixture
+def client(no_redis, monkeypatch, audited):
+    monkeypatch.setattr(rate_limiter, "local_tats", {})
+    monkeypatch.setitem(rate_limiter.default_limits, "login", {"rate": 3, "per": 60})
+    app = FastAPI()
+
+    @app.post("/api/auth/login")
+    async def login():
+        return {"ok": True}
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/api/reports/export")
+    async def export():
+        return StreamingResponse(iter([b"a,b\n", b"1,2\n"]), media_type="text/csv")
+
+    @app.get("/api/atm/sessions/{code}")
+    async def broken(code: str):
+        raise RuntimeError("db down")
+
+    app.add_middleware(SecurityMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_requests_over_the_limit_get_429_with_retry_after(client, audited):
+    statuses = [client.post("/api/auth/login").status_code for _ in range(4)]
+
+    assert statuses == [200, 200, 200, 429]
+    response = client.post("/api/auth/login")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 20
+    assert "Tente novamente" in response.text
+    assert [event['details']['status_code'] for event in audited] == [200, 200, 200, 429, 429]
+    assert audited[-1]['status'] == "failure"
+
+
+def test_responses_pass_through_with_scope_header_and_one_audit_record(client, audited):
+    response = client.get("/api/reports/export")
+    client.get("/api/health")
+
+    assert response.text == "a,b\n1,2\n"
+    assert response.headers["x-rate-limit-scope"] == "reports"
+    assert len(audited) == 1
+    assert audited[0]['resource'] == "reports"
+    assert audited[0]['action'] == "GET_REQUEST"
+
+
+def test_application_errors_are_audited_as_failures(client, audited):
+    assert client.get("/api/atm/sessions/ABC123").status_code == 500
+
+    assert audited[0]['status'] == "failure"
+    assert audited[0]['details']['error'] == "db down"
+    assert audited[0]['resource'] == "atm_sessions"
+
+
+def test_classify_resource_matches_the_previous_audit_middleware():
+    # O id continua sendo o terceiro segmento do caminho completo, como antes
+    assert classify_resource("/api/admin/config/fees") == ("admin_config", "config")
+    assert classify_resource("/api/atm") == ("atm", None)
+    assert classify_resource("/webhooks/strike/abc-1") == ("webhooks", None)
+    assert classify_resource("/") == ("unknown", None)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache_manager import cache_manager
+from app.core.session_manager import SessionManager
+from app.models import Base, InvoiceStatusEnum, SessionStatusEnum
+from app.models import Session as SessionModel
+
+
+class _Notifications:
+    def notify_transaction_completed(self, data):
+        pass
+
+    def notify_transaction_failed(self, data):
+        pass
+
+
+@pytest.fixture
+def sessions(tmp_path, fake_redis):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    opened = []
+
+    def counting_factory():
+        opened.append(1)
+        return factory()
+
+    manager = SessionManager(counting_factory)
+    manager.notifications = _Notifications()
+    manager.opened = opened
+    manager.factory = factory
+    return manager
+
+
+def _add_session(manager, code, expires_in=timedelta(minutes=5)):
+    db = manager.factory()
+    db.add(SessionModel(
+        session_code=code, atm_id="ATM001", amount_ars=50_000.0, crypto_amount=0.0005,
+        invoice="lnbc1test", expires_at=datetime.utcnow() + expires_in
+    ))
+    db.commit()
+    db.close()
+
+
+def test_status_polls_hit_the_database_only_on_first_miss(sessions):
+    _add_session(sessions, "ABC123")
+
+    statuses = [sessions.get_status("ABC123").status for _ in range(5)]
+    payment = sessions.get_payment_status("ABC123")
+
+    assert statuses == [SessionStatusEnum.aguardando_pagamento.value] * 5
+    assert payment.payment_status == "aguardando"
+    assert len(sessions.opened) == 1
+
+
+def test_transitions_write_through_to_the_cache(sessions):
+    _add_session(sessions, "PAID01")
+    sessions.get_status("PAID01")
+
+    sessions.update_invoice_status("PAID01", "pago")
+    opened = len(sessions.opened)
+
+    assert sessions.get_payment_status("PAID01").payment_status == "pago"
+    assert sessions.get_status("PAID01").status == SessionStatusEnum.concluida.value
+    assert len(sessions.opened) == opened
+    cached = cache_manager.get_session_status("PAID01")
+    assert cached['invoice_status'] == InvoiceStatusEnum.pago.value
+
+
+def test_expired_session_is_persisted_and_cached_as_expired(sessions):
+    _add_session(sessions, "OLD001", expires_in=timedelta(seconds=-1))
+
+    assert sessions.get_status("OLD001").status == SessionStatusEnum.expirada.value
+
+    db = sessions.factory()
+    stored = db.query(SessionModel).filter(SessionModel.session_code == "OLD001").first()
+    assert stored.status == SessionStatusEnum.expirada
+    db.close()
+    assert cache_manager.get_session_status("OLD001")['status'] == SessionStatusEnum.expirada.value
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    executions = []
+
+    def upstream():
+        executions.append(1)
+        started.set()
+        release.wait(2)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        leader = pool.submit(flight.do, "quotes:BTC:ARS", upstream)
+        assert started.wait(2)
+        followers = [pool.submit(flight.do, "quotes:BTC:ARS", upstream) for _ in range(9)]
+        # Os seguidores precisam estar aguardando a execução do líder
+        while flight.get_stats()['calls'] < 10:
+            pass
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == [42] * 10
+    assert len(executions) == 1
+    stats = flight.get_stats()
+    assert stats['executions'] == 1
+    assert stats['collapsed'] == 9
+    assert stats['in_flight'] == 0
+
+
+def test_errors_propagate_to_every_waiter_and_the_key_is_released():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2)
+        raise RuntimeError("upstream fora do ar")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "k", failing)
+        assert started.wait(2)
+        follower = pool.submit(flight.do, "k", failing)
+        while flight.get_stats()['calls'] < 2:
+            pass
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    # Uma nova chamada após o erro vai ao upstream de novo
+    assert flight.do("k", lambda: "ok") == "ok"